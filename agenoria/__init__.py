@@ -4,13 +4,57 @@
 # Please see the LICENSE file that should have been included as part of
 # this package.
 
-from .plot_24h_viz import (
-    plot_diapers_24h_viz,
-    plot_feeding_24h_viz,
-    plot_sleep_24h_viz,
-)
-from .plot_diaper_charts import plot_diaper_charts
-from .plot_feeding_stats_charts import plot_feeding_stats_charts
-from .plot_growth_charts import plot_growth_charts
-from .plot_medical_charts import plot_medical_charts
-from .plot_sleep_stats_charts import plot_sleep_stats_charts
+import importlib
+import os
+from typing import TYPE_CHECKING
+
+# Charts are only written to files. Pick the headless backend before anything
+# imports pyplot, unless the user chose one.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Plot function -> module. They import Matplotlib and seaborn, so they are only
+# imported on first access, e.g. by the worker that draws the chart.
+PLOT_MODULES = {
+    "plot_diapers_24h_viz": "plot_24h_viz",
+    "plot_feeding_24h_viz": "plot_24h_viz",
+    "plot_sleep_24h_viz": "plot_24h_viz",
+    "plot_sleep_probability_24h_viz": "plot_24h_viz",
+    "plot_diaper_charts": "plot_diaper_charts",
+    "plot_feeding_stats_charts": "plot_feeding_stats_charts",
+    "plot_growth_charts": "plot_growth_charts",
+    "plot_medical_charts": "plot_medical_charts",
+    "plot_sleep_stats_charts": "plot_sleep_stats_charts",
+}
+
+__all__ = list(PLOT_MODULES)
+
+
+if TYPE_CHECKING:
+    from .plot_24h_viz import (
+        plot_diapers_24h_viz,
+        plot_feeding_24h_viz,
+        plot_sleep_24h_viz,
+        plot_sleep_probability_24h_viz,
+    )
+    from .plot_diaper_charts import plot_diaper_charts
+    from .plot_feeding_stats_charts import plot_feeding_stats_charts
+    from .plot_growth_charts import plot_growth_charts
+    from .plot_medical_charts import plot_medical_charts
+    from .plot_sleep_stats_charts import plot_sleep_stats_charts
+
+
+def __getattr__(name: str) -> object:
+    if name not in PLOT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Most plot functions share their module's name, which the import system binds
+    # on this package once the module is loaded. Bind the function over it, as when
+    # this package imported them eagerly. A plot module imported directly before
+    # its function was looked up here stays bound instead.
+    plot_fn = getattr(importlib.import_module(f"{__name__}.{PLOT_MODULES[name]}"), name)
+    globals()[name] = plot_fn
+    return plot_fn
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(PLOT_MODULES))
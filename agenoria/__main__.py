@@ -4,66 +4,456 @@
 # Please see the LICENSE file that should have been included as part of
 # this package.
 
+import argparse
+import datetime
 import multiprocessing
+import shutil
+import signal
+import sys
+import tempfile
+import threading
 import timeit
 from collections.abc import Callable
-from multiprocessing import Process
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from config import (
+    SOURCES,
+    DateWindow,
+    activate,
+    get_config_path,
+    get_config_paths,
+    get_input_path,
+    set_date_window,
+    sources,
+)
 from config import param as config
+from config.ingest import get_input_parts
+from config.shared import export_frames
+from config.timing import get_timings, reset_timings, stage
 
-from .plot_24h_viz import (
-    plot_diapers_24h_viz,
-    plot_feeding_24h_viz,
-    plot_sleep_24h_viz,
+from .growth_reference import MEASURES
+from .manifest import get_chart_hash, is_up_to_date, read_manifest, write_manifest
+from .pipeline import (
+    PROFILE_DIRECTORY,
+    LazyPlot,
+    PlotTask,
+    create_pool,
+    get_jobs,
+    get_task_timeout,
+    is_pool_broken,
+    run_plot_tasks,
 )
-from .plot_diaper_charts import plot_diaper_charts
-from .plot_feeding_stats_charts import plot_feeding_stats_charts
-from .plot_growth_charts import plot_growth_charts
-from .plot_medical_charts import plot_medical_charts
-from .plot_sleep_stats_charts import plot_sleep_stats_charts
-
-PLOT_TASKS: tuple[tuple[str, Callable[[], None]], ...] = (
-    ("build_daily_diaper_charts", plot_diaper_charts),
-    ("build_daily_sleep_stats_charts", plot_sleep_stats_charts),
-    ("build_daily_feeding_stats_charts", plot_feeding_stats_charts),
-    ("build_growth_charts", plot_growth_charts),
-    ("build_medical_charts", plot_medical_charts),
-    ("build_sleep_viz", plot_sleep_24h_viz),
-    ("build_feeding_viz", plot_feeding_24h_viz),
-    ("build_diaper_viz", plot_diapers_24h_viz),
+from .report import format_stages, sum_stages, write_build_report
+from .serve import DEFAULT_CACHE_MB, DEFAULT_HOST, DEFAULT_PORT, ChartService, serve_charts
+from .stats import STATS_DIRECTORY, export_stats
+from .watch import get_changed_paths, get_changes, take_snapshot, wait_for_changes
+
+# (config key, plot function, input tables the chart reads). The plot modules are
+# imported by the workers, see LazyPlot.
+PLOT_TASKS: tuple[tuple[str, Callable[[], None], tuple[str, ...]], ...] = (
+    ("build_daily_diaper_charts", LazyPlot("agenoria.plot_diaper_charts", "plot_diaper_charts"), ("diaper_data",)),
+    (
+        "build_daily_sleep_stats_charts",
+        LazyPlot("agenoria.plot_sleep_stats_charts", "plot_sleep_stats_charts"),
+        ("sleep_data",),
+    ),
+    (
+        "build_daily_feeding_stats_charts",
+        LazyPlot("agenoria.plot_feeding_stats_charts", "plot_feeding_stats_charts"),
+        ("feeding_bottle_data", "feeding_solid_data"),
+    ),
+    (
+        "build_growth_charts",
+        LazyPlot("agenoria.plot_growth_charts", "plot_growth_charts"),
+        ("growth_data", "hatch_data"),
+    ),
+    ("build_medical_charts", LazyPlot("agenoria.plot_medical_charts", "plot_medical_charts"), ("misc_data",)),
+    ("build_sleep_viz", LazyPlot("agenoria.plot_24h_viz", "plot_sleep_24h_viz"), ("sleep_data",)),
+    (
+        "build_feeding_viz",
+        LazyPlot("agenoria.plot_24h_viz", "plot_feeding_24h_viz"),
+        ("feeding_bottle_data", "feeding_solid_data"),
+    ),
+    ("build_diaper_viz", LazyPlot("agenoria.plot_24h_viz", "plot_diapers_24h_viz"), ("diaper_data",)),
+    (
+        "build_sleep_probability_viz",
+        LazyPlot("agenoria.plot_24h_viz", "plot_sleep_probability_24h_viz"),
+        ("sleep_data",),
+    ),
 )
 
 
-def get_enabled_plot_tasks() -> list[Callable[[], None]]:
-    return [plot_fn for config_key, plot_fn in PLOT_TASKS if config["output_data"][config_key]]
+# Reference files a chart reads besides its input tables: config key -> [input_data] keys
+REFERENCE_INPUTS: dict[str, tuple[str, ...]] = {
+    "build_growth_charts": tuple(input_key for input_key, _ in MEASURES.values()),
+}
 
+# Where a chart's manifest entry is kept: (output directory, output name, entry)
+ManifestUpdate = tuple[Path, str, dict[str, str]]
 
-def main() -> None:
-    # Create a timer
-    start = timeit.default_timer()
+
+def get_enabled_plot_tasks() -> list[tuple[str, Callable[[], None], tuple[str, ...]]]:
+    return [task for task in PLOT_TASKS if config["output_data"].get(task[0], False)]
+
+
+def get_required_sources(tasks: list[tuple[str, Callable[[], None], tuple[str, ...]]]) -> list[str]:
+    required = [source_name for _, _, source_names in tasks for source_name in source_names]
+    return list(dict.fromkeys(required))
+
+
+def get_input_paths(config_key: str, source_names: tuple[str, ...]) -> list[Path]:
+    input_keys = [SOURCES[source_name][0] for source_name in source_names]
+    input_keys += REFERENCE_INPUTS.get(config_key, ())
+    # Every part of a multi-part export
+    return [part for input_key in input_keys for part in get_input_parts(get_input_path(input_key))]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="agenoria", description="Build the charts from the Glow exports.")
+    parser.add_argument(
+        "config",
+        nargs="*",
+        help="TOML configuration files, one per child (default: config/config_zyw.toml)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="rebuild every enabled chart, even if its inputs and settings are unchanged",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"write a cProfile dump of every chart to the {PROFILE_DIRECTORY} directory next to the charts",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="number of worker processes (default: [runtime] jobs, 0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="only load and plot the records from this day on",
+    )
+    parser.add_argument(
+        "--until",
+        type=datetime.date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="only load and plot the records up to this day, inclusive",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and rebuild the charts whose input files or configuration change",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve the charts over HTTP, rendered on demand, instead of writing them to the output directory",
+    )
+    parser.add_argument(
+        "--export-stats",
+        action="store_true",
+        help=f"write the daily statistics as Parquet and JSON to the {STATS_DIRECTORY} directory next to the charts "
+        "instead of building the charts",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address of --serve (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port of --serve (default: {DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+    # Anything else would be dropped and the default configuration built instead
+    not_toml = [argument for argument in args.config if Path(argument).suffix != ".toml"]
+    if not_toml:
+        parser.error(f"configuration files must be .toml files: {', '.join(not_toml)}")
+    if args.since is not None and args.until is not None and args.since > args.until:
+        parser.error("--since must not be after --until")
+    if args.serve and args.watch:
+        parser.error("--serve already follows the input files, drop --watch")
+    if args.export_stats and (args.serve or args.watch):
+        parser.error("--export-stats runs once, drop --serve and --watch")
+    return args
+
+
+def prepare_config(
+    config_path: Path,
+    shared_dir: Path | None,
+    force: bool,
+    digests: dict[Path, str] | None = None,
+) -> tuple[list[PlotTask], dict[str, ManifestUpdate], int]:
+    """Parse the input of one configuration and return the charts to build.
+
+    Charts with the same inputs and settings as in the output directory's manifest
+    are skipped unless force is set. digests holds the hashes of input files known
+    to be unchanged. Returns the tasks, their manifest updates by task name and the
+    number of charts skipped.
+    """
+    if config_path != get_config_path():
+        activate(config_path)
 
     # Create the output directory
-    Path(config["output_data"]["output_directory"]).mkdir(
+    output_directory = Path(config["output_data"]["output_directory"])
+    output_directory.mkdir(
         parents=True,
         exist_ok=True,
     )
 
-    # Spin off multi-process plotting
-    procs = [Process(target=plot_task) for plot_task in get_enabled_plot_tasks()]
-    for proc in procs:
-        proc.start()
+    enabled = get_enabled_plot_tasks()
+    charts = read_manifest(output_directory)
+    if digests is None:
+        digests = {}
+    stale = []
+    tasks: list[PlotTask] = []
+    updates: dict[str, ManifestUpdate] = {}
+    for config_key, plot_fn, source_names in enabled:
+        output_name = config["output_data"][config_key.replace("build_", "output_", 1)]
+        chart_hash = get_chart_hash(config_key, get_input_paths(config_key, source_names), digests)
+        if not force and is_up_to_date(charts, output_name, chart_hash):
+            continue
+
+        name = f"{config_path.name}: {config_key}"
+        stale.append((config_key, plot_fn, source_names))
+        tasks.append((name, plot_fn, config_path))
+        updates[name] = (output_directory, output_name, {"hash": chart_hash, "chart": config_key})
+
+    # Load the tables the stale charts need, in parallel
+    required = get_required_sources(stale)
+    sources.prefetch(required)
+
+    # Write them once for the workers to memory-map, whatever the start method
+    if shared_dir is not None:
+        with stage("share"):
+            export_frames({name: sources.get(name) for name in required}, shared_dir)
+
+    return tasks, updates, len(enabled) - len(stale)
+
+
+def update_manifests(updates: dict[str, ManifestUpdate], errors: dict[str, str]) -> None:
+    # Record the charts that were built, forget the ones that failed
+    by_directory: dict[Path, dict[str, dict[str, str] | None]] = {}
+    for name, (output_directory, output_name, entry) in updates.items():
+        by_directory.setdefault(output_directory, {})[output_name] = None if name in errors else entry
+
+    for output_directory, entries in by_directory.items():
+        charts = read_manifest(output_directory)
+        for output_name, built_entry in entries.items():
+            if built_entry is None:
+                charts.pop(output_name, None)
+            else:
+                charts[output_name] = built_entry
+        write_manifest(output_directory, charts)
+
+
+def write_build_reports(
+    updates: dict[str, ManifestUpdate],
+    errors: dict[str, str],
+    reports: dict[str, dict],
+    seconds: float,
+    jobs: int,
+) -> None:
+    # One report per output directory, with the charts built into it
+    charts: dict[Path, dict[str, dict]] = {}
+    failed: dict[Path, dict[str, str]] = {}
+    for name, (output_directory, output_name, entry) in updates.items():
+        charts.setdefault(output_directory, {})
+        failed.setdefault(output_directory, {})
+        if name in reports:
+            charts[output_directory][output_name] = {"chart": entry["chart"], **reports[name]}
+        else:
+            failed[output_directory][output_name] = errors.get(name, "not run")
 
-    # Complete the processes
-    for proc in procs:
-        proc.join()
+    parent = get_timings()
+    for output_directory, directory_charts in charts.items():
+        write_build_report(output_directory, directory_charts, failed[output_directory], parent, seconds, jobs)
+
+
+def build_charts(
+    config_paths: list[Path],
+    args: argparse.Namespace,
+    jobs: int,
+    timeout: int,
+    shared_root: Path | None,
+    pool: ProcessPoolExecutor | None = None,
+    generation: int = 0,
+    digests: dict[Path, str] | None = None,
+) -> int:
+    """Build the stale charts of every configuration and return the exit status.
+
+    The input tables are shared with the workers from a directory under shared_root
+    when set. pool, generation and digests are kept between the builds of watch mode.
+    """
+    # Create a timer
+    start = timeit.default_timer()
+    reset_timings()
+
+    # Every (configuration, chart) pair goes on one pool
+    tasks: list[PlotTask] = []
+    updates: dict[str, ManifestUpdate] = {}
+    skipped = 0
+    shared_dirs: dict[Path, Path] = {}
+    for index, config_path in enumerate(config_paths):
+        if shared_root is not None:
+            shared_dirs[config_path] = shared_root / str(generation) / str(index)
+        config_tasks, config_updates, config_skipped = prepare_config(
+            config_path,
+            shared_dirs.get(config_path),
+            args.force,
+            digests,
+        )
+        tasks += config_tasks
+        updates.update(config_updates)
+        skipped += config_skipped
+
+    # Bounded multi-process plotting
+    jobs = get_jobs(jobs, len(tasks)) if pool is None else jobs
+    errors: dict[str, str] = {}
+    reports: dict[str, dict] = {}
+    if tasks:
+        window = (args.since, args.until)
+        errors, reports = run_plot_tasks(tasks, jobs, timeout, shared_dirs, args.profile, window, pool, generation)
+
+    update_manifests(updates, errors)
 
     # Stop the clock
     stop = timeit.default_timer()
+    write_build_reports(updates, errors, reports, stop - start, jobs)
 
     print("Time elapsed: ", stop - start, " seconds")
+    print(f"Charts: {len(tasks) - len(errors)} rebuilt, {skipped} skipped, {len(errors)} failed")
+    if reports:
+        stages = sum_stages([get_timings(), *(report["stages"] for report in reports.values())])
+        print(f"Stages: {format_stages(stages)}")
+
+    if errors:
+        print(f"{len(errors)} of {len(tasks)} charts failed:", file=sys.stderr)
+        for name, error in errors.items():
+            print(f"  {name}: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def reload_changed(changes: dict[Path, set[str | None]]) -> None:
+    # Only the active configuration holds tables, the others are loaded again when
+    # switched to. An edited configuration may point anywhere, drop every table.
+    names = changes.get(get_config_path())
+    if names is None:
+        return
+    if None in names:
+        activate(get_config_path())
+    else:
+        sources.reset(name for name in names if name is not None)
+
+
+def watch_charts(
+    config_paths: list[Path],
+    args: argparse.Namespace,
+    jobs: int,
+    timeout: int,
+    shared_root: Path | None,
+    stop: threading.Event | None = None,
+) -> int:
+    """Build the charts, then rebuild them whenever their inputs change until stop
+    is set or the user interrupts.
+
+    The process and its pool stay warm: only the changed tables are loaded again
+    and, through the manifest, only the charts that read them are rendered.
+    """
+    stop = stop or threading.Event()
+    jobs = get_jobs(jobs, len(PLOT_TASKS) * len(config_paths))
+    window: DateWindow = (args.since, args.until)
+    digests: dict[Path, str] = {}
+    generation = 0
+
+    snapshot = take_snapshot(config_paths)
+    pool = create_pool(jobs, window)
+    status = 0
+    try:
+        status = build_charts(config_paths, args, jobs, timeout, shared_root, pool, generation, digests)
+        print(f"Watching {len(config_paths)} configuration(s) and their input files, press Ctrl+C to stop")
+
+        while (current := wait_for_changes(config_paths, snapshot, stop)) is not None:
+            changes = get_changes(snapshot, current)
+            for path in get_changed_paths(snapshot, current):
+                digests.pop(path, None)
+            snapshot = current
+
+            reload_changed(changes)
+            generation += 1
+            changed_configs = [config_path for config_path in config_paths if config_path in changes]
+            try:
+                status = build_charts(changed_configs, args, jobs, timeout, shared_root, pool, generation, digests)
+            except (OSError, ValueError) as error:
+                # E.g. an export replaced by a truncated one, wait for the next change
+                print(f"Build failed: {error}", file=sys.stderr)
+                status = 1
+
+            # The tables shared with the previous build are no longer attached
+            if shared_root is not None:
+                shutil.rmtree(shared_root / str(generation - 1), ignore_errors=True)
+
+            # A worker that died took the pool down, start a new one
+            if status and is_pool_broken(pool):
+                pool.shutdown(cancel_futures=True)
+                pool = create_pool(jobs, window)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return status
+
+
+def create_service(config_paths: list[Path], jobs: int, timeout: int, date_window: DateWindow) -> ChartService:
+    # Every chart by its name without build_, e.g. sleep_viz, enabled or not
+    charts = {config_key.removeprefix("build_"): (config_key, plot_fn) for config_key, plot_fn, _ in PLOT_TASKS}
+    cache_mb = config.get("runtime", {}).get("serve_cache_mb", DEFAULT_CACHE_MB)
+    return ChartService(config_paths, charts, get_jobs(jobs, len(charts)), timeout, cache_mb * 2**20, date_window)
+
+
+def export_all_stats(config_paths: list[Path]) -> int:
+    # In this process, no chart is drawn and no worker started
+    start = timeit.default_timer()
+    for config_path in config_paths:
+        if config_path != get_config_path():
+            activate(config_path)
+        output_paths = export_stats()
+        print(f"{config_path.name}: {len(output_paths)} files written to {output_paths[0].parent}")
+    print("Time elapsed: ", timeit.default_timer() - start, " seconds")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    config_paths = get_config_paths(args.config) or [get_config_path()]
+
+    # Every configuration loads the rows of the window only
+    set_date_window(args.since, args.until)
+
+    if args.export_stats:
+        return export_all_stats(config_paths)
+
+    # Pool settings come from the first configuration
+    if config_paths[0] != get_config_path():
+        activate(config_paths[0])
+    share_tables = config.get("runtime", {}).get("share_tables", True)
+    # -j 0 overrides [runtime] jobs too
+    jobs = args.jobs if args.jobs is not None else config.get("runtime", {}).get("jobs", 0)
+    timeout = get_task_timeout()
+
+    if args.serve:
+        # Stopped like Ctrl+C, e.g. by a service manager, so the workers are shut down too
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        service = create_service(config_paths, jobs, timeout, (args.since, args.until))
+        return serve_charts(service, args.host, args.port)
+
+    with tempfile.TemporaryDirectory(prefix="agenoria-", ignore_cleanup_errors=True) as tmp_dir:
+        shared_root = Path(tmp_dir) if share_tables else None
+        if args.watch:
+            return watch_charts(config_paths, args, jobs, timeout, shared_root)
+        return build_charts(config_paths, args, jobs, timeout, shared_root)
 
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
-    main()
+    sys.exit(main())
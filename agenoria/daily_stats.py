@@ -0,0 +1,198 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Incremental daily statistics. Glow exports only grow at the tail, so the per-day
+# tables from the previous run are kept on disk and only the days from the last
+# stored date onward are aggregated again. The whole source is still loaded, and
+# the earlier rows are hashed to detect an edited export, so loading and that check
+# stay linear in the history. Only the aggregation is limited to the new days.
+
+import hashlib
+import warnings
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import get_cache_directory, get_date_window, get_source_path, sources
+from config import param as config
+from config.cache import get_tmp_path, read_meta, write_meta
+from config.timing import stage
+
+from .parse_config import get_date_range
+
+# Bump whenever a parser changes the columns or meaning of its daily table
+STATS_VERSION = 2
+
+DailyParser = Callable[..., pd.DataFrame]
+
+
+def get_store_directory() -> Path | None:
+    cache_dir = get_cache_directory()
+    if cache_dir is None or not config.get("cache", {}).get("incremental", False):
+        return None
+
+    # A date window, from --since/--until or debug mode, is always aggregated from scratch
+    if get_date_window() != (None, None):
+        return None
+
+    return cache_dir / "daily_stats"
+
+
+def get_history_digest(data: pd.DataFrame, row_hashes: np.ndarray, high_water_mark: pd.Timestamp) -> int:
+    # Digest of the rows before the last stored day, whatever their order. An edit
+    # that keeps the number of rows, such as a corrected amount, still changes it.
+    return int(row_hashes[(data["Date"] < high_water_mark).to_numpy()].sum())
+
+
+def _read_stored(
+    data: pd.DataFrame,
+    row_hashes: np.ndarray,
+    date_range: pd.DatetimeIndex,
+    data_path: Path,
+    meta_path: Path,
+) -> pd.DataFrame | None:
+    meta = read_meta(meta_path)
+    if meta.get("version") != STATS_VERSION or meta.get("pandas") != pd.__version__:
+        return None
+
+    # The history must start on the same day and must not have shrunk
+    high_water_mark = pd.Timestamp(meta.get("high_water_mark"))
+    if pd.Timestamp(meta.get("start_date")) != date_range[0] or date_range[-1] < high_water_mark:
+        return None
+
+    # Rows before the last stored day are not aggregated again. A different digest
+    # means the export was edited, not just extended.
+    if get_history_digest(data, row_hashes, high_water_mark) != meta.get("history_digest"):
+        return None
+
+    try:
+        return pd.read_parquet(data_path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_stored(
+    daily: pd.DataFrame,
+    data: pd.DataFrame,
+    row_hashes: np.ndarray,
+    data_path: Path,
+    meta_path: Path,
+) -> None:
+    high_water_mark = daily["date"].iloc[-1]
+    meta = {
+        "version": STATS_VERSION,
+        "pandas": pd.__version__,
+        "start_date": daily["date"].iloc[0].isoformat(),
+        "high_water_mark": high_water_mark.isoformat(),
+        "history_digest": get_history_digest(data, row_hashes, high_water_mark),
+    }
+
+    # Write to temporary files first so an interrupted run never leaves a torn table
+    tmp_data_path = get_tmp_path(data_path)
+    daily.to_parquet(tmp_data_path)
+    tmp_data_path.replace(data_path)
+    write_meta(meta, meta_path)
+
+
+def extend_daily_stats(
+    stored: pd.DataFrame,
+    data: pd.DataFrame,
+    date_range: pd.DatetimeIndex,
+    parse: DailyParser,
+    *,
+    overlap_days: int = 0,
+    cumulative_columns: tuple[str, ...] = (),
+) -> pd.DataFrame:
+    """Replace the stored days from the last one onward with a fresh aggregation.
+
+    The last stored day may have been exported half-way through, so it is aggregated
+    again. overlap_days earlier days are included in the aggregation and then dropped,
+    for statistics that depend on the previous day (the sleep midnight carry-over).
+    cumulative_columns are running totals, continued from the last kept day.
+    """
+    restart_date = stored["date"].iloc[-1]
+    aggregate_from = restart_date - pd.Timedelta(days=overlap_days)
+
+    tail = parse(data[data["Date"] >= aggregate_from], date_range=date_range[date_range >= aggregate_from])
+    tail = tail[tail["date"] >= restart_date]
+    head = stored[stored["date"] < restart_date]
+
+    if cumulative_columns and not head.empty:
+        tail = tail.copy()
+        for column in cumulative_columns:
+            tail[column] += head[column].iloc[-1]
+
+    return pd.concat([head, tail], ignore_index=True)
+
+
+def build_daily_stats(
+    data: pd.DataFrame,
+    parse: DailyParser,
+    store_path: Path,
+    *,
+    overlap_days: int = 0,
+    cumulative_columns: tuple[str, ...] = (),
+) -> pd.DataFrame:
+    """Return parse(data), reusing the table stored at store_path by the previous run.
+
+    Only the rows from the stored high-water mark onward are aggregated. The table is
+    rebuilt from scratch when the store is missing or the earlier history changed.
+    """
+    date_range = get_date_range(data["Date"])
+    data_path = store_path.with_suffix(".parquet")
+    meta_path = store_path.with_suffix(".json")
+
+    # Hashed once, for the digests of the stored and the new high-water mark
+    row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+    stored = _read_stored(data, row_hashes, date_range, data_path, meta_path) if data_path.exists() else None
+    if stored is None:
+        daily = parse(data, date_range=date_range)
+    else:
+        daily = extend_daily_stats(
+            stored,
+            data,
+            date_range,
+            parse,
+            overlap_days=overlap_days,
+            cumulative_columns=cumulative_columns,
+        )
+
+    try:
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_stored(daily, data, row_hashes, data_path, meta_path)
+    except OSError as error:
+        warnings.warn(f"Unable to store daily statistics in {data_path}: {error}", stacklevel=2)
+
+    return daily
+
+
+@stage("parse")
+def get_daily_stats(
+    name: str,
+    source_name: str,
+    parse: DailyParser,
+    *,
+    overlap_days: int = 0,
+    cumulative_columns: tuple[str, ...] = (),
+) -> pd.DataFrame:
+    # Daily statistics table of an input source, incremental when enabled in [cache]
+    data = sources.get(source_name)
+    store_dir = get_store_directory()
+    if store_dir is None:
+        return parse(data)
+
+    # Sources from different configs share the store directory
+    path_hash = hashlib.sha1(str(get_source_path(source_name).resolve()).encode()).hexdigest()[:12]
+    return build_daily_stats(
+        data,
+        parse,
+        store_dir / f"{name}-{path_hash}",
+        overlap_days=overlap_days,
+        cumulative_columns=cumulative_columns,
+    )
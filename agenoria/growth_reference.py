@@ -0,0 +1,105 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# CDC infant growth references. Each curve is read once per process and sex into
+# NumPy arrays, then measurements are scored with the LMS method:
+# z = ((y / M) ** L - 1) / (L * S), or ln(y / M) / S when L is 0.
+
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from config import get_input_path
+from config import param as config
+
+# Measure -> (input_data key of the CDC file, column the curve is indexed by)
+MEASURES = {
+    "weight": ("growth_curve_weight", "Agemos"),
+    "length": ("growth_curve_length", "Agemos"),
+    "head": ("growth_curve_head", "Agemos"),
+    "weight_length": ("growth_curve_weight_length", "Length"),
+}
+PERCENTILE_COLUMNS = ("P3", "P5", "P10", "P25", "P50", "P75", "P90", "P95", "P97")
+
+# Abramowitz & Stegun 7.1.26, |error| < 1.5e-7
+ERF_P = 0.3275911
+ERF_COEFFICIENTS = (1.061405429, -1.453152027, 1.421413741, -0.284496736, 0.254829592)
+
+# The CDC tables are indexed by age in months of 365.25 / 12 days
+DAYS_PER_MONTH = 30.4375
+
+
+@dataclass(frozen=True)
+class GrowthCurve:
+    # Ages in months, or lengths in cm for weight-for-length
+    x: np.ndarray
+    lms: np.ndarray  # (3, n): L, M and S at each x
+    percentiles: np.ndarray  # (len(PERCENTILE_COLUMNS), n)
+
+
+@functools.cache
+def read_growth_curves(curve_file: str) -> pd.DataFrame:
+    # The CDC reference curves are the same for every child, read them once per process
+    return pd.read_csv(curve_file)
+
+
+@functools.cache
+def load_growth_curve(curve_file: str, index: str, sex: int) -> GrowthCurve:
+    data = read_growth_curves(curve_file)
+    data = data.loc[data["Sex"] == sex].sort_values(index)
+
+    return GrowthCurve(
+        x=data[index].to_numpy(dtype=np.float64),
+        lms=data[["L", "M", "S"]].to_numpy(dtype=np.float64).T.copy(),
+        percentiles=data[list(PERCENTILE_COLUMNS)].to_numpy(dtype=np.float64).T.copy(),
+    )
+
+
+def get_sex() -> int:
+    # CDC coding: 1 for boys, 2 for girls
+    return 1 if config["info"]["gender"] == "boy" else 2
+
+
+def get_growth_curve(measure: str) -> GrowthCurve:
+    config_key, index = MEASURES[measure]
+    return load_growth_curve(str(get_input_path(config_key)), index, get_sex())
+
+
+def get_age_months(dates: pd.Series, birthday: pd.Timestamp) -> pd.Series:
+    # Completed days since birth over the mean month, the Agemos of the CDC tables
+    return (dates - birthday).dt.days / DAYS_PER_MONTH
+
+
+def interpolate_lms(curve: GrowthCurve, x: npt.ArrayLike) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Linear in between the tabulated points, NaN outside the reference range
+    x = np.asarray(x, dtype=np.float64)
+    lms = [np.interp(x, curve.x, values, left=np.nan, right=np.nan) for values in curve.lms]
+    return lms[0], lms[1], lms[2]
+
+
+def compute_z_scores(curve: GrowthCurve, x: npt.ArrayLike, measurement: npt.ArrayLike) -> np.ndarray:
+    l_value, m_value, s_value = interpolate_lms(curve, x)
+    ratio = np.asarray(measurement, dtype=np.float64) / m_value
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        power = (ratio**l_value - 1) / (l_value * s_value)
+        return np.where(l_value == 0, np.log(ratio) / s_value, power)
+
+
+def normal_cdf(z: npt.ArrayLike) -> np.ndarray:
+    z = np.asarray(z, dtype=np.float64)
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + ERF_P * x)
+    erf = 1 - t * np.polyval(ERF_COEFFICIENTS, t) * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+def compute_percentiles(curve: GrowthCurve, x: npt.ArrayLike, measurement: npt.ArrayLike) -> np.ndarray:
+    # 0-100, NaN for missing measurements and ages outside the reference
+    return normal_cdf(compute_z_scores(curve, x, measurement)) * 100
@@ -0,0 +1,98 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Offline interactive copies of the charts, as a self-contained HTML page or as
+# Plotly JSON. No network needed. The drawing thread only pickles the figure, which
+# takes tens of milliseconds. A background process rebuilds the figure from that copy,
+# converts it to Plotly and writes the files, while the caller saves the static formats
+# and goes on drawing. pyplot never sees the copy, and the converter's warnings stay
+# in that process.
+
+import io
+import pickle
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+INTERACTIVE_FORMATS = (".html", ".json")
+
+# One process, started on the first interactive copy
+_executor: ProcessPoolExecutor | None = None
+_pending: list[Future[None]] = []
+
+
+class _FigurePickler(pickle.Pickler):
+    # A pickled pyplot figure registers its copy with pyplot when loaded, this one does not
+    def reducer_override(self, obj: Any) -> Any:
+        from matplotlib.figure import Figure  # noqa: PLC0415
+
+        if not issubclass(type(obj), Figure):
+            return NotImplemented
+        # As Figure pickles itself, (copyreg.__newobj__, (type,), state, ...)
+        reducer, args, state, *rest = obj.__reduce_ex__(pickle.DEFAULT_PROTOCOL)
+        state.pop("_restore_to_pylab", None)
+        return reducer, args, state, *rest
+
+
+def dump_figure(figure: "Figure") -> bytes:
+    buffer = io.BytesIO()
+    _FigurePickler(buffer).dump(figure)
+    return buffer.getvalue()
+
+
+def write_interactive(figure_data: bytes, output_paths: list[Path]) -> None:
+    # Plotly is only needed for this, keep it out of the import time of every run
+    import plotly.io as pio  # noqa: PLC0415
+    from plotly.tools import mpl_to_plotly  # noqa: PLC0415
+
+    # The converter warns about every label it cannot place exactly and about the
+    # Matplotlib API it uses
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", module=r"plotly\.matplotlylib")
+        plotly_figure = mpl_to_plotly(pickle.loads(figure_data))
+
+    for output_path in output_paths:
+        if output_path.suffix == ".html":
+            # Embed plotly.js so the page opens offline
+            pio.write_html(plotly_figure, output_path, include_plotlyjs=True, auto_open=False)
+        else:
+            pio.write_json(plotly_figure, output_path)
+
+
+def submit_interactive(figure: "Figure", output_paths: list[Path]) -> None:
+    """Write the interactive copies of figure in the background. The figure is
+    copied first, the caller may go on with it right away.
+    """
+    global _executor
+
+    figure_data = dump_figure(figure)
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=1)
+    _pending.append(_executor.submit(write_interactive, figure_data, output_paths))
+
+
+def wait_interactive(raise_errors: bool = True) -> None:
+    # Wait for every submitted figure, then raise the first failure if asked to
+    futures = list(_pending)
+    _pending.clear()
+
+    errors = [error for error in (future.exception() for future in futures) if error is not None]
+    if errors and raise_errors:
+        raise errors[0]
+
+
+def shutdown_interactive() -> None:
+    # Stop the converter process, the next copy starts a new one
+    global _executor
+
+    wait_interactive(raise_errors=False)
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
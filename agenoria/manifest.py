@@ -0,0 +1,74 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Build manifest kept next to the charts. Each chart is recorded with a hash of
+# everything its output depends on, so unchanged charts can be skipped.
+
+import hashlib
+import importlib.metadata
+import json
+from pathlib import Path
+
+from config import get_date_window
+from config import param as config
+from config.cache import file_digest, read_meta, write_meta
+
+from .parse_config import get_output_formats
+
+MANIFEST_NAME = "manifest.json"
+# Bump whenever the hashed content changes
+MANIFEST_VERSION = 3
+
+# Configuration sections that change the look of every chart
+CONFIG_SECTIONS = ("info", "output_format", "debug", "trends")
+
+
+def get_package_version() -> str:
+    try:
+        return importlib.metadata.version("agenoria")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def get_chart_hash(config_key: str, input_paths: list[Path], digests: dict[Path, str]) -> str:
+    # digests memoizes the file hashes, charts often share their inputs
+    for path in input_paths:
+        if path not in digests:
+            digests[path] = file_digest(path)
+
+    content = {
+        "chart": config_key,
+        "inputs": {str(path): digests[path] for path in sorted(input_paths)},
+        "config": {section: config.get(section, {}) for section in CONFIG_SECTIONS},
+        # A chart of --since/--until is not the chart of the whole log
+        "window": get_date_window(),
+        "version": get_package_version(),
+    }
+    # TOML dates are not JSON types, hash their ISO form
+    encoded = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def get_output_paths(output_name: str) -> list[Path]:
+    directory_path = Path(config["output_data"]["output_directory"])
+    return [directory_path / f"{output_name}{output_format}" for output_format in get_output_formats()]
+
+
+def read_manifest(directory: Path) -> dict[str, dict]:
+    manifest = read_meta(directory / MANIFEST_NAME)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("charts", {})
+
+
+def write_manifest(directory: Path, charts: dict[str, dict]) -> None:
+    write_meta({"version": MANIFEST_VERSION, "charts": charts}, directory / MANIFEST_NAME)
+
+
+def is_up_to_date(charts: dict[str, dict], output_name: str, chart_hash: str) -> bool:
+    # Same inputs and settings, and every output file is still there
+    entry = charts.get(output_name, {})
+    return entry.get("hash") == chart_hash and all(path.exists() for path in get_output_paths(output_name))
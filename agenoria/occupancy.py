@@ -0,0 +1,78 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import numpy as np
+import pandas as pd
+
+from config.timing import stage
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def get_minute_index(timestamps: pd.Series, start_date: pd.Timestamp) -> np.ndarray:
+    # Minutes since midnight of start_date, missing timestamps dropped
+    elapsed = timestamps.dropna() - start_date
+    return (elapsed // pd.Timedelta(minutes=1)).to_numpy(dtype=np.int64)
+
+
+@stage("parse")
+def build_occupancy(
+    begin_time: pd.Series,
+    end_time: pd.Series,
+    start_date: pd.Timestamp,
+    days: int,
+) -> np.ndarray:
+    """Day x minute-of-day grid, 1 where any interval covers the minute.
+
+    Intervals are half-open [begin, end) and may cross midnight. The grid is filled
+    with one difference array and a cumulative sum, so the cost is linear in the
+    number of intervals plus the size of the grid.
+    """
+    valid = begin_time.notna() & end_time.notna()
+    grid_size = days * MINUTES_PER_DAY
+    start = np.clip(get_minute_index(begin_time[valid], start_date), 0, grid_size)
+    stop = np.clip(get_minute_index(end_time[valid], start_date), 0, grid_size)
+
+    # +1 where an interval starts, -1 where it stops
+    keep = stop > start
+    delta = np.bincount(start[keep], minlength=grid_size + 1) - np.bincount(stop[keep], minlength=grid_size + 1)
+
+    covered = np.cumsum(delta[:grid_size]) > 0
+    return covered.astype(np.uint8).reshape(days, MINUTES_PER_DAY)
+
+
+def bin_events(
+    timestamps: pd.Series,
+    start_date: pd.Timestamp,
+    days: int,
+) -> np.ndarray:
+    # Day x minute-of-day grid of point event counts
+    grid_size = days * MINUTES_PER_DAY
+    index = get_minute_index(timestamps, start_date)
+    index = index[(index >= 0) & (index < grid_size)]
+
+    counts = np.bincount(index, minlength=grid_size)
+    return counts.astype(np.uint16).reshape(days, MINUTES_PER_DAY)
+
+
+def get_weekly_probability(occupancy: np.ndarray, logged_days: np.ndarray) -> np.ndarray:
+    """Week x minute-of-day fraction of logged days with the minute occupied.
+
+    Days without any records are left out instead of counted as empty. Weeks with no
+    logged days are NaN.
+    """
+    days = occupancy.shape[0]
+    weeks = -(-days // 7)
+    padding = weeks * 7 - days
+
+    occupied = np.pad(occupancy * logged_days[:, None], ((0, padding), (0, 0)))
+    logged = np.pad(logged_days.astype(np.int64), (0, padding))
+
+    occupied_sum = occupied.reshape(weeks, 7, MINUTES_PER_DAY).sum(axis=1)
+    logged_sum = logged.reshape(weeks, 7).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return occupied_sum / logged_sum[:, None]
@@ -0,0 +1,183 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Paged 24-hour charts. With viz_page_weeks set in [output_format], the PDF of a
+# 24-hour chart holds one page per viz_page_weeks weeks of the history instead of a
+# single page. Each page is drawn, saved and closed before the next one, so memory
+# does not grow with the history. With pypdf installed and the cache enabled, every
+# page is also kept as a PDF of its own, named by a digest of its rows and settings,
+# and the pages whose rows did not change are copied instead of drawn again.
+
+import gc
+import hashlib
+import json
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from config import get_cache_directory
+from config import param as config
+from config.timing import stage
+
+from .parse_config import get_output_formats
+from .plot_settings import export_figure, get_layout_bbox, set_page_size
+
+if TYPE_CHECKING:
+    import pypdf
+else:
+    try:
+        import pypdf
+    except ModuleNotFoundError:  # Optional, every page is then drawn again on each build
+        pypdf = None
+
+# Bump whenever the drawing of a page changes
+PAGE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Page:
+    # Day numbers of the first and last day on the page, from 1 for the first day with events
+    first_day: int
+    last_day: int
+
+
+# One table per series of the chart, with the day_number of every row
+PageData = tuple[pd.DataFrame, ...]
+PageDrawer = Callable[[Page, PageData], Figure]
+
+
+def get_page_weeks() -> int:
+    # 0 keeps the whole history on one page
+    return int(config["output_format"].get("viz_page_weeks", 0))
+
+
+def get_pages(end_date: int, page_weeks: int) -> list[Page]:
+    # Every page spans as many days, so a day is as wide on each. The last one may be partly empty.
+    page_days = 7 * page_weeks
+    return [Page(first_day, first_day + page_days - 1) for first_day in range(1, end_date + 1, page_days)]
+
+
+def select_days(data: pd.DataFrame, first_day: int, last_day: int) -> pd.DataFrame:
+    # The rows from first_day to last_day, by binary search on the sorted day numbers
+    start, stop = np.searchsorted(data["day_number"].to_numpy(), [first_day, last_day + 1])
+    return data.iloc[start:stop]
+
+
+def select_page(data: PageData, page: Page) -> PageData:
+    # From the day before the page, whose sleep sessions crossing midnight end on it
+    return tuple(select_days(table, page.first_day - 1, page.last_day) for table in data)
+
+
+def get_page_key(page: Page, page_data: PageData) -> str:
+    settings = {
+        "version": PAGE_VERSION,
+        "matplotlib": mpl.__version__,
+        "page": [page.first_day, page.last_day],
+        "output_format": config["output_format"],
+    }
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+    for data in page_data:
+        digest.update(json.dumps(list(data.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_page_directory(output_filename: str) -> Path | None:
+    cache_dir = get_cache_directory()
+    if cache_dir is None or pypdf is None:
+        return None
+
+    page_dir = cache_dir / "viz_pages" / output_filename
+    page_dir.mkdir(parents=True, exist_ok=True)
+    return page_dir
+
+
+def save_page(figure: Figure, pdf: PdfPages) -> None:
+    set_page_size(figure)
+    bbox = get_layout_bbox(figure)
+    with stage("save"):
+        pdf.savefig(figure, bbox_inches=bbox)
+
+    # Released before the next page is drawn. A figure is full of reference cycles,
+    # left to the garbage collector several pages would pile up.
+    plt.close(figure)
+    gc.collect()
+
+
+def write_cached_page(page_path: Path, figure: Figure) -> None:
+    tmp_path = page_path.with_name(f"{page_path.stem}.{os.getpid()}.tmp")
+    with PdfPages(tmp_path) as pdf:
+        save_page(figure, pdf)
+    tmp_path.replace(page_path)
+
+
+def merge_pages(page_paths: list[Path], output_path: Path) -> None:
+    writer = pypdf.PdfWriter()
+    for page_path in page_paths:
+        writer.append(page_path)
+
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    with stage("save"):
+        writer.write(tmp_path)
+    tmp_path.replace(output_path)
+
+
+def export_pages(output_filename: str, pages: list[Page], data: PageData, draw_page: PageDrawer) -> None:
+    directory_path = Path(config["output_data"]["output_directory"])
+    directory_path.mkdir(parents=True, exist_ok=True)
+    output_path = directory_path / f"{output_filename}.pdf"
+
+    page_dir = get_page_directory(output_filename)
+    if page_dir is None:
+        with PdfPages(output_path) as pdf:
+            for page in pages:
+                save_page(draw_page(page, select_page(data, page)), pdf)
+        return
+
+    # Draw the pages missing from the cache, then copy every page into the output
+    page_paths = []
+    for page in pages:
+        page_data = select_page(data, page)
+        page_path = page_dir / f"{get_page_key(page, page_data)}.pdf"
+        if not page_path.exists():
+            write_cached_page(page_path, draw_page(page, page_data))
+        page_paths.append(page_path)
+    merge_pages(page_paths, output_path)
+
+    # The pages of previous builds whose rows have changed since
+    for stale_path in set(page_dir.iterdir()) - set(page_paths):
+        stale_path.unlink(missing_ok=True)
+
+
+def export_24h_viz(output_filename: str, end_date: int, data: PageData, draw_page: PageDrawer) -> None:
+    """Export the 24-hour chart of days 1 to end_date.
+
+    draw_page returns a new figure of a page and its rows of data. The chart is
+    drawn once, on a single page, unless viz_page_weeks is set. The PDF then holds
+    every page, and the other formats the last page only.
+    """
+    page_weeks = get_page_weeks()
+    if page_weeks <= 0:
+        export_figure(draw_page(Page(1, end_date), data), output_filename)
+        return
+
+    pages = get_pages(end_date, page_weeks)
+    output_formats = get_output_formats()
+    if ".pdf" in output_formats:
+        export_pages(output_filename, pages, data, draw_page)
+
+    single_formats = [output_format for output_format in output_formats if output_format != ".pdf"]
+    if single_formats:
+        export_figure(draw_page(pages[-1], select_page(data, pages[-1])), output_filename, single_formats)
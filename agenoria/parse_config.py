@@ -6,6 +6,9 @@
 
 import pandas as pd
 
+from config import get_date_window
+from config import param as config
+
 
 def get_daytime_index(data: pd.Series) -> pd.Series:
     return (data.dt.hour >= 7) & (data.dt.hour < 20)
@@ -13,3 +16,21 @@ def get_daytime_index(data: pd.Series) -> pd.Series:
 
 def get_nighttime_index(data: pd.Series) -> pd.Series:
     return (data.dt.hour < 7) | (data.dt.hour >= 21)
+
+
+def get_date_range(dates: pd.Series) -> pd.DatetimeIndex:
+    # The bounds of the date window if set, else the first and last date in column.
+    # Empty when the window is open on a side that has no dates to go by.
+    since, until = get_date_window()
+    start_date = dates.min() if since is None else since
+    end_date = dates.max() if until is None else until
+    if pd.isna(start_date) or pd.isna(end_date):
+        return pd.DatetimeIndex([])
+
+    return pd.date_range(start_date, end_date)
+
+
+def get_output_formats() -> list[str]:
+    # format is a single extension or a list of them
+    formats = config["output_format"]["format"]
+    return [formats] if isinstance(formats, str) else list(formats)
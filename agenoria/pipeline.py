@@ -0,0 +1,302 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Process pool that renders the charts. A fixed number of workers pick up the
+# enabled charts one at a time, switching between configurations as needed, and
+# every failure is reported back to main().
+
+import cProfile
+import functools
+import importlib
+import os
+import signal
+import tempfile
+import timeit
+import traceback
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import FrameType
+
+from config import DateWindow, activate, get_config_path, set_date_window, sources
+from config import param as config
+from config.shared import attach_frames
+from config.timing import get_timings, reset_timings, stage
+
+from .interactive import wait_interactive
+
+# (chart name, plot function, configuration file)
+PlotTask = tuple[str, Callable[[], None], Path]
+
+# cProfile dumps of --profile, inside the output directory
+PROFILE_DIRECTORY = "profile"
+
+# Seconds the parent waits for a chart past its timeout. The worker's own alarm does
+# not cover starting the worker and loading the tables.
+TIMEOUT_GRACE = 60
+
+
+class LazyPlot:
+    """A plot function named by its module, imported on the first call.
+
+    The parent process only schedules the charts, so it never imports Matplotlib
+    and seaborn. Pickled by name, the worker imports what its chart needs.
+    """
+
+    def __init__(self, module: str, name: str) -> None:
+        self.module = module
+        self.__name__ = name
+
+    def __call__(self) -> None:
+        getattr(importlib.import_module(self.module), self.__name__)()
+
+
+# Configuration file, shared tables and build generation the worker has attached
+_attached: tuple[Path, Path | None, int] | None = None
+
+
+def get_jobs(jobs: int | None, task_count: int) -> int:
+    # 0 or unset means one worker per CPU, never more workers than charts
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, task_count))
+
+
+def get_task_timeout() -> int:
+    # Seconds per chart, 0 for no limit
+    return int(config.get("runtime", {}).get("task_timeout", 0))
+
+
+def init_worker(date_window: DateWindow = (None, None)) -> None:
+    # Plotting libraries load here, once per worker and never in the parent
+    import matplotlib as mpl  # noqa: PLC0415
+    import seaborn as sns  # noqa: PLC0415
+    from pandas.plotting import register_matplotlib_converters  # noqa: PLC0415
+
+    # Charts are only written to files, never shown
+    mpl.use("Agg")
+    register_matplotlib_converters()
+    sns.set(style="darkgrid")
+
+    # Workers that parse their own tables load the same dates as the parent
+    set_date_window(*date_window)
+
+
+def prepare_worker(config_path: Path, shared_dir: Path | None, generation: int = 0) -> None:
+    """Switch the worker to a configuration and its input tables.
+
+    A new generation means the configuration or its inputs may have changed since
+    the last chart, as in watch mode, so both are read again.
+    """
+    global _attached
+
+    if _attached == (config_path, shared_dir, generation):
+        return
+
+    if config_path != get_config_path() or (_attached is not None and _attached[2] != generation):
+        activate(config_path)
+
+    # Attach the parent's tables zero-copy instead of parsing them again
+    if shared_dir is not None:
+        sources.attach(attach_frames(shared_dir))
+    _attached = (config_path, shared_dir, generation)
+
+
+def _raise_timeout(timeout: int, signum: int, frame: FrameType | None) -> None:
+    raise TimeoutError(f"timed out after {timeout} s")
+
+
+def get_profile_path(config_path: Path, plot_fn: Callable[[], None]) -> Path:
+    # Next to the charts, named after the configuration and the plot function
+    output_directory = Path(config["output_data"]["output_directory"])
+    return output_directory / PROFILE_DIRECTORY / f"{config_path.stem}-{plot_fn.__name__}.prof"
+
+
+def run_plot_task(
+    plot_fn: Callable[[], None],
+    timeout: int,
+    config_path: Path,
+    shared_dir: Path | None,
+    profile: bool = False,
+    generation: int = 0,
+) -> dict:
+    """Render one chart and return its report: the worker's pid, the wall time and
+    the time spent in each stage.
+    """
+    import matplotlib.pyplot as plt  # noqa: PLC0415
+
+    start = timeit.default_timer()
+    reset_timings()
+    with stage("load"):
+        prepare_worker(config_path, shared_dir, generation)
+
+    # SIGALRM is Unix only, elsewhere the charts run without a limit
+    use_alarm = timeout > 0 and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, functools.partial(_raise_timeout, timeout))
+        signal.alarm(timeout)
+
+    profiler = cProfile.Profile() if profile else None
+    try:
+        with stage("plot"):
+            if profiler is None:
+                plot_fn()
+            else:
+                profiler.runcall(plot_fn)
+        # The chart is done once its interactive copies are written too
+        with stage("save"):
+            wait_interactive()
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+        # Do not leak half-drawn figures, or the copies of a failed chart, into the
+        # worker's next chart
+        wait_interactive(raise_errors=False)
+        plt.close("all")
+
+    if profiler is not None:
+        profile_path = get_profile_path(config_path, plot_fn)
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_path)
+
+    return {
+        "pid": os.getpid(),
+        "seconds": timeit.default_timer() - start,
+        "stages": get_timings(),
+    }
+
+
+def render_chart(
+    config_key: str,
+    plot_fn: Callable[[], None],
+    timeout: int,
+    config_path: Path,
+    output_format: str,
+    date_window: DateWindow = (None, None),
+    generation: int = 0,
+) -> bytes:
+    """Render one chart of the chart service in a single format and return the file.
+
+    The worker keeps the tables of its configuration and date window loaded, a
+    request for the same ones parses nothing. See run_plot_task() for timeout and
+    generation.
+    """
+    set_date_window(*date_window)
+    prepare_worker(config_path, None, generation)
+
+    # Into a directory of its own, so concurrent builds of the same chart never meet
+    output_data, output_settings = config["output_data"], config["output_format"]
+    output_name = output_data[config_key.replace("build_", "output_", 1)]
+    with tempfile.TemporaryDirectory(prefix="agenoria-") as tmp_dir:
+        config["output_data"] = {**output_data, "output_directory": tmp_dir}
+        config["output_format"] = {**output_settings, "format": output_format}
+        try:
+            run_plot_task(plot_fn, timeout, config_path, None, generation=generation)
+        finally:
+            config["output_data"], config["output_format"] = output_data, output_settings
+        return (Path(tmp_dir) / f"{output_name}{output_format}").read_bytes()
+
+
+def create_pool(jobs: int, date_window: DateWindow = (None, None)) -> ProcessPoolExecutor:
+    # date_window is the --since/--until window of the run
+    return ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(date_window,))
+
+
+def stop_workers(pool: ProcessPoolExecutor) -> None:
+    # A worker stuck where its alarm cannot interrupt it, e.g. in native code, can
+    # only be killed. The pool is broken afterwards.
+    for process in list(pool._processes.values()):  # noqa: SLF001
+        process.kill()
+
+
+def is_pool_broken(pool: ProcessPoolExecutor) -> bool:
+    # A worker that died takes the pool down, every later submission fails
+    try:
+        pool.submit(int).result()
+    except BrokenProcessPool:
+        return True
+    return False
+
+
+def run_plot_tasks(
+    tasks: list[PlotTask],
+    jobs: int,
+    timeout: int,
+    shared_dirs: dict[Path, Path],
+    profile: bool = False,
+    date_window: DateWindow = (None, None),
+    pool: ProcessPoolExecutor | None = None,
+    generation: int = 0,
+) -> tuple[dict[str, str], dict[str, dict]]:
+    """Render the charts on a pool of jobs workers. Returns the errors and the
+    reports of the charts that were built, both by chart name.
+
+    Charts of several configurations share the pool. shared_dirs maps a
+    configuration file to its exported input tables, if any. With profile, each
+    chart also writes a cProfile dump, see get_profile_path(). date_window is the
+    --since/--until window of the run.
+
+    pool is an already running pool to reuse, from create_pool(), with generation
+    counting the builds it ran so its workers reload what changed in between.
+
+    A chart that raises or runs longer than timeout seconds is reported and the
+    remaining charts still run. A worker that dies takes the pool down with it, the
+    charts that had not finished are then reported as failed. A chart with no result
+    TIMEOUT_GRACE seconds past its timeout has a worker that ignores its alarm: the
+    workers are killed, leaving pool broken, and the charts they lost run again on a
+    new pool.
+    """
+    if pool is None:
+        with create_pool(jobs, date_window) as new_pool:
+            return run_plot_tasks(tasks, jobs, timeout, shared_dirs, profile, pool=new_pool)
+
+    errors: dict[str, str] = {}
+    reports: dict[str, dict] = {}
+    futures: dict[str, Future[dict]] = {}
+    for name, plot_fn, config_path in tasks:
+        shared_dir = shared_dirs.get(config_path)
+        try:
+            futures[name] = pool.submit(run_plot_task, plot_fn, timeout, config_path, shared_dir, profile, generation)
+        except BrokenProcessPool:
+            errors[name] = "worker process terminated abruptly"
+
+    # The earlier charts are collected first, so each one has started by the time the
+    # parent waits for it, and its deadline is never too short
+    deadline = timeout + TIMEOUT_GRACE if timeout > 0 else None
+    stopped = False
+    lost: list[PlotTask] = []
+    for task in tasks:
+        name = task[0]
+        if name not in futures:
+            continue
+        future = futures[name]
+        try:
+            reports[name] = future.result(timeout=None if stopped else deadline)
+        except BrokenProcessPool:
+            if stopped:
+                lost.append(task)
+            else:
+                errors[name] = "worker process terminated abruptly"
+        except Exception as error:
+            if isinstance(error, TimeoutError) and not future.done():
+                errors[name] = f"TimeoutError: timed out after {timeout} s, worker stopped"
+                stop_workers(pool)
+                stopped = True
+                continue
+            # The worker's traceback is chained as the cause
+            traceback.print_exception(error)
+            errors[name] = f"{type(error).__name__}: {error}"
+
+    if lost:
+        with create_pool(jobs, date_window) as new_pool:
+            lost_errors, lost_reports = run_plot_tasks(
+                lost, jobs, timeout, shared_dirs, profile, date_window, new_pool, generation
+            )
+        errors.update(lost_errors)
+        reports.update(lost_reports)
+
+    return errors, reports
@@ -9,84 +9,132 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.axes import Axes
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
 
-from config import (
-    diaper_data,
-    feeding_bottle_data,
-    feeding_solid_data,
-    sleep_data,
-)
+from config import events
 from config import param as config
+from config.events import MISSING_TIME, NS_PER_DAY, Events, get_day, get_decimal_hours
+from config.timing import stage
 
+from .occupancy import build_occupancy, get_weekly_probability
+from .paging import Page, PageData, export_24h_viz
 from .plot_settings import (
     export_figure,
     format_24h_week_plot_horizontal,
     format_24h_week_plot_vertical,
+    get_date_limits,
 )
 
 BAR_SIZE = 1
 
 
-def get_end_date(data: pd.Series, *, first_year_only: bool) -> int:
-    # Assign the end date. Either 365 or actual day number.
-    return 365 if first_year_only else int(data.iloc[0])
+def get_end_date(day_number: pd.Series | np.ndarray, *, first_year_only: bool) -> int:
+    # Assign the end date. Either 365 or actual day number, a week without any days.
+    if first_year_only:
+        return 365
+    return int(day_number.max()) if len(day_number) else 7
 
 
-def parse_raw_data(data: pd.DataFrame, timestamp_column: str) -> pd.DataFrame:
-    parsed = data.copy()
+@stage("parse")
+def parse_raw_data(events: Events) -> pd.DataFrame:
+    # Convert date to day number, from the first day with events
+    day_number = events.get_days() - events.first_day + 1
 
-    # Get start and end dates
-    start_date = parsed["Date"].iloc[-1]
+    # Convert timestamp to decimal hour
+    return pd.DataFrame({"day_number": day_number, "timestamp_hour": get_decimal_hours(events.start)})
 
-    # Convert timesteamp to decimal hour
-    parsed["timestamp_hour"] = parsed[timestamp_column].dt.hour + parsed[timestamp_column].dt.minute / 60
 
-    # Convert date to day number
-    parsed["day_number"] = (parsed["Date"] - start_date).dt.days + 1
+@stage("parse")
+def parse_sleep_sessions(sleep_events: Events) -> pd.DataFrame:
+    data = parse_raw_data(sleep_events)
 
-    return parsed
+    # Convert end time timestamp to decimal hours
+    end_time = sleep_events.end
+    has_end = end_time != MISSING_TIME
+    end_timestamp_hour = np.where(has_end, get_decimal_hours(end_time), np.nan)
+    data["end_timestamp_hour"] = end_timestamp_hour
+
+    # Find the sessions that extend into the next day
+    crosses_midnight = has_end & (end_time // NS_PER_DAY > sleep_events.get_days())
+    data["crosses_midnight"] = crosses_midnight
+
+    # Compute duration in decimal hours, cut off to midnight for the sessions
+    # crossing it. The offset is plotted the next day.
+    timestamp_hour = data["timestamp_hour"].to_numpy()
+    data["duration"] = np.where(crosses_midnight, 24 - timestamp_hour, end_timestamp_hour - timestamp_hour)
+    data["offset"] = np.where(crosses_midnight, end_timestamp_hour, np.nan)
+
+    return data
+
+
+def get_bar_vertices(
+    day_number: np.ndarray,
+    start_hour: np.ndarray,
+    duration: np.ndarray,
+) -> np.ndarray:
+    # One BAR_SIZE wide rectangle per row, with the corner order of broken_barh
+    x0 = day_number.astype(float)
+    x1 = x0 + BAR_SIZE
+    y0 = start_hour.astype(float)
+    y1 = y0 + duration
+    return np.stack(
+        [
+            np.column_stack([x0, y0]),
+            np.column_stack([x0, y1]),
+            np.column_stack([x1, y1]),
+            np.column_stack([x1, y0]),
+        ],
+        axis=1,
+    )
 
 
-def plot_sleep_24h_viz() -> None:
-    # Import and extract sleep data
-    data = parse_raw_data(sleep_data, "Begin time")
+def draw_sleep_bars(fig_ax: Axes, data: pd.DataFrame) -> PolyCollection:
+    index = data["crosses_midnight"]
 
-    # Convert end time timestamp to decimal hours
-    data["end_timestamp_hour"] = data["End time"].dt.hour + data["End time"].dt.minute / 60
+    # Sessions with offsets are plotted again from midnight on day_number+1
+    offset_vertices = get_bar_vertices(
+        data.loc[index, "day_number"].to_numpy() + 1,
+        np.zeros(index.sum()),
+        data.loc[index, "offset"].to_numpy(),
+    )
+    session_vertices = get_bar_vertices(
+        data["day_number"].to_numpy(),
+        data["timestamp_hour"].to_numpy(),
+        data["duration"].to_numpy(),
+    )
 
-    # Compute duration in decimal hours
-    data["duration"] = data["end_timestamp_hour"] - data["timestamp_hour"]
+    # A single collection for every bar, instead of one artist per session
+    bars = PolyCollection(np.concatenate([offset_vertices, session_vertices]))
+    fig_ax.add_collection(bars, autolim=True)
+    fig_ax.autoscale_view()
 
-    # Find the index of session that extend into the next day
-    index = data["End time"].dt.normalize() > data["Date"]
+    return bars
 
-    # Compute the offset duration to be plotted the next day
-    data.loc[index, "offset"] = data["end_timestamp_hour"]
 
-    # Compute the current day duration, cut off to midnight
-    data.loc[index, "duration"] = 24 - data["timestamp_hour"]
+def draw_sleep_page(page: Page, page_data: PageData) -> Figure:
+    (data,) = page_data
 
     # Plot setup
     sns.set(style="darkgrid")
     figure = plt.figure()
     fig_ax = figure.add_subplot(111)
 
-    # Find sessions with offsets and plot the offset with day_number+1
-    for day_number, offset in zip(
-        data.loc[index, "day_number"],
-        data.loc[index, "offset"],
-        strict=False,
-    ):
-        fig_ax.broken_barh([(day_number + 1, BAR_SIZE)], (0, offset))
+    # Plot the sessions and their next-day offsets
+    draw_sleep_bars(fig_ax, data)
 
-    # Loop through each row and plot the duration
-    for day_number, start_hour, duration in zip(
-        data["day_number"],
-        data["timestamp_hour"],
-        data["duration"],
-        strict=False,
-    ):
-        fig_ax.broken_barh([(day_number, BAR_SIZE)], (start_hour, duration))
+    # Format plot - vertical or horizontal
+    if config["output_format"]["output_sleep_viz_orientation"] == "vertical":
+        format_24h_week_plot_vertical(fig_ax, page.last_day, page.first_day)
+    else:
+        format_24h_week_plot_horizontal(fig_ax, page.last_day, "Sleep", page.first_day)
+
+    return figure
+
+
+def plot_sleep_24h_viz() -> None:
+    data = parse_sleep_sessions(events.sleep)
 
     # End date - one year or full
     end_date = get_end_date(
@@ -94,31 +142,60 @@ def plot_sleep_24h_viz() -> None:
         first_year_only=config["output_format"]["output_year_one_only"],
     )
 
-    # Format plot - vertical or horizontal
-    if config["output_format"]["output_sleep_viz_orientation"] == "vertical":
-        format_24h_week_plot_vertical(fig_ax, end_date)
-    else:
-        format_24h_week_plot_horizontal(fig_ax, end_date, "Sleep")
-
     # Export figure
-    export_figure(figure, config["output_data"]["output_sleep_viz"])
+    export_24h_viz(config["output_data"]["output_sleep_viz"], end_date, (data,), draw_sleep_page)
 
 
-def plot_feeding_24h_viz() -> None:
-    # Import and extract feeding data
-    data_bottle = parse_raw_data(feeding_bottle_data, "Time of feeding")
-    data_solid = parse_raw_data(feeding_solid_data, "Time of feeding")
+def plot_sleep_probability_24h_viz() -> None:
+    sleep_events = events.sleep
+    begin_time = pd.Series(sleep_events.start.view("datetime64[ns]"), copy=False)
+    end_time = pd.Series(sleep_events.end.view("datetime64[ns]"), copy=False)
+
+    # Minute-level sleep occupancy for every day since birth, up to the last session
+    # or, without any, the end of the date window
+    birthday = pd.Timestamp(config["info"]["birthday"])
+    _, last_day = get_date_limits(end_time)
+    days = max((last_day.normalize() - birthday).days + 1, 1)
+    occupancy = build_occupancy(begin_time, end_time, birthday, days)
+
+    # Probability of being asleep at each minute, per week of age
+    probability = get_weekly_probability(occupancy, np.any(occupancy, axis=1))
+    weeks = probability.shape[0]
 
     # Plot setup
     sns.set(style="darkgrid")
     figure = plt.figure()
     fig_ax = figure.add_subplot(111)
 
-    # Compute offset from birthday
-    offset = data_solid["Date"].iloc[-1] - pd.Timestamp(
-        config["info"]["birthday"],
+    # One image, so the cost does not grow with the number of sessions
+    image = fig_ax.imshow(
+        probability.T,
+        aspect="auto",
+        cmap="Blues",
+        interpolation="nearest",
+        vmin=0,
+        vmax=1,
+        extent=(1, weeks * 7 + 1, 24, 0),
     )
-    offset = int(offset / np.timedelta64(1, "D"))  # Convert to day in int
+    figure.colorbar(image, ax=fig_ax, label="Probability of Sleep")
+
+    # End date - one year or full
+    end_date = 365 if config["output_format"]["output_year_one_only"] else days
+
+    # Format plot
+    format_24h_week_plot_horizontal(fig_ax, end_date, "Sleep Probability")
+
+    # Export figure
+    export_figure(figure, config["output_data"]["output_sleep_probability_viz"])
+
+
+def draw_feeding_page(page: Page, page_data: PageData) -> Figure:
+    data_bottle, data_solid = page_data
+
+    # Plot setup
+    sns.set(style="darkgrid")
+    figure = plt.figure()
+    fig_ax = figure.add_subplot(111)
 
     # Plot
     fig_ax.scatter(
@@ -128,7 +205,7 @@ def plot_feeding_24h_viz() -> None:
         c="r",
     )
     fig_ax.scatter(
-        data_solid["day_number"] + offset,
+        data_solid["day_number"],
         data_solid["timestamp_hour"],
         s=25,
         c="b",
@@ -139,17 +216,31 @@ def plot_feeding_24h_viz() -> None:
     blue_patch = plot_patches.Patch(color="b", label="Solid Feeding")
     plt.legend(handles=[red_patch, blue_patch])
 
+    # Format plot
+    format_24h_week_plot_horizontal(fig_ax, page.last_day, "Feeding", page.first_day)
+
+    return figure
+
+
+def plot_feeding_24h_viz() -> None:
+    # Import and extract feeding data
+    bottle_events = events.bottle
+    solid_events = events.solid
+    data_bottle = parse_raw_data(bottle_events)
+    data_solid = parse_raw_data(solid_events)
+
+    # Compute offset from birthday, in days
+    offset = solid_events.first_day - get_day(config["info"]["birthday"])
+    data_solid["day_number"] += offset
+
     # End date - one year or full
     end_date = get_end_date(
         data_bottle["day_number"],
         first_year_only=config["output_format"]["output_year_one_only"],
     )
 
-    # Format plot
-    format_24h_week_plot_horizontal(fig_ax, end_date, "Feeding")
-
     # Export figure
-    export_figure(figure, config["output_data"]["output_feeding_viz"])
+    export_24h_viz(config["output_data"]["output_feeding_viz"], end_date, (data_bottle, data_solid), draw_feeding_page)
 
 
 def map_poop_color(color: object) -> str:
@@ -166,12 +257,20 @@ def map_poop_color(color: object) -> str:
     return color_map.get(str(color).strip().lower(), "r")  # poop, other colors
 
 
-def plot_diapers_24h_viz() -> None:
-    # Import and extract feeding data
-    data = parse_raw_data(diaper_data, "Diaper time")
+def map_poop_codes(codes: np.ndarray, colors: pd.Index) -> np.ndarray:
+    # Map each distinct color once, then look rows up by code.
+    # Missing colors have code -1, which picks the trailing pee entry.
+    lookup = np.array([map_poop_color(color) for color in colors] + [map_poop_color(np.nan)])
+    return lookup[codes]
+
+
+def map_poop_colors(colors: pd.Series) -> np.ndarray:
+    color_codes = colors.astype("category")
+    return map_poop_codes(color_codes.cat.codes.to_numpy(), color_codes.cat.categories)
 
-    # Go through poop colors and map to matplotlib color keys
-    data["Color key"] = data["Color"].apply(map_poop_color)
+
+def draw_diapers_page(page: Page, page_data: PageData) -> Figure:
+    (data,) = page_data
 
     # Plot setup
     sns.set(style="darkgrid")
@@ -202,14 +301,25 @@ def plot_diapers_24h_viz() -> None:
         ],
     )
 
+    # Format plot
+    format_24h_week_plot_horizontal(fig_ax, page.last_day, "Diapers", page.first_day)
+
+    return figure
+
+
+def plot_diapers_24h_viz() -> None:
+    # Import and extract feeding data
+    diaper_events = events.diaper
+    data = parse_raw_data(diaper_events)
+
+    # Go through poop colors and map to matplotlib color keys
+    data["Color key"] = map_poop_codes(diaper_events.code, diaper_events.labels)
+
     # End date - one year or full
     end_date = get_end_date(
         data["day_number"],
         first_year_only=config["output_format"]["output_year_one_only"],
     )
 
-    # Format plot
-    format_24h_week_plot_horizontal(fig_ax, end_date, "Diapers")
-
     # Export figure
-    export_figure(figure, config["output_data"]["output_diaper_viz"])
+    export_24h_viz(config["output_data"]["output_diaper_viz"], end_date, (data,), draw_diapers_page)
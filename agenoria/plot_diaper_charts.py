@@ -5,127 +5,13 @@
 # this package.
 
 import matplotlib.pyplot as plt
-import pandas as pd
 import seaborn as sns
-from dateutil.relativedelta import relativedelta
 from pandas.plotting import register_matplotlib_converters
 
-from config import diaper_data
 from config import param as config
 
-from .plot_settings import export_figure, format_monthly_plot
-
-CUTOFF = 65
-
-
-def parse_glow_diaper_data(data_diaper: pd.DataFrame) -> pd.DataFrame:
-    # Find first and last entry in column
-    start_date = data_diaper["Date"].iloc[-1]
-    end_date = data_diaper["Date"].iloc[0]
-
-    if config["debug"]["debug_mode"]:
-        start_date = config["debug"]["debug_start_date"]
-        end_date = config["debug"]["debug_end_date"]
-
-    # Final data
-    diaper_data_list = []
-    cumulative_diaper_count = 0
-
-    grouped_by_day = {
-        current_day: current_rows for current_day, current_rows in data_diaper.groupby("Date", sort=False)
-    }
-
-    # Diaper
-    for current_date in pd.date_range(start_date, end_date):
-        rows_on_date = grouped_by_day.get(current_date)
-        if rows_on_date is None or rows_on_date.empty:
-            diaper_data_list.append(
-                [
-                    current_date,
-                    0,
-                    cumulative_diaper_count,
-                    0,
-                    0,
-                    float("nan"),
-                    float("nan"),
-                ],
-            )
-            continue
-
-        # Compute total diaper count
-        daily_total_diaper_count = int(rows_on_date["In the diaper"].count())
-        cumulative_diaper_count += daily_total_diaper_count
-
-        # Separate pees and poops
-        diaper_counts = rows_on_date["In the diaper"].value_counts()
-        total_pee_count = int(
-            diaper_counts.get("pee", 0) + diaper_counts.get("pee and poo", 0),
-        )
-        total_poop_count = int(
-            diaper_counts.get("poo", 0) + diaper_counts.get("pee and poo", 0),
-        )
-
-        # Compute poop to total diaper change ratio
-        poop_ratio = (total_poop_count / daily_total_diaper_count) * 100
-
-        # Compute diaper day duration
-        diaper_final = rows_on_date["Diaper time"].iloc[0]
-        diaper_first = rows_on_date["Diaper time"].iloc[-1]
-        diaper_day_duration = (diaper_final - diaper_first).total_seconds() / 3600
-
-        # Compute average time between diaper changes
-        diaper_change_time_avg = diaper_day_duration / daily_total_diaper_count
-
-        # Put stats in a list
-        diaper_data_list.append(
-            [
-                current_date,
-                daily_total_diaper_count,
-                cumulative_diaper_count,
-                total_pee_count,
-                total_poop_count,
-                poop_ratio,
-                diaper_change_time_avg,
-            ],
-        )
-
-    # Convert list to dataframe
-    return pd.DataFrame(
-        diaper_data_list,
-        columns=[
-            "date",
-            "daily_total_diaper_count",
-            "cumulative_diaper_count",
-            "pee_count",
-            "poop_count",
-            "poop_ratio",
-            "diaper_change_time_avg",
-        ],
-    )
-
-
-def get_abnormal_days(
-    daily_diaper_data: pd.DataFrame,
-) -> tuple[pd.Series, pd.Series]:
-    # Constipation monthly - days with zero poop
-    constipation_days = daily_diaper_data.loc[daily_diaper_data["poop_count"] == 0]
-    constipation_days = constipation_days.set_index("date")
-    constipation_monthly = constipation_days["daily_total_diaper_count"].resample("BMS").count()
-
-    # Diarrhea monthly - days with high percentage of poops
-    diarrhea_days = daily_diaper_data.loc[daily_diaper_data["poop_ratio"] >= CUTOFF]
-    diarrhea_days = diarrhea_days.set_index("date")
-    diarrhea_monthly = diarrhea_days["daily_total_diaper_count"].resample("BMS").count()
-
-    return constipation_monthly, diarrhea_monthly
-
-
-def get_diaper_monthly_data(daily_diaper_data: pd.DataFrame) -> pd.Series:
-    # Reindex
-    monthly_data = daily_diaper_data.set_index("date")
-
-    # Compute monthly total
-    return monthly_data["daily_total_diaper_count"].resample("BMS").sum()
+from .plot_settings import export_figure, format_monthly_plot, get_date_limits
+from .stats import get_abnormal_days, get_diaper_monthly_data, get_diaper_stats
 
 
 def plot_diaper_charts() -> None:
@@ -137,19 +23,17 @@ def plot_diaper_charts() -> None:
     fig, axarr = plt.subplots(3, 3)
 
     # Parse data
-    daily_diaper_data = parse_glow_diaper_data(diaper_data)
+    daily_diaper_data = get_diaper_stats()
     diaper_monthly_data = get_diaper_monthly_data(daily_diaper_data)
     constipation_monthly_data, diarrhea_monthly_data = get_abnormal_days(
         daily_diaper_data,
     )
 
-    # Start date
-    xlim_left = daily_diaper_data["date"].iloc[0]
-    # End date - one year or full
-    if config["output_format"]["output_year_one_only"]:
-        xlim_right = xlim_left + relativedelta(years=1)
-    else:
-        xlim_right = daily_diaper_data["date"].iloc[-1]
+    # Start date, end date - one year or full
+    xlim_left, xlim_right = get_date_limits(
+        daily_diaper_data["date"],
+        first_year_only=config["output_format"]["output_year_one_only"],
+    )
 
     # Chart 1 - Diaper: Total Diapers (Cumulative)
     axarr[0, 0].plot(
@@ -173,13 +57,23 @@ def plot_diaper_charts() -> None:
     )
     axarr[0, 2].set_title("Diaper: Number of Diapers by Day")
     axarr[0, 2].set_ylabel("Number of Diapers by Day")
-    format_monthly_plot(axarr[0, 2], xlim_left, xlim_right)
+    format_monthly_plot(
+        axarr[0, 2],
+        xlim_left,
+        xlim_right,
+        trend=(daily_diaper_data["date"], daily_diaper_data["daily_total_diaper_count"]),
+    )
 
     # Chart 4 - Diaper: Daily Total Pees
     axarr[1, 0].plot(daily_diaper_data["date"], daily_diaper_data["pee_count"])
     axarr[1, 0].set_title("Diaper: Daily Total Pees")
     axarr[1, 0].set_ylabel("Total Pees")
-    format_monthly_plot(axarr[1, 0], xlim_left, xlim_right)
+    format_monthly_plot(
+        axarr[1, 0],
+        xlim_left,
+        xlim_right,
+        trend=(daily_diaper_data["date"], daily_diaper_data["pee_count"]),
+    )
 
     # Chart 5 - Diaper: Daily Total Poops
     axarr[1, 1].plot(
@@ -188,7 +82,12 @@ def plot_diaper_charts() -> None:
     )
     axarr[1, 1].set_title("Diaper: Daily Total Poops")
     axarr[1, 1].set_ylabel("Total Poops")
-    format_monthly_plot(axarr[1, 1], xlim_left, xlim_right)
+    format_monthly_plot(
+        axarr[1, 1],
+        xlim_left,
+        xlim_right,
+        trend=(daily_diaper_data["date"], daily_diaper_data["poop_count"]),
+    )
 
     # Chart 6 - Diaper: Average Time Between Diaper Changes
     axarr[1, 2].plot(
@@ -199,7 +98,12 @@ def plot_diaper_charts() -> None:
         "Diaper: Average Time Between Diaper Changes (Hours)",
     )
     axarr[1, 2].set_ylabel("Average Time Between Diaper Changes (Hours)")
-    format_monthly_plot(axarr[1, 2], xlim_left, xlim_right)
+    format_monthly_plot(
+        axarr[1, 2],
+        xlim_left,
+        xlim_right,
+        trend=(daily_diaper_data["date"], daily_diaper_data["diaper_change_time_avg"]),
+    )
 
     # Chart 7 - Diaper: Poop Ratio
     axarr[2, 0].plot(
@@ -208,7 +112,12 @@ def plot_diaper_charts() -> None:
     )
     axarr[2, 0].set_title("Diaper: Poop as Percentage of Diaper Changes")
     axarr[2, 0].set_ylabel("Poop as Percentage of Diaper Changes")
-    format_monthly_plot(axarr[2, 0], xlim_left, xlim_right)
+    format_monthly_plot(
+        axarr[2, 0],
+        xlim_left,
+        xlim_right,
+        trend=(daily_diaper_data["date"], daily_diaper_data["poop_ratio"]),
+    )
 
     # Chart 8 - Diaper: Constipation
     axarr[2, 1].plot(
@@ -8,137 +8,12 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
-from dateutil.relativedelta import relativedelta
 from pandas.plotting import register_matplotlib_converters
 
-from config import feeding_bottle_data, feeding_solid_data
 from config import param as config
 
-from .parse_config import get_daytime_index, get_nighttime_index
-from .plot_settings import export_figure, format_monthly_plot, mmm_plot
-
-
-def export_feeding_text(
-    feeding_data: pd.DataFrame,
-    key_amount: str,
-    label: str,
-) -> None:
-    print(f"{label}: ", end="")
-    for feeding_time, amount in feeding_data[["Time of feeding", key_amount]].itertuples(index=False, name=None):
-        print(feeding_time.strftime("%I:%M%p").lower(), end="")
-        print(f": {int(amount)} mL; ", end="")
-    print("\n", end="")
-
-
-def parse_glow_feeding_data(
-    data: pd.DataFrame,
-    key_amount: str,
-) -> pd.DataFrame:
-    # Find first and last entry in column
-    start_date = data["Date"].iloc[-1]
-    end_date = data["Date"].iloc[0]
-
-    if config["debug"]["debug_mode"]:
-        start_date = config["debug"]["debug_start_date"]
-        end_date = config["debug"]["debug_end_date"]
-
-    # Final data
-    feeding_data_list = []
-    data_sorted = data.sort_values(["Time of feeding"], ascending=True)
-    grouped_by_day = {
-        current_day: current_rows for current_day, current_rows in data_sorted.groupby("Date", sort=False)
-    }
-
-    for current_date in pd.date_range(start_date, end_date):
-        rows_on_date = grouped_by_day.get(current_date)
-        if rows_on_date is None or rows_on_date.empty:
-            feeding_data_list.append(
-                [
-                    current_date,
-                    0.0,
-                    float("nan"),
-                    float("nan"),
-                    float("nan"),
-                    0,
-                    float("nan"),
-                    float("nan"),
-                    float("nan"),
-                    0.0,
-                    0.0,
-                    0,
-                ],
-            )
-            continue
-
-        # Compute statistics
-        sum_on_date = rows_on_date[key_amount].sum()
-        mean_on_date = rows_on_date[key_amount].mean()
-        max_on_date = rows_on_date[key_amount].max()
-        min_on_date = rows_on_date[key_amount].min()
-        sessions_on_date = rows_on_date[key_amount].count()
-
-        # Daytime feedings
-        daytime_index = get_daytime_index(rows_on_date["Time of feeding"])
-        daytime_feeding = rows_on_date[daytime_index]
-        daytime_sum = daytime_feeding[key_amount].sum()
-
-        # Daytime time between feedings
-        time_between_feeding = daytime_feeding["Time of feeding"].diff()
-        min2hour = np.timedelta64(1, "h")
-        time_between_feeding_max = time_between_feeding.max() / min2hour
-        time_between_feeding_mean = time_between_feeding.mean() / min2hour
-        time_between_feeding_min = time_between_feeding.min() / min2hour
-
-        # Nighttime feeding
-        nighttime_index = get_nighttime_index(rows_on_date["Time of feeding"])
-        nighttime_feeding = rows_on_date[nighttime_index]
-        nighttime_sum = nighttime_feeding[key_amount].sum()
-        nighttime_feeding_count = len(nighttime_feeding)
-
-        # Print
-        if config["debug"]["debug_mode"]:
-            print(current_date.date())
-            export_feeding_text(daytime_feeding, key_amount, "Daytime")
-            export_feeding_text(nighttime_feeding, key_amount, "Nighttime")
-            print("Total volume:", int(sum_on_date), "mL")
-            print("\n", end="")
-
-        # Put stats in a list
-        feeding_data_list.append(
-            [
-                current_date,
-                sum_on_date,
-                mean_on_date,
-                min_on_date,
-                max_on_date,
-                sessions_on_date,
-                time_between_feeding_max,
-                time_between_feeding_mean,
-                time_between_feeding_min,
-                daytime_sum,
-                nighttime_sum,
-                nighttime_feeding_count,
-            ],
-        )
-
-    # Convert list to dataframe
-    return pd.DataFrame(
-        feeding_data_list,
-        columns=[
-            "date",
-            "sum",
-            "mean",
-            "min",
-            "max",
-            "sessions",
-            "time gap max",
-            "time gap mean",
-            "time gap min",
-            "daytime sum",
-            "nighttime sum",
-            "nighttime count",
-        ],
-    )
+from .plot_settings import export_figure, format_monthly_plot, get_date_limits, mmm_plot
+from .stats import get_feeding_bottle_stats, get_feeding_solid_stats
 
 
 def combine_bottle_solid(
@@ -171,17 +46,15 @@ def plot_feeding_stats_charts() -> None:
     fig, axarr = plt.subplots(3, 3)
 
     # Parse data
-    data_bottle = parse_glow_feeding_data(feeding_bottle_data, "Amount(ml)")
-    data_solid = parse_glow_feeding_data(feeding_solid_data, "Amount")
+    data_bottle = get_feeding_bottle_stats()
+    data_solid = get_feeding_solid_stats()
     data_feeding_combined = combine_bottle_solid(data_bottle, data_solid)
 
-    # Start date
-    xlim_left = data_bottle["date"].iloc[0]
-    # End date - one year or full
-    if config["output_format"]["output_year_one_only"]:
-        xlim_right = xlim_left + relativedelta(years=1)
-    else:
-        xlim_right = data_bottle["date"].iloc[-1]
+    # Start date, end date - one year or full
+    xlim_left, xlim_right = get_date_limits(
+        data_bottle["date"],
+        first_year_only=config["output_format"]["output_year_one_only"],
+    )
 
     # Chart 1 - Eat: Daily, Average Consumed Per Day(mL)
     mmm_plot(
@@ -193,20 +66,20 @@ def plot_feeding_stats_charts() -> None:
     )
     axarr[0, 0].set_title("Eat: Daily Volume Per Session (mL)")
     axarr[0, 0].set_ylabel("Average Volume Per Session (mL)")
-    format_monthly_plot(axarr[0, 0], xlim_left, xlim_right)
+    format_monthly_plot(axarr[0, 0], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["mean"]))
 
     # Chart 2 - Eat: Daily Number of Feeding Sessions Per Day
     axarr[0, 1].plot(data_bottle["date"], data_bottle["sessions"])
     axarr[0, 1].set_title("Eat: Daily Number of Feeding Sessions")
     axarr[0, 1].set_xlabel("Time")
     axarr[0, 1].set_ylabel("Number of Feeding Sessions")
-    format_monthly_plot(axarr[0, 1], xlim_left, xlim_right)
+    format_monthly_plot(axarr[0, 1], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["sessions"]))
 
     # Chart 3 - Eat: Daily, Daily Total Volume (mL)
     axarr[0, 2].plot(data_bottle["date"], data_bottle["sum"])
     axarr[0, 2].set_title("Eat: Daily Total Volume (mL)")
     axarr[0, 2].set_ylabel("Daily Total (mL)")
-    format_monthly_plot(axarr[0, 2], xlim_left, xlim_right)
+    format_monthly_plot(axarr[0, 2], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["sum"]))
 
     # Chart 4 - Eat: Daytime Volume
     axarr[1, 0].plot(
@@ -215,7 +88,7 @@ def plot_feeding_stats_charts() -> None:
     )
     axarr[1, 0].set_title("Eat: Daily Total Daytime Volume (mL)")
     axarr[1, 0].set_ylabel("Eat: Daily Total Daytime Volume (mL)")
-    format_monthly_plot(axarr[1, 0], xlim_left, xlim_right)
+    format_monthly_plot(axarr[1, 0], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["daytime sum"]))
 
     # Chart 5 - Eat: Nighttime Volume
     axarr[1, 1].plot(
@@ -224,7 +97,7 @@ def plot_feeding_stats_charts() -> None:
     )
     axarr[1, 1].set_title("Eat: Daily Total Nighttime Volume (mL)")
     axarr[1, 1].set_ylabel("Eat: Daily Total Nighttime Volume (mL)")
-    format_monthly_plot(axarr[1, 1], xlim_left, xlim_right)
+    format_monthly_plot(axarr[1, 1], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["nighttime sum"]))
 
     # Chart 6 - Eat: Number of Nighttime Feedings
     axarr[1, 2].plot(
@@ -233,19 +106,19 @@ def plot_feeding_stats_charts() -> None:
     )
     axarr[1, 2].set_title("Eat: Number of Nighttime Feedings")
     axarr[1, 2].set_ylabel("Eat: Number of Nighttime Feedings")
-    format_monthly_plot(axarr[1, 2], xlim_left, xlim_right)
+    format_monthly_plot(axarr[1, 2], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["nighttime count"]))
 
     # Chart 7 - Eat: Daily Total Solid Feeding (g)
     axarr[2, 0].plot(data_solid["date"], data_solid["sum"])
     axarr[2, 0].set_title("Eat: Daily Total Solid Feeding (g)")
     axarr[2, 0].set_ylabel("Daily Total Solid Feeding (g)")
-    format_monthly_plot(axarr[2, 0], xlim_left, xlim_right)
+    format_monthly_plot(axarr[2, 0], xlim_left, xlim_right, trend=(data_solid["date"], data_solid["sum"]))
 
     # Chart 8 - Eat: Daily Total Bottle + Solid
     axarr[2, 1].plot(data_bottle["date"], data_feeding_combined)
     axarr[2, 1].set_title("Eat: Daily Total Bottle + Solid (g)")
     axarr[2, 1].set_ylabel("Daily Total Bottle + Solid (g)")
-    format_monthly_plot(axarr[2, 1], xlim_left, xlim_right)
+    format_monthly_plot(axarr[2, 1], xlim_left, xlim_right, trend=(data_bottle["date"], data_feeding_combined))
 
     # Chart 9 - Eat: Average Time Between Feedings
     mmm_plot(
@@ -257,7 +130,7 @@ def plot_feeding_stats_charts() -> None:
     )
     axarr[2, 2].set_title("Eat: Average Daytime Bottle Feeding Time Gap (Hr)")
     axarr[2, 2].set_ylabel("Eat: Average Daytime Bottle Feeding Time Gap (Hr)")
-    format_monthly_plot(axarr[2, 2], xlim_left, xlim_right)
+    format_monthly_plot(axarr[2, 2], xlim_left, xlim_right, trend=(data_bottle["date"], data_bottle["time gap mean"]))
 
     # Export
     fig.subplots_adjust(wspace=0.2, hspace=0.35)
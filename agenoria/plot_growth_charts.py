@@ -11,98 +11,51 @@ import seaborn as sns
 from matplotlib import ticker
 from matplotlib.axes import Axes
 
-from config import growth_data
-from config import hatch_data as hatch_weight_data
+from config import events, sources
 from config import param as config
+from config.events import Events
+from config.timing import stage
 
+from .growth_reference import compute_percentiles, get_age_months, get_growth_curve
 from .plot_settings import export_figure, format_growth_chart_plot
+from .stats import compute_age, parse_hatch_data
 
 LINE_ALPHA = 0.4
-ROC_WINDOW = 14
 
 
-def compute_age(date: pd.Series, birthday: pd.Timestamp) -> pd.Series:
-    return (date - birthday) / np.timedelta64(4, "W")
-
-
-def parse_glow_data(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    parsed = data.copy()
-
-    # Compute age
-    parsed["Age"] = compute_age(
-        parsed["Date"],
-        pd.Timestamp(config["info"]["birthday"]),
+def get_measure_data(measure_events: Events, column: str) -> pd.DataFrame:
+    # Date, age and value of every measurement
+    dates = measure_events.get_dates()
+    return pd.DataFrame(
+        {
+            "Date": dates,
+            "Age": compute_age(dates, pd.Timestamp(config["info"]["birthday"])),
+            column: measure_events.amount,
+        },
     )
 
+
+@stage("parse")
+def parse_glow_data(height_events: Events, head_events: Events) -> tuple[pd.DataFrame, pd.DataFrame]:
     # Get date and height columns
-    data_height = parsed[parsed["Height(cm)"].notna()][["Date", "Age", "Height(cm)"]]
-    data_head = parsed[parsed["Head Circ.(cm)"].notna()][["Date", "Age", "Head Circ.(cm)"]]
+    data_height = get_measure_data(height_events, "Height(cm)")
+    data_head = get_measure_data(head_events, "Head Circ.(cm)")
 
     return data_height, data_head
 
 
-def parse_hatch_data(data: pd.DataFrame) -> pd.DataFrame:
-    parsed = data.copy()
-
-    # Keep date only, remove time. Hatch invalid format: redundant AM/PM
-    hatch_dates = parsed["Start Time"].astype(str).str[0:10]
-    # Convert to datetime
-    parsed["Start Time"] = pd.to_datetime(hatch_dates, format="%m/%d/%Y")
-
-    # Sort and remove duplicates
-    parsed = parsed.sort_values(by=["Start Time"], ascending=True)
-    parsed = parsed.drop_duplicates(subset=["Start Time"], keep=False)
-
-    # Reindex and add missing days
-    idx = pd.date_range(
-        start=parsed["Start Time"].min(),
-        end=parsed["Start Time"].max(),
-    )
-    parsed = parsed.set_index("Start Time").reindex(idx).rename_axis("Start Time").reset_index()
-
-    # Compute Age
-    parsed["Age"] = compute_age(
-        parsed["Start Time"],
-        pd.Timestamp(config["info"]["birthday"]),
-    )
-
-    # Compute diff
-    parsed["ROC"] = parsed["Amount"].diff()
-    # Fill empty rows with 0
-    parsed["ROC"] = parsed["ROC"].fillna(0)
-
-    # Compute average on a rolling window
-    parsed["Weight Average RoC"] = parsed["ROC"].rolling(window=ROC_WINDOW).mean()
-
-    # Convert to oz
-    parsed["Weight Average RoC"] = parsed["Weight Average RoC"] * 35.274
-
-    return parsed
-
-
-def plot_growth_curves(
-    curve_file: str,
-    index: str,
-    plot_object: Axes,
-) -> None:
-    # Import growth curves data file
-    data_raw = pd.read_csv(curve_file)
-
-    # Extract by sex
-    sex = 1 if (config["info"]["gender"] == "boy") else 2
-    data = data_raw.loc[data_raw["Sex"] == sex]
+def plot_growth_curves(measure: str, plot_object: Axes) -> None:
+    # Reference curves for the child's sex, loaded once per process
+    curve = get_growth_curve(measure)
 
     # Plot percentile lines
-    for percentile in ("P3", "P5", "P10", "P25", "P50", "P75", "P90", "P95", "P97"):
-        plot_object.plot(data[index], data[percentile], alpha=LINE_ALPHA)
+    for percentile in curve.percentiles:
+        plot_object.plot(curve.x, percentile, alpha=LINE_ALPHA)
 
 
-def plot_weight_length(
-    plot_object: Axes,
-    data_height: pd.DataFrame,
-    hatch_data: pd.DataFrame,
-) -> None:
-    data_weight_length = (
+def get_weight_length(data_height: pd.DataFrame, hatch_data: pd.DataFrame) -> pd.DataFrame:
+    # Weights measured on the same day as a length
+    return (
         data_height.merge(
             hatch_data[["Start Time", "Amount"]],
             left_on="Date",
@@ -113,6 +66,26 @@ def plot_weight_length(
         .rename(columns={"Amount": "Weight"})
     )
 
+
+def plot_percentile(
+    plot_object: Axes,
+    age: pd.Series,
+    percentile: np.ndarray,
+    title: str,
+    xlim: tuple[float, float],
+) -> None:
+    plot_object.plot(age, percentile)
+    plot_object.set_title(title)
+    plot_object.set_xlabel("Age (months)")
+    plot_object.set_ylabel("Percentile (%)")
+    plot_object.set_xlim(*xlim)
+    plot_object.set_ylim(0, 100)
+    plot_object.xaxis.set_major_locator(ticker.MultipleLocator(1))
+    plot_object.yaxis.set_major_locator(ticker.MultipleLocator(10))
+    format_growth_chart_plot(plot_object)
+
+
+def plot_weight_length(plot_object: Axes, data_weight_length: pd.DataFrame) -> None:
     # Plot data
     plot_object.plot(
         data_weight_length["Height(cm)"],
@@ -132,23 +105,22 @@ def plot_growth_charts() -> None:
     # Settings
     sns.set(style="darkgrid")
     plt.rcParams["lines.linewidth"] = 2
-    fig, axarr = plt.subplots(2, 3)
+    fig, axarr = plt.subplots(3, 3)
 
     # Import data
-    data_height, data_head = parse_glow_data(growth_data)
-    hatch_data = parse_hatch_data(hatch_weight_data)
+    data_height, data_head = parse_glow_data(events.height, events.head)
+    hatch_data = parse_hatch_data(sources.hatch_data)
 
-    # Start & end date - one year or full
+    # Start & end date - one year or full, one year without any weights
     start_date = 0
-    if config["output_format"]["output_year_one_only"]:
+    if config["output_format"]["output_year_one_only"] or hatch_data.empty:
         end_date = 12
     else:
         end_date = hatch_data["Age"].iloc[-1]
 
     # Chart 1 - Weight / Age
     plot_growth_curves(
-        config["input_data"]["growth_curve_weight"],
-        "Agemos",
+        "weight",
         axarr[0, 0],
     )
     axarr[0, 0].plot(hatch_data["Age"], hatch_data["Amount"])
@@ -172,7 +144,7 @@ def plot_growth_charts() -> None:
     axarr[0, 1].autoscale(enable=True, axis="y", tight=True)
     format_growth_chart_plot(axarr[0, 1])
 
-    # Chart 2 - Weight Rate of Change / Age
+    # Chart 3 - Weight Rate of Change / Age
     axarr[0, 2].plot(hatch_data["Age"], hatch_data["Weight Average RoC"])
     axarr[0, 2].set_title("Average Daily Weight Gain vs. Age")
     axarr[0, 2].set_xlabel("Age (months)")
@@ -185,8 +157,7 @@ def plot_growth_charts() -> None:
 
     # Chart 4 - Length / Age
     plot_growth_curves(
-        config["input_data"]["growth_curve_length"],
-        "Agemos",
+        "length",
         axarr[1, 0],
     )
     axarr[1, 0].plot(data_height["Age"], data_height["Height(cm)"])
@@ -200,8 +171,7 @@ def plot_growth_charts() -> None:
 
     # Chart 5 - Head Circumference / Age
     plot_growth_curves(
-        config["input_data"]["growth_curve_head"],
-        "Agemos",
+        "head",
         axarr[1, 1],
     )
     axarr[1, 1].plot(data_head["Age"], data_head["Head Circ.(cm)"])
@@ -215,11 +185,52 @@ def plot_growth_charts() -> None:
 
     # Chart 6 - Weight / Length
     plot_growth_curves(
-        config["input_data"]["growth_curve_weight_length"],
-        "Length",
+        "weight_length",
         axarr[1, 2],
     )
-    plot_weight_length(axarr[1, 2], data_height, hatch_data)
+    data_weight_length = get_weight_length(data_height, hatch_data)
+    plot_weight_length(axarr[1, 2], data_weight_length)
+
+    # Chart 7 - Length Percentile / Age
+    # Scored at the age in calendar months of the CDC tables
+    birthday = pd.Timestamp(config["info"]["birthday"])
+    plot_percentile(
+        axarr[2, 0],
+        data_height["Age"],
+        compute_percentiles(
+            get_growth_curve("length"),
+            get_age_months(data_height["Date"], birthday),
+            data_height["Height(cm)"],
+        ),
+        "Length Percentile vs. Age",
+        (start_date, end_date),
+    )
+
+    # Chart 8 - Head Circumference Percentile / Age
+    plot_percentile(
+        axarr[2, 1],
+        data_head["Age"],
+        compute_percentiles(
+            get_growth_curve("head"),
+            get_age_months(data_head["Date"], birthday),
+            data_head["Head Circ.(cm)"],
+        ),
+        "Head Circumference Percentile vs. Age",
+        (start_date, end_date),
+    )
+
+    # Chart 9 - Weight-for-Length Percentile / Age
+    plot_percentile(
+        axarr[2, 2],
+        data_weight_length["Age"],
+        compute_percentiles(
+            get_growth_curve("weight_length"),
+            data_weight_length["Height(cm)"],
+            data_weight_length["Weight"],
+        ),
+        "Weight-for-Length Percentile vs. Age",
+        (start_date, end_date),
+    )
 
     # Export
     fig.subplots_adjust(wspace=0.25, hspace=0.35)
@@ -11,76 +11,71 @@ import seaborn as sns
 from matplotlib.axes import Axes
 from pandas.plotting import register_matplotlib_converters
 
-from config import misc_data
+from config import events
 from config import param as config
+from config.events import Events
 
-from .plot_settings import export_figure, format_monthly_plot
+from .plot_settings import export_figure, format_monthly_plot, get_date_limits
 
 
-def plot_daycare_days(plot_object: Axes, data: pd.DataFrame) -> None:
+def get_daily_counts(misc_events: Events) -> pd.Series:
+    # Count of every logged day, by date
+    return pd.Series(misc_events.amount, index=misc_events.get_dates())
+
+
+def plot_daycare_days(plot_object: Axes, daycare_events: Events) -> None:
     # Group and compute sum by month. BMS gives 1st of month
-    daycare_monthly = data["Daycare"].resample("BMS").sum()
+    daycare_monthly = get_daily_counts(daycare_events).resample("BMS").sum()
 
     # Plot
     plot_object.plot(daycare_monthly.index, daycare_monthly)
     plot_object.set_title("Number of Days in Daycare by Months")
     plot_object.set_ylabel("Number of Days")
     plot_object.yaxis.set_ticks(np.arange(0, 21, 2))
-    format_monthly_plot(
-        plot_object,
-        daycare_monthly.index[0],
-        daycare_monthly.index[-1],
-    )
+    format_monthly_plot(plot_object, *get_date_limits(daycare_monthly.index))
 
 
 def plot_days_between_vomit(
     plot_object: Axes,
-    data: pd.DataFrame,
+    vomit_events: Events,
 ) -> None:
     # Look up vomit days and compute gaps
-    vomit_days = data.loc[data["Vomit"] == 1]
-    days_since_last_vomit = vomit_days["Date"].diff() / np.timedelta64(1, "D")
+    is_vomit = vomit_events.amount == 1
+    vomit_dates = vomit_events.get_dates()[is_vomit]
+    days_since_last_vomit = np.diff(vomit_events.get_days()[is_vomit], prepend=np.nan)
 
     # Plots
-    plot_object.plot(vomit_days["Date"], days_since_last_vomit)
+    plot_object.plot(vomit_dates, days_since_last_vomit)
     plot_object.set_title("Days Since Last Vomit")
     plot_object.set_xlabel("Date")
     plot_object.set_ylabel("Days Since Last Vomit")
-    format_monthly_plot(plot_object, vomit_days.index[0], vomit_days.index[-1])
+    format_monthly_plot(plot_object, *get_date_limits(vomit_dates))
 
 
 def plot_doctor_visit_monthly(
     plot_object: Axes,
-    data: pd.DataFrame,
+    doctor_events: Events,
 ) -> None:
     # Group and compute sum by month. BMS gives 1st of month
-    doctor_monthly = data["Doctor"].resample("BMS").sum()
+    doctor_monthly = get_daily_counts(doctor_events).resample("BMS").sum()
 
     # Plot
     plot_object.plot(doctor_monthly.index, doctor_monthly)
     plot_object.set_title("Total Number of Doctor Visits by Months")
     plot_object.set_ylabel("Total Number of Doctor Visits")
     plot_object.yaxis.set_ticks(np.arange(0, 5, 1))
-    format_monthly_plot(
-        plot_object,
-        doctor_monthly.index[0],
-        doctor_monthly.index[-1],
-    )
+    format_monthly_plot(plot_object, *get_date_limits(doctor_monthly.index))
 
 
-def plot_monthly_vomit(plot_object: Axes, data: pd.DataFrame) -> None:
+def plot_monthly_vomit(plot_object: Axes, vomit_events: Events) -> None:
     # Group and compute sum by month. BMS gives 1st of month
-    vomit_monthly = data["Vomit"].resample("BMS").sum()
+    vomit_monthly = get_daily_counts(vomit_events).resample("BMS").sum()
 
     # Plot
     plot_object.plot(vomit_monthly.index, vomit_monthly)
     plot_object.set_title("Total Number of Vomits by Months")
     plot_object.set_ylabel("Total Number of Vomits")
-    format_monthly_plot(
-        plot_object,
-        vomit_monthly.index[0],
-        vomit_monthly.index[-1],
-    )
+    format_monthly_plot(plot_object, *get_date_limits(vomit_monthly.index))
 
 
 def plot_medical_charts() -> None:
@@ -91,16 +86,16 @@ def plot_medical_charts() -> None:
     fig, axarr = plt.subplots(2, 3)
 
     # Chart 1 - Total Vomit Per Month
-    plot_monthly_vomit(axarr[0, 0], misc_data)
+    plot_monthly_vomit(axarr[0, 0], events.vomit)
 
     # Chart 2 - Days Between Vomit
-    plot_days_between_vomit(axarr[0, 1], misc_data)
+    plot_days_between_vomit(axarr[0, 1], events.vomit)
 
     # Chart 3 - Days in Daycare
-    plot_daycare_days(axarr[0, 2], misc_data)
+    plot_daycare_days(axarr[0, 2], events.daycare)
 
     # Chart 4 - Doctor Visits
-    plot_doctor_visit_monthly(axarr[1, 0], misc_data)
+    plot_doctor_visit_monthly(axarr[1, 0], events.doctor)
 
     # Export
     fig.subplots_adjust(wspace=0.25, hspace=0.35)
@@ -7,14 +7,23 @@
 import math
 from pathlib import Path
 
+import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from chart_studio import plotly
+from dateutil.relativedelta import relativedelta
 from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.dates import DateFormatter, MonthLocator
 from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
 
+from config import get_date_window
 from config import param as config
+from config.timing import stage
+
+from .interactive import INTERACTIVE_FORMATS, submit_interactive
+from .parse_config import get_output_formats
+from .trends import TrendSettings, compute_trends, get_trend_settings
 
 # Figure settings
 TITLE_HEIGHT_ADJUST = 1.02
@@ -27,6 +36,7 @@ TITLE_FONT_SIZE_SM = 10
 AXIS_FONT_SIZE_SM = 8
 
 ALPHA_VALUE = 0.3
+TREND_LINE_WIDTH = 1.5
 
 
 def mmm_plot(
@@ -41,9 +51,9 @@ def mmm_plot(
     plot_object.fill_between(data_date, data_min, data_mean, alpha=ALPHA_VALUE)
 
 
-def enumerate_labels(date_num: int) -> tuple[list[str], list[str]]:
+def enumerate_labels(date_num: int, first_day: int = 1) -> tuple[list[str], list[str]]:
     hour_labels = [f"{num}:00" for num in range(24)]
-    week_labels = [str(num) for num in range(0, math.ceil(date_num / 7), 2)]
+    week_labels = [str(num) for num in range((first_day - 1) // 7, math.ceil(date_num / 7), 2)]
 
     return hour_labels, week_labels
 
@@ -52,9 +62,10 @@ def format_24h_week_plot_horizontal(
     fig_axis: Axes,
     date_num: int,
     title: str,
+    first_day: int = 1,
 ) -> None:
     # Create the tick labels
-    hour_labels, week_labels = enumerate_labels(date_num)
+    hour_labels, week_labels = enumerate_labels(date_num, first_day)
 
     # Set title and axis labels
     if config["output_format"]["output_chart_labels_on"]:
@@ -73,14 +84,15 @@ def format_24h_week_plot_horizontal(
     fig_axis.invert_yaxis()
 
     # Format x axis - bottom, week number
-    fig_axis.set_xlim(1, date_num)
-    fig_axis.xaxis.set_ticks(np.arange(1, date_num + 1, 14))
+    # A single day still spans a day
+    fig_axis.set_xlim(first_day, max(date_num, first_day + 1))
+    fig_axis.xaxis.set_ticks(np.arange(first_day, date_num + 1, 14))
     fig_axis.set_xticklabels(week_labels)
 
 
-def format_24h_week_plot_vertical(fig_axis: Axes, date_num: int) -> None:
+def format_24h_week_plot_vertical(fig_axis: Axes, date_num: int, first_day: int = 1) -> None:
     # Create the tick labels
-    hour_labels, week_labels = enumerate_labels(date_num)
+    hour_labels, week_labels = enumerate_labels(date_num, first_day)
 
     # Set title and axis labels
     fig_axis.set_xlabel(
@@ -97,8 +109,9 @@ def format_24h_week_plot_vertical(fig_axis: Axes, date_num: int) -> None:
     fig_axis.invert_yaxis()
 
     # Format x axis - bottom, week number
-    fig_axis.set_xlim(1, date_num)
-    fig_axis.xaxis.set_ticks(np.arange(1, date_num + 1, 14))
+    # A single day still spans a day
+    fig_axis.set_xlim(first_day, max(date_num, first_day + 1))
+    fig_axis.xaxis.set_ticks(np.arange(first_day, date_num + 1, 14))
     fig_axis.set_xticklabels(week_labels, rotation=90)
 
 
@@ -110,11 +123,67 @@ def format_growth_chart_plot(plot_object: Axes) -> None:
     plot_object.tick_params(labelsize=AXIS_FONT_SIZE_MED)
 
 
+def plot_trends(
+    plot_object: Axes,
+    data_date: pd.Series,
+    data_values: pd.Series,
+    settings: TrendSettings,
+) -> None:
+    trends = compute_trends(data_values, settings)
+
+    # One line per window, and the band of the longest one
+    for window in settings.windows:
+        plot_object.plot(
+            data_date,
+            trends[f"{settings.statistic}_{window}"],
+            linewidth=TREND_LINE_WIDTH,
+            label=f"{window}-day {settings.statistic}",
+        )
+    longest = settings.windows[-1]
+    plot_object.fill_between(
+        data_date,
+        trends[f"low_{longest}"],
+        trends[f"high_{longest}"],
+        alpha=ALPHA_VALUE,
+        color="grey",
+        label=f"{longest}-day {settings.band[0]:g}-{settings.band[1]:g}th percentile",
+    )
+    plot_object.legend(fontsize=AXIS_FONT_SIZE_SM, loc="upper left")
+
+
+def get_date_limits(
+    dates: pd.Series | pd.DatetimeIndex,
+    *,
+    first_year_only: bool = False,
+) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """x-axis limits of a chart over dates: the first date, and one year later or the last date.
+
+    Without any dates, the bounds of the date window are used instead, and the
+    birthday or one year after the start where the window is open. The limits are
+    at least a day apart.
+    """
+    if len(dates) == 0:
+        since, until = get_date_window()
+        xlim_left = pd.Timestamp(config["info"]["birthday"]) if since is None else since
+        xlim_right = xlim_left + relativedelta(years=1) if until is None else until
+    else:
+        xlim_left = dates.min()
+        xlim_right = xlim_left + relativedelta(years=1) if first_year_only else dates.max()
+    return xlim_left, max(xlim_right, xlim_left + pd.Timedelta(days=1))
+
+
 def format_monthly_plot(
     plot_object: Axes,
     xlim_left: pd.Timestamp,
     xlim_right: pd.Timestamp,
+    trend: tuple[pd.Series, pd.Series] | None = None,
 ) -> None:
+    # Overlay the rolling trends of the (date, daily value) series, if enabled in [trends]
+    if trend is not None:
+        settings = get_trend_settings()
+        if settings is not None:
+            plot_trends(plot_object, *trend, settings)
+
     # Axis label
     plot_object.set_xlabel("Date")
 
@@ -136,22 +205,50 @@ def format_monthly_plot(
     plot_object.xaxis.set_major_formatter(DateFormatter("%b"))
 
 
-def export_figure(figure: Figure, output_filename: str) -> None:
-    # Create the directory if it didn't exist already
-    directory_path = Path(config["output_data"]["output_directory"])
-    directory_path.mkdir(parents=True, exist_ok=True)
-
-    # Form the file name
-    filename = directory_path / f'{output_filename}{config["output_format"]["format"]}'
-
-    # Page settings
+def set_page_size(figure: Figure) -> None:
     figure.set_size_inches(
         config["output_format"]["output_dim_x"],
         config["output_format"]["output_dim_y"],
     )
-    figure.savefig(filename, bbox_inches="tight")
 
-    if config["output_format"]["plotly_on"]:
-        plotly.plot_mpl(figure, filename=f"Agenoria - {output_filename}")
 
+def get_layout_bbox(figure: Figure) -> Bbox:
+    # Lay out once. bbox_inches="tight" would draw the figure an extra time per format.
+    with stage("layout"):
+        canvas = figure.canvas if isinstance(figure.canvas, FigureCanvasAgg) else FigureCanvasAgg(figure)
+        renderer = canvas.get_renderer()
+        return figure.get_tightbbox(renderer).padded(plt.rcParams["savefig.pad_inches"])
+
+
+def export_figure(figure: Figure, output_filename: str, output_formats: list[str] | None = None) -> None:
+    # Create the directory if it didn't exist already
+    directory_path = Path(config["output_data"]["output_directory"])
+    directory_path.mkdir(parents=True, exist_ok=True)
+
+    if output_formats is None:
+        output_formats = get_output_formats()
+    static_formats = [output_format for output_format in output_formats if output_format not in INTERACTIVE_FORMATS]
+
+    # Page settings
+    set_page_size(figure)
+
+    # The interactive copies are converted in the background, from a copy of the
+    # figure taken now, while the static formats are saved
+    interactive_paths = [
+        directory_path / f"{output_filename}{output_format}"
+        for output_format in output_formats
+        if output_format in INTERACTIVE_FORMATS
+    ]
+    if interactive_paths:
+        with stage("save"):
+            submit_interactive(figure, interactive_paths)
+
+    if static_formats:
+        bbox = get_layout_bbox(figure)
+
+    # Write every requested format from the same figure
+    for output_format in static_formats:
+        dpi = config["output_format"].get("png_dpi", "figure") if output_format == ".png" else "figure"
+        with stage("save"):
+            figure.savefig(directory_path / f"{output_filename}{output_format}", bbox_inches=bbox, dpi=dpi)
     figure.clf()
@@ -0,0 +1,70 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Build report kept next to the charts: where the time of the last run went, per
+# chart, per worker process and per stage. See config.timing for the stages.
+
+import datetime
+from collections.abc import Iterable
+from pathlib import Path
+
+from config.cache import write_meta
+
+REPORT_NAME = "build_report.json"
+REPORT_VERSION = 1
+
+# In pipeline order. share is the parent writing the tables for the workers.
+STAGES = ("load", "share", "parse", "plot", "layout", "save")
+
+
+def sum_stages(timings: Iterable[dict[str, float]]) -> dict[str, float]:
+    totals = dict.fromkeys(STAGES, 0.0)
+    for stages in timings:
+        for name, seconds in stages.items():
+            totals[name] = totals.get(name, 0.0) + seconds
+    return totals
+
+
+def format_stages(stages: dict[str, float]) -> str:
+    return ", ".join(f"{name} {seconds:.2f} s" for name, seconds in stages.items() if seconds)
+
+
+def get_worker_totals(charts: dict[str, dict]) -> dict[str, dict]:
+    # Charts per worker process and their total time, to spot an uneven pool
+    workers: dict[str, dict] = {}
+    for report in charts.values():
+        worker = workers.setdefault(str(report["pid"]), {"charts": 0, "seconds": 0.0})
+        worker["charts"] += 1
+        worker["seconds"] += report["seconds"]
+    return workers
+
+
+def write_build_report(
+    directory: Path,
+    charts: dict[str, dict],
+    failed: dict[str, str],
+    parent: dict[str, float],
+    seconds: float,
+    jobs: int,
+) -> None:
+    """Write the report of one output directory.
+
+    charts maps the output names built to their reports from run_plot_task(),
+    failed the output names that were not to their error. parent holds the stages
+    of the main process, e.g. loading the tables before they are shared.
+    """
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+        "seconds": seconds,
+        "jobs": jobs,
+        "stages": sum_stages([parent, *(chart["stages"] for chart in charts.values())]),
+        "parent": parent,
+        "workers": get_worker_totals(charts),
+        "charts": charts,
+        "failed": failed,
+    }
+    write_meta(report, directory / REPORT_NAME)
@@ -0,0 +1,287 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# HTTP chart service of --serve. Every chart is rendered on demand on the worker
+# pool, one request per chart and format at a time, and the files are kept in a
+# least-recently-used cache bounded in bytes. The workers keep their input tables
+# loaded between requests. Each request compares the stamps of the configuration
+# and its input files with the last ones seen, and a change drops the charts of
+# that configuration and makes the workers load it again.
+#
+#   GET /                                     the charts, formats and configurations, as JSON
+#   GET /charts/<chart>.<png|svg|pdf>         e.g. /charts/sleep_viz.png
+#       ?config=config_zyw.toml               one of the configuration files served, the first by default
+#       &since=YYYY-MM-DD&until=YYYY-MM-DD    the date window, by default the one of --since and --until
+
+import datetime
+import functools
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Generic, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+from config import DateWindow
+
+from .pipeline import create_pool, render_chart
+from .watch import Snapshot, take_snapshot
+
+CONTENT_TYPES = {".png": "image/png", ".svg": "image/svg+xml", ".pdf": "application/pdf"}
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# Megabytes of rendered charts kept, see [runtime] serve_cache_mb
+DEFAULT_CACHE_MB = 64
+
+# (configuration file, chart, format, date window, input generation)
+ChartKey = tuple[Path, str, str, DateWindow, int]
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+
+class ChartCache(Generic[KeyT]):
+    """Files by key, the least recently used dropped once they take more than
+    max_bytes in total. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[KeyT, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: KeyT) -> bytes | None:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: KeyT, content: bytes) -> None:
+        # A file larger than the whole cache is not kept
+        if len(content) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def drop(self, predicate: Callable[[KeyT], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self.size -= len(self._entries.pop(key))
+
+
+class ChartService:
+    """Renders the charts of config_paths on a pool of jobs workers, see the module
+    comment. charts maps a chart name to its config key and plot function, and
+    date_window is the window of the requests that set none.
+    """
+
+    def __init__(
+        self,
+        config_paths: list[Path],
+        charts: dict[str, tuple[str, Callable[[], None]]],
+        jobs: int,
+        timeout: int,
+        cache_bytes: int,
+        date_window: DateWindow = (None, None),
+    ) -> None:
+        self.config_paths = config_paths
+        self.date_window = date_window
+        self.charts = charts
+        self.jobs = jobs
+        self.timeout = timeout
+        self.cache: ChartCache[ChartKey] = ChartCache(cache_bytes)
+        self.renders = 0
+
+        self._lock = threading.Lock()
+        self._pool = create_pool(jobs)
+        self._pending: dict[ChartKey, Future[bytes]] = {}
+        self._snapshots: dict[Path, Snapshot] = {}
+        self._generations = dict.fromkeys(config_paths, 0)
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    def get_index(self) -> dict:
+        return {
+            "charts": sorted(self.charts),
+            "formats": list(CONTENT_TYPES),
+            "configs": [config_path.name for config_path in self.config_paths],
+        }
+
+    def get_config_path(self, name: str | None) -> Path:
+        # By file name or stem, never a path of the client's choosing
+        if name is None:
+            return self.config_paths[0]
+        for config_path in self.config_paths:
+            if name in (config_path.name, config_path.stem):
+                return config_path
+        raise KeyError(name)
+
+    def get_generation(self, config_path: Path) -> int:
+        # Counts the changes seen to the configuration and its input files
+        snapshot = take_snapshot([config_path])
+        with self._lock:
+            previous = self._snapshots.setdefault(config_path, snapshot)
+            if snapshot != previous:
+                self._snapshots[config_path] = snapshot
+                self._generations[config_path] += 1
+                self.cache.drop(lambda key: key[0] == config_path)
+            return self._generations[config_path]
+
+    def render(self, chart: str, output_format: str, config_path: Path, date_window: DateWindow) -> bytes:
+        config_key, plot_fn = self.charts[chart]
+        generation = self.get_generation(config_path)
+        key: ChartKey = (config_path, chart, output_format, date_window, generation)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+
+        # Requests for a chart being rendered wait for the same result
+        submitted: Future[bytes] | None = None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                args = (config_key, plot_fn, self.timeout, config_path, output_format, date_window, generation)
+                try:
+                    future = self._pool.submit(render_chart, *args)
+                except BrokenProcessPool:
+                    # A worker died and took the pool down, start a new one
+                    self._pool.shutdown(cancel_futures=True)
+                    self._pool = create_pool(self.jobs)
+                    future = self._pool.submit(render_chart, *args)
+                self.renders += 1
+                self._pending[key] = submitted = future
+
+        # Outside the lock, a finished future runs the callback right away
+        if submitted is not None:
+            submitted.add_done_callback(functools.partial(self._finish, key))
+        return future.result()
+
+    def _finish(self, key: ChartKey, future: Future[bytes]) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+        with self._lock:
+            self._pending.pop(key, None)
+
+
+class ChartHandler(BaseHTTPRequestHandler):
+    server: "ChartServer"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/":
+            self.send_json(self.server.service.get_index())
+            return
+
+        chart_path = Path(url.path)
+        if chart_path.parent != Path("/charts") or chart_path.suffix not in CONTENT_TYPES:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            config_path = self.server.service.get_config_path(query.get("config"))
+        except KeyError:
+            self.send_error(HTTPStatus.NOT_FOUND, f"No configuration {query['config']!r}")
+            return
+        if chart_path.stem not in self.server.service.charts:
+            self.send_error(HTTPStatus.NOT_FOUND, f"No chart {chart_path.stem!r}")
+            return
+        try:
+            date_window = parse_date_window(query, self.server.service.date_window)
+        except ValueError as error:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+            return
+
+        try:
+            content = self.server.service.render(chart_path.stem, chart_path.suffix, config_path, date_window)
+        except Exception as error:
+            # Reported to the client, the server keeps running
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(error).__name__}: {error}")
+            return
+        self.send_content(content, CONTENT_TYPES[chart_path.suffix])
+
+    def send_content(self, content: bytes, content_type: str) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.write_body(content)
+
+    def send_json(self, content: dict) -> None:
+        self.send_content(json.dumps(content, indent=2).encode(), "application/json")
+
+    def write_body(self, content: bytes) -> None:
+        # The client may have given up waiting for a slow chart
+        try:
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        # Errors only, a dashboard polls the same charts all day
+        if not str(code).startswith(("2", "3")):
+            super().log_request(code, size)
+
+
+class ChartServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: ChartService) -> None:
+        super().__init__(address, ChartHandler)
+        self.service = service
+
+    def get_url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+
+def parse_date_window(query: dict[str, str], default: DateWindow = (None, None)) -> DateWindow:
+    # Each bound of the query replaces the default one
+    since, until = (
+        bound if name not in query else datetime.date.fromisoformat(query[name])
+        for name, bound in zip(("since", "until"), default, strict=True)
+    )
+    if since is not None and until is not None and since > until:
+        raise ValueError("since must not be after until")
+    return since, until
+
+
+def serve_charts(
+    service: ChartService, host: str, port: int, ready: Callable[[ChartServer], None] | None = None
+) -> int:
+    """Serve the charts until interrupted. ready is called with the server once it
+    listens, e.g. to stop it from another thread with shutdown().
+    """
+    with ChartServer((host, port), service) as server:
+        print(f"Serving the charts of {len(service.config_paths)} configuration(s) on {server.get_url()}", flush=True)
+        if ready is not None:
+            ready(server)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+    return 0
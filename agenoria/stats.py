@@ -0,0 +1,403 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Daily statistics behind the charts, and --export-stats, which writes them as
+# Parquet and JSON tables for notebooks and alerts. Nothing here imports Matplotlib
+# or seaborn, so the tables are computed without drawing a chart.
+
+import functools
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import param as config
+from config import sources
+from config.cache import get_tmp_path
+from config.timing import stage
+
+from .daily_stats import get_daily_stats
+from .parse_config import get_date_range, get_daytime_index, get_nighttime_index
+
+CUTOFF = 65
+SLEEP_THRESHOLD = 0.0333333  # two minutes -> hours
+ROC_WINDOW = 14
+
+# Next to the charts
+STATS_DIRECTORY = "stats"
+STATS_FORMATS = (".parquet", ".json")
+
+
+def export_feeding_text(
+    feeding_data: pd.DataFrame,
+    key_amount: str,
+    label: str,
+) -> None:
+    print(f"{label}: ", end="")
+    for feeding_time, amount in feeding_data[["Time of feeding", key_amount]].itertuples(index=False, name=None):
+        print(feeding_time.strftime("%I:%M%p").lower(), end="")
+        print(f": {int(amount)} mL; ", end="")
+    print("\n", end="")
+
+
+def export_feeding_report(
+    data: pd.DataFrame,
+    key_amount: str,
+    date_range: pd.DatetimeIndex,
+) -> None:
+    data_sorted = data.sort_values(["Time of feeding"], ascending=True, kind="stable")
+    grouped_by_day = dict(iter(data_sorted.groupby("Date", sort=False)))
+
+    for current_date in date_range:
+        rows_on_date = grouped_by_day.get(current_date)
+        if rows_on_date is None:
+            continue
+
+        print(current_date.date())
+        daytime_feeding = rows_on_date[get_daytime_index(rows_on_date["Time of feeding"])]
+        nighttime_feeding = rows_on_date[get_nighttime_index(rows_on_date["Time of feeding"])]
+        export_feeding_text(daytime_feeding, key_amount, "Daytime")
+        export_feeding_text(nighttime_feeding, key_amount, "Nighttime")
+        print("Total volume:", int(rows_on_date[key_amount].sum()), "mL")
+        print("\n", end="")
+
+
+@stage("parse")
+def parse_glow_feeding_data(
+    data: pd.DataFrame,
+    key_amount: str,
+    date_range: pd.DatetimeIndex | None = None,
+) -> pd.DataFrame:
+    if date_range is None:
+        date_range = get_date_range(data["Date"])
+
+    feeding_time = data["Time of feeding"]
+    # Amounts may be stored as float32, the totals are summed in float64
+    amount = data[key_amount].astype(np.float64)
+    by_day = data["Date"]
+    daytime_index = get_daytime_index(feeding_time)
+    nighttime_index = get_nighttime_index(feeding_time)
+
+    # Per-day statistics over all sessions
+    grouped = amount.groupby(by_day)
+
+    # Time between consecutive daytime feedings on the same day
+    daytime_rows = data.loc[daytime_index, ["Date", "Time of feeding"]]
+    daytime_rows = daytime_rows.sort_values(["Time of feeding"], kind="stable")
+    time_between_feeding = daytime_rows.groupby("Date")["Time of feeding"].diff()
+    time_gap_grouped = time_between_feeding.groupby(daytime_rows["Date"])
+    min2hour = np.timedelta64(1, "h")
+
+    daily = pd.DataFrame(
+        {
+            "sum": grouped.sum(),
+            "mean": grouped.mean(),
+            "min": grouped.min(),
+            "max": grouped.max(),
+            "sessions": grouped.count(),
+            "time gap max": time_gap_grouped.max() / min2hour,
+            "time gap mean": time_gap_grouped.mean() / min2hour,
+            "time gap min": time_gap_grouped.min() / min2hour,
+            # Masking to zero keeps the column dtype and the NaN-skipping sum
+            "daytime sum": amount.where(daytime_index, 0).groupby(by_day).sum(),
+            "nighttime sum": amount.where(nighttime_index, 0).groupby(by_day).sum(),
+            "nighttime count": nighttime_index.groupby(by_day).sum(),
+        },
+    )
+
+    # Days without feedings have zero totals and undefined statistics
+    daily = daily.reindex(date_range).fillna(
+        {"sum": 0.0, "sessions": 0, "daytime sum": 0.0, "nighttime sum": 0.0, "nighttime count": 0},
+    )
+    daily = daily.astype({"sessions": "int64", "nighttime count": "int64"})
+
+    if config["debug"]["debug_mode"]:
+        export_feeding_report(data, key_amount, date_range)
+
+    return daily.rename_axis("date").reset_index()
+
+
+@stage("parse")
+def parse_glow_sleep_data(
+    data_sleep: pd.DataFrame,
+    date_range: pd.DatetimeIndex | None = None,
+) -> pd.DataFrame:
+    if date_range is None:
+        date_range = get_date_range(data_sleep["Date"])
+
+    # For some reason raw sleep data is not sorted by time
+    data_sleep = data_sleep.sort_values(["Begin time"], ascending=False)
+    begin_time = data_sleep["Begin time"]
+    end_time = data_sleep["End time"]
+    by_day = data_sleep["Date"]
+
+    # Get duration for each row, then convert to hours
+    duration = (end_time - begin_time) / np.timedelta64(1, "h")
+
+    # Split sessions at midnight: the part after midnight belongs to the next day
+    crosses_midnight = end_time.dt.normalize() > by_day
+    carry_over = (end_time.dt.hour + end_time.dt.minute / 60).where(crosses_midnight, 0.0)
+
+    # Remove all sleep sessions less than two minutes
+    filtered = duration > SLEEP_THRESHOLD
+
+    # Nap sessions must begin and end on the same day, within the defined window
+    nap_index = (
+        filtered & (end_time.dt.normalize() == by_day) & get_daytime_index(begin_time) & get_daytime_index(end_time)
+    )
+
+    # Compute longest awake time - begin (current time) - end (next row), within each day
+    sessions = data_sleep.loc[filtered, ["Date", "Begin time", "End time"]]
+    end_time_shifted = sessions.groupby("Date")["End time"].shift(-1)
+    awake_duration = sessions["Begin time"] - end_time_shifted
+
+    daily = pd.DataFrame(
+        {
+            "sleep_duration": duration.where(filtered, 0.0).groupby(by_day).sum(),
+            "carry_over": carry_over.groupby(by_day).sum(),
+            "total_naps": nap_index.groupby(by_day).sum(),
+            "total_nap_duration": duration.where(nap_index, 0.0).groupby(by_day).sum(),
+            "longest_session": duration.groupby(by_day).max(),
+            "max_awake_duration": awake_duration.groupby(sessions["Date"]).max() / np.timedelta64(1, "h"),
+        },
+    )
+    daily = daily.reindex(date_range).fillna(
+        {"sleep_duration": 0.0, "carry_over": 0.0, "total_naps": 0, "total_nap_duration": 0.0},
+    )
+
+    # Add the carry-over from the previous day, remove the part past midnight
+    carry_in = daily["carry_over"].shift(1, fill_value=0.0)
+    daily["total_sleep_duration"] = daily["sleep_duration"] + carry_in - daily["carry_over"]
+
+    # Total nighttime duration
+    daily["total_nighttime_duration"] = daily["total_sleep_duration"] - daily["total_nap_duration"]
+
+    daily = daily.astype({"total_naps": "int64"}).rename_axis("date").reset_index()
+    return daily[
+        [
+            "date",
+            "total_naps",
+            "total_sleep_duration",
+            "total_nap_duration",
+            "total_nighttime_duration",
+            "longest_session",
+            "max_awake_duration",
+        ]
+    ]
+
+
+@stage("parse")
+def parse_glow_diaper_data(
+    data_diaper: pd.DataFrame,
+    date_range: pd.DatetimeIndex | None = None,
+) -> pd.DataFrame:
+    if date_range is None:
+        date_range = get_date_range(data_diaper["Date"])
+    by_day = data_diaper["Date"]
+
+    # Categorical codes, so pees and poops are matched on small integers
+    in_the_diaper = data_diaper["In the diaper"].astype("category")
+    categories = in_the_diaper.cat.categories
+    codes = in_the_diaper.cat.codes
+    pee_codes = categories.get_indexer(["pee", "pee and poo"])
+    poop_codes = categories.get_indexer(["poo", "pee and poo"])
+
+    # Separate pees and poops. Codes of -1 are missing entries.
+    is_recorded = codes >= 0
+    is_pee = codes.isin(pee_codes[pee_codes >= 0])
+    is_poop = codes.isin(poop_codes[poop_codes >= 0])
+
+    # Compute diaper day duration
+    diaper_time = data_diaper["Diaper time"].groupby(by_day)
+    diaper_day_duration = (diaper_time.max() - diaper_time.min()).dt.total_seconds() / 3600
+
+    daily = pd.DataFrame(
+        {
+            "daily_total_diaper_count": is_recorded.groupby(by_day).sum(),
+            "pee_count": is_pee.groupby(by_day).sum(),
+            "poop_count": is_poop.groupby(by_day).sum(),
+            "diaper_day_duration": diaper_day_duration,
+        },
+    )
+    daily = daily.reindex(date_range).fillna(
+        {"daily_total_diaper_count": 0, "pee_count": 0, "poop_count": 0},
+    )
+    daily = daily.astype(
+        {"daily_total_diaper_count": "int64", "pee_count": "int64", "poop_count": "int64"},
+    )
+    daily_total_diaper_count = daily["daily_total_diaper_count"]
+
+    # Running total since the first day
+    daily["cumulative_diaper_count"] = daily_total_diaper_count.cumsum()
+
+    # Compute poop to total diaper change ratio
+    daily["poop_ratio"] = (daily["poop_count"] / daily_total_diaper_count) * 100
+
+    # Compute average time between diaper changes
+    daily["diaper_change_time_avg"] = daily["diaper_day_duration"] / daily_total_diaper_count
+
+    daily = daily.rename_axis("date").reset_index()
+    return daily[
+        [
+            "date",
+            "daily_total_diaper_count",
+            "cumulative_diaper_count",
+            "pee_count",
+            "poop_count",
+            "poop_ratio",
+            "diaper_change_time_avg",
+        ]
+    ]
+
+
+def get_abnormal_days(
+    daily_diaper_data: pd.DataFrame,
+) -> tuple[pd.Series, pd.Series]:
+    # Constipation monthly - days with zero poop
+    constipation_days = daily_diaper_data.loc[daily_diaper_data["poop_count"] == 0]
+    constipation_days = constipation_days.set_index("date")
+    constipation_monthly = constipation_days["daily_total_diaper_count"].resample("BMS").count()
+
+    # Diarrhea monthly - days with high percentage of poops
+    diarrhea_days = daily_diaper_data.loc[daily_diaper_data["poop_ratio"] >= CUTOFF]
+    diarrhea_days = diarrhea_days.set_index("date")
+    diarrhea_monthly = diarrhea_days["daily_total_diaper_count"].resample("BMS").count()
+
+    return constipation_monthly, diarrhea_monthly
+
+
+def get_diaper_monthly_data(daily_diaper_data: pd.DataFrame) -> pd.Series:
+    # Reindex
+    monthly_data = daily_diaper_data.set_index("date")
+
+    # Compute monthly total
+    return monthly_data["daily_total_diaper_count"].resample("BMS").sum()
+
+
+def compute_age(date: pd.Series | pd.DatetimeIndex, birthday: pd.Timestamp) -> pd.Series | pd.Index:
+    return (date - birthday) / np.timedelta64(4, "W")
+
+
+@stage("parse")
+def parse_hatch_data(data: pd.DataFrame) -> pd.DataFrame:
+    # Keep date only, the loader parsed it without the time
+    parsed = data[["Date", "Amount", "Percentile"]].rename(columns={"Date": "Start Time"})
+
+    # Sort and remove duplicates
+    parsed = parsed.sort_values(by=["Start Time"], ascending=True)
+    parsed = parsed.drop_duplicates(subset=["Start Time"], keep=False)
+
+    # Reindex and add missing days, none without any weights in the date window
+    idx = (
+        pd.date_range(start=parsed["Start Time"].min(), end=parsed["Start Time"].max())
+        if len(parsed)
+        else pd.DatetimeIndex([])
+    )
+    parsed = parsed.set_index("Start Time").reindex(idx).rename_axis("Start Time").reset_index()
+
+    # Compute Age
+    parsed["Age"] = compute_age(
+        parsed["Start Time"],
+        pd.Timestamp(config["info"]["birthday"]),
+    )
+
+    # Compute diff
+    parsed["ROC"] = parsed["Amount"].diff()
+    # Fill empty rows with 0
+    parsed["ROC"] = parsed["ROC"].fillna(0)
+
+    # Compute average on a rolling window
+    parsed["Weight Average RoC"] = parsed["ROC"].rolling(window=ROC_WINDOW).mean()
+
+    # Convert to oz
+    parsed["Weight Average RoC"] = parsed["Weight Average RoC"] * 35.274
+
+    return parsed
+
+
+def get_feeding_bottle_stats() -> pd.DataFrame:
+    return get_daily_stats(
+        "feeding_bottle",
+        "feeding_bottle_data",
+        functools.partial(parse_glow_feeding_data, key_amount="Amount(ml)"),
+    )
+
+
+def get_feeding_solid_stats() -> pd.DataFrame:
+    return get_daily_stats(
+        "feeding_solid",
+        "feeding_solid_data",
+        functools.partial(parse_glow_feeding_data, key_amount="Amount"),
+    )
+
+
+def get_sleep_stats() -> pd.DataFrame:
+    # The previous day is needed for the midnight carry-over
+    return get_daily_stats("sleep", "sleep_data", parse_glow_sleep_data, overlap_days=1)
+
+
+def get_diaper_stats() -> pd.DataFrame:
+    return get_daily_stats(
+        "diaper",
+        "diaper_data",
+        parse_glow_diaper_data,
+        cumulative_columns=("cumulative_diaper_count",),
+    )
+
+
+def get_diaper_monthly_stats(daily_diaper_data: pd.DataFrame) -> pd.DataFrame:
+    # Monthly diaper count with the days of constipation and diarrhea, by first business day
+    diaper_monthly_data = get_diaper_monthly_data(daily_diaper_data)
+    constipation_monthly_data, diarrhea_monthly_data = get_abnormal_days(daily_diaper_data)
+    monthly = pd.DataFrame(
+        {
+            "diaper_count": diaper_monthly_data,
+            "constipation_days": constipation_monthly_data.reindex(diaper_monthly_data.index, fill_value=0),
+            "diarrhea_days": diarrhea_monthly_data.reindex(diaper_monthly_data.index, fill_value=0),
+        },
+    )
+    return monthly.astype("int64").rename_axis("month").reset_index()
+
+
+def get_stats_tables() -> dict[str, pd.DataFrame]:
+    # Table name -> table, for the active configuration
+    daily_diaper_data = get_diaper_stats()
+    return {
+        "feeding_bottle_daily": get_feeding_bottle_stats(),
+        "feeding_solid_daily": get_feeding_solid_stats(),
+        "sleep_daily": get_sleep_stats(),
+        "diaper_daily": daily_diaper_data,
+        "diaper_monthly": get_diaper_monthly_stats(daily_diaper_data),
+        "weight_daily": parse_hatch_data(sources.hatch_data),
+    }
+
+
+def write_table(table: pd.DataFrame, output_path: Path) -> None:
+    # Through a temporary file, so a reader never sees a torn table
+    tmp_path = get_tmp_path(output_path)
+    if output_path.suffix == ".parquet":
+        table.to_parquet(tmp_path, index=False)
+    else:
+        table.to_json(tmp_path, orient="records", date_format="iso", date_unit="s", indent=2)
+    tmp_path.replace(output_path)
+
+
+def export_stats() -> list[Path]:
+    """Write every table of get_stats_tables() to the stats directory next to the
+    charts of the active configuration, once per format of STATS_FORMATS, and return
+    the paths written.
+    """
+    stats_directory = Path(config["output_data"]["output_directory"]) / STATS_DIRECTORY
+    stats_directory.mkdir(parents=True, exist_ok=True)
+
+    output_paths = []
+    for name, table in get_stats_tables().items():
+        for suffix in STATS_FORMATS:
+            output_path = stats_directory / f"{name}{suffix}"
+            with stage("save"):
+                write_table(table, output_path)
+            output_paths.append(output_path)
+    return output_paths
@@ -0,0 +1,115 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Rolling trends of the daily statistics: moving means, medians and percentile
+# bands over trailing windows of days. Days without a value are skipped, and a
+# window needs values on at least half of its days.
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import param as config
+from config.timing import stage
+
+TREND_WINDOWS = (7, 14, 30)
+TREND_BAND = (25, 75)
+TREND_STATISTICS = ("mean", "median")
+MIN_FRACTION = 0.5
+
+
+@dataclass(frozen=True)
+class TrendSettings:
+    windows: tuple[int, ...] = TREND_WINDOWS
+    # Percentiles shaded around the longest window's line
+    band: tuple[float, float] = TREND_BAND
+    statistic: str = "mean"
+
+
+def get_trend_settings() -> TrendSettings | None:
+    # Settings of the [trends] table, None when the overlay is off
+    trend_param = config.get("trends", {})
+    if not trend_param.get("enabled", False):
+        return None
+
+    settings = TrendSettings(
+        windows=tuple(sorted(trend_param.get("windows", TREND_WINDOWS))),
+        band=tuple(trend_param.get("band", TREND_BAND)),
+        statistic=trend_param.get("statistic", "mean"),
+    )
+    if settings.statistic not in TREND_STATISTICS:
+        raise ValueError(f"[trends] statistic must be one of {', '.join(TREND_STATISTICS)}, not {settings.statistic!r}")
+    if not settings.windows or min(settings.windows) < 1:
+        raise ValueError("[trends] windows must be positive numbers of days")
+    return settings
+
+
+def get_min_periods(window: int) -> int:
+    return max(1, math.ceil(window * MIN_FRACTION))
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    # Sums and counts of each window from cumulative sums, so the cost does not
+    # depend on the window length
+    is_valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(is_valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(is_valid)])
+
+    stop = np.arange(1, values.size + 1)
+    start = np.maximum(stop - window, 0)
+    window_counts = counts[stop] - counts[start]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[stop] - sums[start]) / window_counts
+    return np.where(window_counts >= get_min_periods(window), means, np.nan)
+
+
+def rolling_quantiles(values: np.ndarray, window: int, quantiles: np.ndarray) -> np.ndarray:
+    """Quantiles x days of the trailing windows, interpolated linearly like numpy.
+
+    Every window is sorted once, with the missing values last, and all the quantiles
+    are read from the same sorted windows.
+    """
+    # Too few days for any window to have enough values, including no days at all
+    if values.size < get_min_periods(window):
+        return np.full((quantiles.size, values.size), np.nan)
+
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    ordered = np.sort(sliding_window_view(padded, window), axis=1)
+    counts = window - np.isnan(ordered).sum(axis=1)
+
+    positions = quantiles[:, None] * np.maximum(counts - 1, 0)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    fraction = positions - lower
+
+    rows = np.arange(values.size)
+    lower_values = ordered[rows, lower]
+    upper_values = ordered[rows, upper]
+    result = lower_values + (upper_values - lower_values) * fraction
+    return np.where(counts >= get_min_periods(window), result, np.nan)
+
+
+@stage("parse")
+def compute_trends(values: pd.Series, settings: TrendSettings) -> pd.DataFrame:
+    """Rolling mean, median and band of a daily series, for every window.
+
+    Columns are named mean_<window>, median_<window>, low_<window> and high_<window>.
+    """
+    daily = values.to_numpy(dtype=np.float64)
+    quantiles = np.array([settings.band[0] / 100, 0.5, settings.band[1] / 100])
+
+    trends = {}
+    for window in settings.windows:
+        low, median, high = rolling_quantiles(daily, window, quantiles)
+        trends[f"mean_{window}"] = rolling_mean(daily, window)
+        trends[f"median_{window}"] = median
+        trends[f"low_{window}"] = low
+        trends[f"high_{window}"] = high
+    return pd.DataFrame(trends, index=values.index)
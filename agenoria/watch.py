@@ -0,0 +1,90 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Watch mode polling. The configuration files and every part of their [input_data]
+# exports are polled for a new size or modification time, and the change is
+# reported per input table once the files have stopped changing.
+
+import threading
+from pathlib import Path
+
+from config import read_source_paths
+from config.ingest import get_input_parts
+
+# Seconds between two polls
+POLL_INTERVAL = 0.1
+
+# (path, size, mtime) of every file of a watched input
+Stamps = tuple[tuple[str, int, int], ...]
+# (configuration file, input table or None for the file itself) -> stamps
+Snapshot = dict[tuple[Path, str | None], Stamps]
+
+
+def get_stamps(paths: list[Path]) -> Stamps:
+    stamps = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # Replaced right now, the next poll sees the new file
+        stamps.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(stamps)
+
+
+def take_snapshot(config_paths: list[Path]) -> Snapshot:
+    snapshot: Snapshot = {}
+    for config_path in config_paths:
+        snapshot[(config_path, None)] = get_stamps([config_path])
+        try:
+            source_paths = read_source_paths(config_path)
+        except (OSError, ValueError):
+            continue  # Being edited, its own stamp tells it changed
+
+        for name, source_path in source_paths.items():
+            try:
+                parts = get_input_parts(source_path)
+            except FileNotFoundError:
+                parts = []
+            snapshot[(config_path, name)] = get_stamps(parts)
+    return snapshot
+
+
+def get_changes(previous: Snapshot, current: Snapshot) -> dict[Path, set[str | None]]:
+    # Changed input tables by configuration file, None when the file itself changed
+    changes: dict[Path, set[str | None]] = {}
+    for key in previous.keys() | current.keys():
+        if previous.get(key) != current.get(key):
+            config_path, name = key
+            changes.setdefault(config_path, set()).add(name)
+    return changes
+
+
+def get_changed_paths(previous: Snapshot, current: Snapshot) -> set[Path]:
+    # Every file whose stamp differs between the snapshots, added or removed ones included
+    previous_stamps = {stamp for stamps in previous.values() for stamp in stamps}
+    current_stamps = {stamp for stamps in current.values() for stamp in stamps}
+    return {Path(stamp[0]) for stamp in previous_stamps ^ current_stamps}
+
+
+def wait_for_changes(
+    config_paths: list[Path],
+    snapshot: Snapshot,
+    stop: threading.Event,
+    interval: float = POLL_INTERVAL,
+) -> Snapshot | None:
+    """Poll until a watched file changes and return the new snapshot, or None once
+    stop is set.
+
+    A file still being written changes between two polls, so the snapshot is only
+    returned when a second poll finds it identical.
+    """
+    current = snapshot
+    while not stop.wait(interval):
+        latest = take_snapshot(config_paths)
+        if latest == current and latest != snapshot:
+            return latest
+        current = latest
+    return None
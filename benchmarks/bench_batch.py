@@ -0,0 +1,70 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_batch config/config_zyw.toml
+#
+# Renders N children's reports with one interpreter per configuration, as a shell
+# loop would, and with every configuration passed to a single invocation.
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from config import ROOT_DIR
+
+CONFIGS = (ROOT_DIR / "config/config_zyw.toml", ROOT_DIR / "config/config_zlw.toml")
+COUNTS = (1, 2, 4)
+
+
+def write_configs(count: int, tmp_dir: Path) -> list[Path]:
+    # Copies of the bundled configurations, each writing to its own directory
+    config_paths = []
+    for index in range(count):
+        text = CONFIGS[index % len(CONFIGS)].read_text()
+        output_directory = json.dumps(str(tmp_dir / f"child{index}"))
+        text = text.replace('output_directory = "build"', f"output_directory = {output_directory}")
+
+        config_path = tmp_dir / f"child{index}.toml"
+        config_path.write_text(text)
+        config_paths.append(config_path)
+    return config_paths
+
+
+def run(commands: list[list[str]]) -> float:
+    env = dict(os.environ, MPLBACKEND="Agg")
+    start = timeit.default_timer()
+    for command in commands:
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    return timeit.default_timer() - start
+
+
+def count_charts(tmp_dir: Path) -> int:
+    return sum(1 for _ in tmp_dir.glob("child*/*.*"))
+
+
+def main() -> None:
+    agenoria = [sys.executable, "-m", "agenoria"]
+
+    print(f"{'configs':>8}{'charts':>8}{'separate (charts/s)':>22}{'batch (charts/s)':>19}")
+    for count in COUNTS:
+        with tempfile.TemporaryDirectory() as separate_dir, tempfile.TemporaryDirectory() as batch_dir:
+            separate_configs = write_configs(count, Path(separate_dir))
+            separate_time = run([[*agenoria, str(config_path)] for config_path in separate_configs])
+
+            batch_configs = write_configs(count, Path(batch_dir))
+            batch_time = run([[*agenoria, *map(str, batch_configs)]])
+
+            charts = count_charts(Path(batch_dir))
+            assert charts == count_charts(Path(separate_dir))
+            print(f"{count:>8}{charts:>8}{charts / separate_time:>22.2f}{charts / batch_time:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_cache config/config_zyw.toml
+
+import statistics
+import tempfile
+import timeit
+from pathlib import Path
+
+import config
+from config.cache import clear_cache, load_cached
+
+REPEAT = 5
+
+
+def time_load(source_name: str, cache_dir: Path, *, cold: bool) -> float:
+    _, loader = config.SOURCES[source_name]
+    source_path = config.get_source_path(source_name)
+
+    timings = []
+    for _ in range(REPEAT):
+        if cold:
+            clear_cache(cache_dir)
+        start = timeit.default_timer()
+        load_cached(source_path, loader, cache_dir)
+        timings.append(timeit.default_timer() - start)
+
+    return statistics.median(timings)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = Path(tmp_dir)
+
+        print(f"{'source':<22}{'cold (ms)':>12}{'warm (ms)':>12}{'speedup':>10}")
+        total_cold = total_warm = 0.0
+        for source_name in config.SOURCES:
+            cold = time_load(source_name, cache_dir, cold=True)
+            warm = time_load(source_name, cache_dir, cold=False)
+            total_cold += cold
+            total_warm += warm
+            print(f"{source_name:<22}{cold * 1e3:>12.1f}{warm * 1e3:>12.1f}{cold / warm:>9.1f}x")
+
+        print(f"{'total':<22}{total_cold * 1e3:>12.1f}{total_warm * 1e3:>12.1f}{total_cold / total_warm:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_daily_stats config/config_zyw.toml
+
+import functools
+import statistics
+import timeit
+from collections.abc import Callable
+
+import pandas as pd
+
+from agenoria.plot_24h_viz import map_poop_color, map_poop_colors
+from agenoria.stats import parse_glow_diaper_data, parse_glow_feeding_data, parse_glow_sleep_data
+
+from .legacy import (
+    legacy_parse_glow_diaper_data,
+    legacy_parse_glow_feeding_data,
+    legacy_parse_glow_sleep_data,
+)
+from .synthetic import make_diaper_data, make_feeding_data, make_sleep_data
+
+YEARS = (1, 5)
+REPEAT = 3
+
+
+def time_call(fn: Callable[[], pd.DataFrame]) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = timeit.default_timer()
+        fn()
+        timings.append(timeit.default_timer() - start)
+    return statistics.median(timings)
+
+
+def report(
+    label: str,
+    legacy: Callable[[], pd.DataFrame],
+    vectorized: Callable[[], pd.DataFrame],
+) -> None:
+    pd.testing.assert_frame_equal(legacy(), vectorized())
+    legacy_time = time_call(legacy)
+    vectorized_time = time_call(vectorized)
+    print(f"{label:<28}{legacy_time * 1e3:>12.1f}{vectorized_time * 1e3:>14.1f}{legacy_time / vectorized_time:>9.1f}x")
+
+
+def legacy_map_colors(data: pd.DataFrame) -> pd.DataFrame:
+    return data["Color"].apply(map_poop_color).to_frame()
+
+
+def map_colors(data: pd.DataFrame) -> pd.DataFrame:
+    return pd.Series(map_poop_colors(data["Color"]), name="Color").to_frame()
+
+
+def main() -> None:
+    print(f"{'parser':<28}{'loop (ms)':>12}{'vector (ms)':>14}{'speedup':>10}")
+
+    for years in YEARS:
+        data = make_feeding_data(365 * years)
+        report(
+            f"feeding, {years} yr ({len(data)} rows)",
+            functools.partial(legacy_parse_glow_feeding_data, data, "Amount(ml)"),
+            functools.partial(parse_glow_feeding_data, data, "Amount(ml)"),
+        )
+
+    for years in YEARS:
+        data = make_sleep_data(365 * years)
+        report(
+            f"sleep, {years} yr ({len(data)} rows)",
+            functools.partial(legacy_parse_glow_sleep_data, data),
+            functools.partial(parse_glow_sleep_data, data),
+        )
+
+    for years in YEARS:
+        data = make_diaper_data(365 * years)
+        report(
+            f"diaper, {years} yr ({len(data)} rows)",
+            functools.partial(legacy_parse_glow_diaper_data, data),
+            functools.partial(parse_glow_diaper_data, data),
+        )
+        report(
+            f"diaper colors, {years} yr",
+            functools.partial(legacy_map_colors, data),
+            functools.partial(map_colors, data),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_events config/config_zyw.toml
+#
+# On synthetic Glow exports of several years, compares the 24-hour chart parsing
+# from copies of the input tables with the parsing from the event store, and
+# looking up the events of a week with a boolean mask and with the day index.
+
+import functools
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agenoria.plot_24h_viz import parse_raw_data, parse_sleep_sessions
+from config import events, sources
+from config import param as config
+from config.events import KINDS
+
+from .legacy import legacy_parse_raw_data, legacy_parse_sleep_sessions
+from .synthetic import write_glow_export
+
+YEARS = 20
+REPEAT = 3
+LOOKUPS = 1000
+WINDOW_DAYS = 7
+
+# Kind -> parse from the input table, parse from the events
+PARSERS: dict[str, tuple[Callable[[pd.DataFrame], pd.DataFrame], Callable]] = {
+    "sleep": (legacy_parse_sleep_sessions, parse_sleep_sessions),
+    "bottle": (functools.partial(legacy_parse_raw_data, timestamp_column="Time of feeding"), parse_raw_data),
+    "solid": (functools.partial(legacy_parse_raw_data, timestamp_column="Time of feeding"), parse_raw_data),
+    "diaper": (functools.partial(legacy_parse_raw_data, timestamp_column="Diaper time"), parse_raw_data),
+}
+
+
+def best_time(fn: Callable[[], object]) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def parse_stored_events(kind: str, parse_events: Callable) -> pd.DataFrame:
+    # The store's lookup is part of the timed call
+    return parse_events(events.get(kind))
+
+
+def lookup_mask(data: pd.DataFrame, dates: pd.DatetimeIndex) -> int:
+    rows = 0
+    for date in dates:
+        rows += len(data[(data["Date"] >= date) & (data["Date"] < date + pd.Timedelta(days=WINDOW_DAYS))])
+    return rows
+
+
+def lookup_index(kind: str, days: np.ndarray) -> int:
+    kind_events = events.get(kind)
+    return sum(len(kind_events.select(int(day), int(day) + WINDOW_DAYS)) for day in days)
+
+
+def main() -> None:
+    config["cache"]["enabled"] = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_paths = write_glow_export(Path(tmp_dir), 365 * YEARS)
+        for config_key, input_path in input_paths.items():
+            config["input_data"][config_key] = str(input_path)
+        sources.reset()
+
+        print(f"{YEARS} years of synthetic exports, {LOOKUPS} lookups of {WINDOW_DAYS} days")
+        print(
+            f"{'kind':<8}{'rows':>8}{'table (s)':>11}{'build (s)':>11}{'events (s)':>12}"
+            f"{'mask (s)':>10}{'index (s)':>11}",
+        )
+
+        rng = np.random.default_rng(0)
+        for kind, (parse_table, parse_events) in PARSERS.items():
+            data = sources.get(KINDS[kind][0])
+            _, get_events = KINDS[kind]
+
+            table_time = best_time(functools.partial(parse_table, data))
+            build_time = best_time(functools.partial(get_events, data))
+            events_time = best_time(functools.partial(parse_stored_events, kind, parse_events))
+
+            kind_events = events.get(kind)
+            days = rng.integers(kind_events.first_day, kind_events.last_day + 1, LOOKUPS)
+            dates = pd.to_datetime(days, unit="D")
+            assert lookup_mask(data, dates) == lookup_index(kind, days)
+            mask_time = best_time(functools.partial(lookup_mask, data, dates))
+            index_time = best_time(functools.partial(lookup_index, kind, days))
+
+            print(
+                f"{kind:<8}{len(data):>8}{table_time:>11.3f}{build_time:>11.3f}{events_time:>12.3f}"
+                f"{mask_time:>10.3f}{index_time:>11.3f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_export config/config_zyw.toml
+#
+# Writes every chart as PDF, PNG and SVG: once per format, as three runs of the
+# pipeline would, and with all formats from a single pass. Input loading and the
+# interpreter start-up of the repeated runs are not counted.
+
+import importlib
+import tempfile
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from agenoria.__main__ import PLOT_TASKS
+from agenoria.plot_settings import export_figure
+from config import param as config
+
+from .legacy import legacy_export_figure
+
+FORMATS = [".pdf", ".png", ".svg"]
+PLOT_MODULES = (
+    "agenoria.plot_24h_viz",
+    "agenoria.plot_diaper_charts",
+    "agenoria.plot_feeding_stats_charts",
+    "agenoria.plot_growth_charts",
+    "agenoria.plot_medical_charts",
+    "agenoria.plot_sleep_stats_charts",
+)
+
+
+def use_export(export: Callable[[Figure, str], None]) -> None:
+    # The chart modules import export_figure by name
+    for module_name in PLOT_MODULES:
+        module: Any = importlib.import_module(module_name)
+        module.export_figure = export
+
+
+def build_charts() -> float:
+    start = timeit.default_timer()
+    for _, plot_fn, _ in PLOT_TASKS:
+        plot_fn()
+        plt.close("all")
+    return timeit.default_timer() - start
+
+
+def main() -> None:
+    mpl.use("Agg")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config["output_data"]["output_directory"] = tmp_dir
+
+        # Warm up the input tables and reference curves
+        config["output_format"]["format"] = ".png"
+        build_charts()
+
+        use_export(legacy_export_figure)
+        repeated_time = 0.0
+        for output_format in FORMATS:
+            config["output_format"]["format"] = output_format
+            repeated_time += build_charts()
+
+        use_export(export_figure)
+        config["output_format"]["format"] = FORMATS
+        single_time = build_charts()
+
+    print(f"{'charts':<8}{'formats':<20}{'one run per format (s)':>24}{'single pass (s)':>17}{'saved':>8}")
+    print(
+        f"{len(PLOT_TASKS):<8}{' '.join(FORMATS):<20}{repeated_time:>24.1f}{single_time:>17.1f}"
+        f"{1 - single_time / repeated_time:>8.0%}",
+    )
+
+
+if __name__ == "__main__":
+    main()
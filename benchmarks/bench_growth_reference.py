@@ -0,0 +1,55 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_growth_reference config/config_zyw.toml
+
+import math
+import timeit
+
+import numpy as np
+
+from agenoria.growth_reference import MEASURES, GrowthCurve, compute_percentiles, get_growth_curve
+
+MEASUREMENTS = 1_000_000
+LOOP_MEASUREMENTS = 10_000
+
+
+def scalar_percentile(curve: GrowthCurve, x: float, measurement: float) -> float:
+    # One measurement at a time, as a per-row apply would
+    l_value, m_value, s_value = (float(np.interp(x, curve.x, values)) for values in curve.lms)
+    if l_value == 0:
+        z_score = math.log(measurement / m_value) / s_value
+    else:
+        z_score = ((measurement / m_value) ** l_value - 1) / (l_value * s_value)
+    return 50 * (1 + math.erf(z_score / math.sqrt(2)))
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+
+    print(f"{'measure':<16}{'vector (ms / 1M)':>18}{'loop (ms / 1M)':>16}{'speedup':>10}")
+    for measure in MEASURES:
+        curve = get_growth_curve(measure)
+
+        # Measurements scattered around the median across the whole reference range
+        x = rng.uniform(curve.x[0], curve.x[-1], MEASUREMENTS)
+        measurement = np.interp(x, curve.x, curve.lms[1]) * rng.normal(1, 0.1, MEASUREMENTS)
+
+        start = timeit.default_timer()
+        percentiles = compute_percentiles(curve, x, measurement)
+        vector_time = timeit.default_timer() - start
+
+        start = timeit.default_timer()
+        sample = zip(x[:LOOP_MEASUREMENTS], measurement[:LOOP_MEASUREMENTS], strict=True)
+        loop = [scalar_percentile(curve, *values) for values in sample]
+        loop_time = (timeit.default_timer() - start) * MEASUREMENTS / LOOP_MEASUREMENTS
+
+        np.testing.assert_allclose(percentiles[:LOOP_MEASUREMENTS], loop, atol=1e-5)
+        print(f"{measure:<16}{vector_time * 1e3:>18.1f}{loop_time * 1e3:>16.0f}{loop_time / vector_time:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_incremental config/config_zyw.toml
+
+import tempfile
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from agenoria.daily_stats import DailyParser, build_daily_stats
+from agenoria.stats import parse_glow_diaper_data, parse_glow_sleep_data
+
+from .synthetic import make_diaper_data, make_sleep_data
+
+YEARS = (5, 40)
+NEW_DAYS = 1
+
+
+# Label, export, timestamp column, parser, overlap days, cumulative columns
+Case = tuple[str, pd.DataFrame, str, DailyParser, int, tuple[str, ...]]
+
+
+def main() -> None:
+    cases: list[Case] = []
+    for years in YEARS:
+        cases.append((f"sleep, {years} yr", make_sleep_data(365 * years), "Begin time", parse_glow_sleep_data, 1, ()))
+        cases.append(
+            (
+                f"diaper, {years} yr",
+                make_diaper_data(365 * years),
+                "Diaper time",
+                parse_glow_diaper_data,
+                0,
+                ("cumulative_diaper_count",),
+            ),
+        )
+
+    print(f"{'table':<16}{'rows':>8}{'full (ms)':>12}{'incremental (ms)':>19}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index, (label, data, time_column, parse, overlap_days, cumulative_columns) in enumerate(cases):
+            store_path = Path(tmp_dir) / f"table{index}"
+            cutoff = data[time_column].max().normalize() - pd.Timedelta(days=NEW_DAYS - 1)
+
+            # Previous run stored everything before the latest export's new day
+            build_daily_stats(data[data[time_column] < cutoff], parse, store_path, overlap_days=overlap_days)
+
+            start = timeit.default_timer()
+            parse(data)
+            full_time = timeit.default_timer() - start
+
+            start = timeit.default_timer()
+            build_daily_stats(
+                data,
+                parse,
+                store_path,
+                overlap_days=overlap_days,
+                cumulative_columns=cumulative_columns,
+            )
+            incremental_time = timeit.default_timer() - start
+
+            print(f"{label:<16}{len(data):>8}{full_time * 1e3:>12.1f}{incremental_time * 1e3:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
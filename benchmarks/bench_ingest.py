@@ -0,0 +1,77 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_ingest config/config_zyw.toml
+#
+# Splits a synthetic sleep export of 100k+ rows into overlapping 5,000-row parts,
+# as Glow exports them, and merges them back with read_parts() at several chunk
+# sizes, against reading and deduplicating every part at once.
+
+import functools
+import tempfile
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+from config.ingest import read_parts
+from config.schema import SLEEP
+
+from .synthetic import split_export, write_glow_export
+
+YEARS = 40
+OVERLAP = 500
+CHUNK_ROWS = (1000, 5000, 50_000)
+
+
+def read_all(parts: list[Path]) -> pd.DataFrame:
+    # Every part in memory at once, then one drop_duplicates(), which also drops the
+    # rows a single export repeats
+    data = pd.concat([pd.read_csv(part, dtype=SLEEP.get_dtypes()) for part in parts], ignore_index=True)
+    data = SLEEP.apply(data).drop_duplicates(ignore_index=True)
+    return data.sort_values("Begin time", ascending=False, kind="stable", ignore_index=True)
+
+
+def measure(fn: Callable[[], pd.DataFrame]) -> tuple[pd.DataFrame, float, float]:
+    # Result, seconds and peak traced memory in MB. Tracing slows the reader down,
+    # so it is timed on a separate run.
+    start = timeit.default_timer()
+    data = fn()
+    elapsed = timeit.default_timer() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, elapsed, peak / 2**20
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_path = write_glow_export(Path(tmp_dir) / "export", 365 * YEARS)["data_sleep"]
+        parts = split_export(export_path, Path(tmp_dir) / "parts", overlap=OVERLAP)
+        part_rows = sum(len(pd.read_csv(part)) for part in parts)
+
+        # The parts merged back give the export itself, whose own repeated rows stay
+        expected = SLEEP.apply(pd.read_csv(export_path, dtype=SLEEP.get_dtypes()))
+        expected = expected.sort_values("Begin time", ascending=False, kind="stable", ignore_index=True)
+
+        _, all_time, all_peak = measure(functools.partial(read_all, parts))
+        print(f"{len(parts)} parts, {part_rows} rows, {len(expected)} after deduplication")
+        print(f"{'reader':<24}{'time (s)':>10}{'rows/s':>12}{'peak (MB)':>12}")
+        print(f"{'all parts at once':<24}{all_time:>10.2f}{part_rows / all_time:>12.0f}{all_peak:>12.1f}")
+
+        for chunk_rows in CHUNK_ROWS:
+            data, elapsed, peak = measure(functools.partial(read_parts, parts, SLEEP, chunk_rows))
+            pd.testing.assert_frame_equal(data, expected)
+            label = f"chunks of {chunk_rows}"
+            print(f"{label:<24}{elapsed:>10.2f}{part_rows / elapsed:>12.0f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
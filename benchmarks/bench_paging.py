@@ -0,0 +1,75 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_paging config/config_zyw.toml
+#
+# On synthetic Glow exports of growing length, times the 24-hour sleep chart of the
+# whole history on a single page and paged by year, both from scratch and rebuilt
+# with every page cached, and reports the peak memory traced while drawing it.
+
+import functools
+import importlib.util
+import shutil
+import tempfile
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from agenoria.plot_24h_viz import plot_sleep_24h_viz
+from config import activate
+from config import param as config
+
+from .synthetic import write_config, write_glow_export
+
+YEARS = (1, 5, 10)
+PAGE_WEEKS = 52
+
+
+def measure(fn: Callable[[], None]) -> tuple[float, float]:
+    # Seconds, and peak MB of the Python and NumPy allocations of a second run
+    start = timeit.default_timer()
+    fn()
+    elapsed = timeit.default_timer() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def plot_uncached(cache_dir: Path) -> None:
+    shutil.rmtree(cache_dir / "viz_pages", ignore_errors=True)
+    plot_sleep_24h_viz()
+
+
+def main() -> None:
+    # Optional, see agenoria.paging
+    if importlib.util.find_spec("pypdf") is None:
+        print("pypdf is not installed, paged rebuilds draw every page again")
+
+    print(f"{'years':>6}{'single (s)':>12}{'peak (MB)':>11}{'paged (s)':>11}{'peak (MB)':>11}{'cached (s)':>12}")
+    for years in YEARS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_paths = write_glow_export(Path(tmp_dir) / "data", 365 * years)
+            activate(write_config(Path(tmp_dir) / "config.toml", input_paths, Path(tmp_dir) / "build"))
+            cache_dir = Path(tmp_dir) / "cache"
+            config["cache"] = {"enabled": True, "directory": str(cache_dir)}
+            config["output_format"].update({"format": ".pdf", "output_year_one_only": False, "viz_page_weeks": 0})
+            single = measure(plot_sleep_24h_viz)
+
+            # Drawn from scratch each time, then with every page in the cache
+            config["output_format"]["viz_page_weeks"] = PAGE_WEEKS
+            paged = measure(functools.partial(plot_uncached, cache_dir))
+            plot_sleep_24h_viz()
+            cached = min(timeit.repeat(plot_sleep_24h_viz, number=1, repeat=3))
+
+        print(f"{years:>6}{single[0]:>12.2f}{single[1]:>11.1f}{paged[0]:>11.2f}{paged[1]:>11.1f}{cached:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
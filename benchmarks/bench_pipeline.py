@@ -0,0 +1,95 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_pipeline config/config_zyw.toml
+#
+# Builds every chart under each start method, with and without the shared tables,
+# and samples the memory of the whole process tree. Linux only, it reads /proc.
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+from agenoria.__main__ import main as build_charts
+from config import param as config
+
+SAMPLE_INTERVAL = 0.02
+MODES = (
+    ("fork", False),
+    ("fork", True),
+    ("spawn", False),
+    ("spawn", True),
+)
+
+
+def get_process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children = (task / "children").read_text().split()
+        except OSError:
+            continue
+        for child in children:
+            pids.extend(get_process_tree(int(child)))
+    return pids
+
+
+def get_memory(pid: int) -> tuple[int, int]:
+    # (RSS, PSS) in kB. PSS splits shared pages between the processes mapping them.
+    rss = pss = 0
+    try:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return rss, pss
+
+
+def measure(start_method: str, share_tables: bool) -> tuple[float, int, int]:
+    command = [sys.executable, "-m", "benchmarks.bench_pipeline", *sys.argv[1:2], start_method, str(share_tables)]
+    env = dict(os.environ, MPLBACKEND="Agg")
+
+    start = timeit.default_timer()
+    proc = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    peak_rss = peak_pss = 0
+    while proc.poll() is None:
+        memory = [get_memory(pid) for pid in get_process_tree(proc.pid)]
+        peak_rss = max(peak_rss, sum(rss for rss, _ in memory))
+        peak_pss = max(peak_pss, sum(pss for _, pss in memory))
+        time.sleep(SAMPLE_INTERVAL)
+    elapsed = timeit.default_timer() - start
+
+    if proc.returncode:
+        raise RuntimeError(f"{start_method} run failed with exit code {proc.returncode}")
+    return elapsed, peak_rss, peak_pss
+
+
+def run_child(start_method: str, share_tables: bool) -> int:
+    multiprocessing.set_start_method(start_method)
+    config.setdefault("runtime", {})["share_tables"] = share_tables
+    # Every mode renders every chart, not just the ones the previous run left stale
+    return build_charts([*sys.argv[1:2], "--force"])
+
+
+def main() -> None:
+    print(f"{'start method':<14}{'shared':<8}{'wall (s)':>10}{'peak RSS (MB)':>15}{'peak PSS (MB)':>15}")
+    for start_method, share_tables in MODES:
+        elapsed, peak_rss, peak_pss = measure(start_method, share_tables)
+        print(f"{start_method:<14}{share_tables!s:<8}{elapsed:>10.2f}{peak_rss / 1024:>15.0f}{peak_pss / 1024:>15.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit(run_child(sys.argv[2], sys.argv[3] == "True"))
+    else:
+        main()
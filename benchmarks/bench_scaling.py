@@ -0,0 +1,153 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_scaling config/config_zyw.toml [--factors 1 10 100]
+#            [--output bench_scaling.json] [--baseline previous.json]
+#
+# Times every loader, parser and chart on synthetic exports at multiples of the
+# bundled data size, writes the results as JSON and compares them with the JSON
+# of an earlier run if one is given.
+
+import argparse
+import datetime
+import functools
+import json
+import platform
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from agenoria.__main__ import PLOT_TASKS
+from agenoria.pipeline import init_worker, run_plot_task
+from agenoria.plot_growth_charts import parse_glow_data
+from agenoria.stats import parse_glow_diaper_data, parse_glow_feeding_data, parse_glow_sleep_data, parse_hatch_data
+from config import SOURCES, activate, load_source, sources
+from config import param as config
+from config.events import get_head_events, get_height_events
+
+from .synthetic import BUNDLED_DAYS, write_config, write_glow_export
+
+FACTORS = (1, 10, 100)
+RESULTS_VERSION = 1
+
+# Parser -> (input table, call)
+PARSERS: dict[str, tuple[str, Callable[[pd.DataFrame], object]]] = {
+    "parse_glow_diaper_data": ("diaper_data", parse_glow_diaper_data),
+    "parse_glow_sleep_data": ("sleep_data", parse_glow_sleep_data),
+    "parse_glow_feeding_data": (
+        "feeding_bottle_data",
+        functools.partial(parse_glow_feeding_data, key_amount="Amount(ml)"),
+    ),
+    "parse_glow_data": ("growth_data", lambda data: parse_glow_data(get_height_events(data), get_head_events(data))),
+    "parse_hatch_data": ("hatch_data", parse_hatch_data),
+}
+
+
+def time_call(fn: Callable[[], object]) -> float:
+    start = timeit.default_timer()
+    fn()
+    return timeit.default_timer() - start
+
+
+def attach_source(name: str) -> None:
+    sources.attach({name: load_source(name)})
+
+
+def measure(factor: int, tmp_dir: Path) -> dict:
+    days = BUNDLED_DAYS * factor
+    input_paths = write_glow_export(tmp_dir / "data", days)
+    config_path = write_config(tmp_dir / "config.toml", input_paths, tmp_dir / "build")
+    activate(config_path)
+    # Time the CSV parsing, not the Parquet cache
+    config["cache"]["enabled"] = False
+
+    load: dict[str, float] = {}
+    for name in SOURCES:
+        load[name] = time_call(functools.partial(attach_source, name))
+    rows = {name: len(sources.get(name)) for name in SOURCES}
+
+    parse: dict[str, float] = {}
+    for parser_name, (source_name, parser) in PARSERS.items():
+        parse[parser_name] = time_call(functools.partial(parser, sources.get(source_name)))
+
+    # Same path as a pool worker, with the stage breakdown
+    charts = {}
+    for config_key, plot_fn, _ in PLOT_TASKS:
+        charts[config_key] = run_plot_task(plot_fn, 0, config_path, None)
+
+    return {"days": days, "rows": rows, "load": load, "parse": parse, "charts": charts}
+
+
+def get_seconds(factor_results: dict) -> dict[str, float]:
+    # Flat view for the table: one time per loader, parser and chart
+    seconds = {f"load {name}": value for name, value in factor_results["load"].items()}
+    seconds.update(factor_results["parse"])
+    seconds.update({name: report["seconds"] for name, report in factor_results["charts"].items()})
+    return seconds
+
+
+def print_table(results: dict, baseline: dict | None) -> None:
+    factors = list(results["factors"])
+    print(f"{'':<36}" + "".join(f"{factor + 'x (s)':>20}" for factor in factors))
+
+    seconds = {factor: get_seconds(results["factors"][factor]) for factor in factors}
+    baseline_seconds = (
+        {factor: get_seconds(baseline["factors"][factor]) for factor in factors if factor in baseline["factors"]}
+        if baseline
+        else {}
+    )
+
+    for name in seconds[factors[0]]:
+        cells = []
+        for factor in factors:
+            cell = f"{seconds[factor][name]:.3f}"
+            previous = baseline_seconds.get(factor, {}).get(name)
+            if previous:
+                cell += f" ({seconds[factor][name] / previous:.2f}x)"
+            cells.append(f"{cell:>20}")
+        print(f"{name:<36}" + "".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the parsers and charts at several data sizes.")
+    parser.add_argument("config", nargs="?", help="ignored, the synthetic data uses config_zyw.toml")
+    parser.add_argument("--factors", type=int, nargs="+", default=list(FACTORS))
+    parser.add_argument("--output", type=Path, default=Path("bench_scaling.json"))
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    mpl.use("Agg")
+    init_worker()
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+        "versions": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "matplotlib": mpl.__version__,
+        },
+    }
+    factors: dict[str, dict] = {}
+    for factor in args.factors:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            factors[str(factor)] = measure(factor, Path(tmp_dir))
+    results["factors"] = factors
+
+    args.output.write_text(json.dumps(results, indent=2))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_table(results, baseline)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
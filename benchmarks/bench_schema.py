@@ -0,0 +1,74 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_schema config/config_zyw.toml
+#
+# Loads synthetic Glow exports of several years with the typed schemas and with
+# plain read_csv() and pandas timestamp parsing, and compares the load time and
+# the in-memory size of every table.
+
+import functools
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+import config
+from config import param
+
+from .synthetic import write_glow_export
+
+YEARS = 20
+REPEAT = 3
+
+# Source -> input key and timestamp columns, as the loaders parsed them before the schemas
+LEGACY: dict[str, tuple[str, tuple[str, ...]]] = {
+    "diaper_data": ("data_diaper", ("Diaper time",)),
+    "sleep_data": ("data_sleep", ("Begin time", "End time")),
+    "feeding_bottle_data": ("data_feed_bottle", ("Time of feeding",)),
+    "feeding_solid_data": ("data_feed_solid", ("Time of feeding",)),
+}
+
+
+def load_legacy(source_path: Path, timestamps: tuple[str, ...]) -> pd.DataFrame:
+    data = pd.read_csv(source_path)
+    for column in timestamps:
+        data[column] = pd.to_datetime(data[column], format=config.GLOW_TIME_FORMAT)
+    return data
+
+
+def best_time(fn: Callable[[], pd.DataFrame]) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def main() -> None:
+    param["cache"]["enabled"] = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_paths = write_glow_export(Path(tmp_dir), 365 * YEARS)
+        print(f"{YEARS} years of synthetic exports")
+        print(f"{'source':<24}{'rows':>8}{'legacy (s)':>12}{'schema (s)':>12}{'legacy (MB)':>13}{'schema (MB)':>13}")
+
+        for name, (config_key, timestamps) in LEGACY.items():
+            param["input_data"][config_key] = str(input_paths[config_key])
+
+            legacy = load_legacy(input_paths[config_key], timestamps)
+            typed = config.load_source(name)
+            legacy_time = best_time(functools.partial(load_legacy, input_paths[config_key], timestamps))
+            typed_time = best_time(functools.partial(config.load_source, name))
+
+            legacy_size = legacy.memory_usage(deep=True).sum() / 2**20
+            typed_size = typed.drop(columns="Date").memory_usage(deep=True).sum() / 2**20
+            print(
+                f"{name:<24}{len(typed):>8}{legacy_time:>12.3f}{typed_time:>12.3f}"
+                f"{legacy_size:>13.1f}{typed_size:>13.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_serve config/config_zyw.toml
+#
+# Load test of --serve. Starts a server on localhost for a synthetic year of Glow
+# exports, then requests every chart as PNG once from CLIENTS concurrent clients,
+# each one rendered on the worker pool, and their last WINDOW_DAYS days the same way.
+# For DURATION seconds, it then requests all of them at random, from the cache.
+# Reports the requests per second and the median and 95th percentile latency of
+# each phase.
+
+import json
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import timeit
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import ROOT_DIR
+
+from .synthetic import START_DATE, write_config, write_glow_export
+
+DAYS = 365
+CLIENTS = 8
+# Seconds of the warm phase
+DURATION = 5.0
+# Days of the window also requested in the warm phase, at the end of the log
+WINDOW_DAYS = 90
+
+
+def fetch(url: str) -> float:
+    # Seconds until the whole response is read
+    start = timeit.default_timer()
+    with urllib.request.urlopen(url, timeout=600) as response:
+        response.read()
+    return timeit.default_timer() - start
+
+
+def hammer(urls: list[str], stop: threading.Event, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    latencies = []
+    while not stop.is_set():
+        latencies.append(fetch(rng.choice(urls)))
+    return latencies
+
+
+def render_all(urls: list[str]) -> tuple[list[float], float]:
+    # Latencies and wall time of requesting every URL once, CLIENTS at a time
+    start = timeit.default_timer()
+    with ThreadPoolExecutor(CLIENTS) as executor:
+        latencies = list(executor.map(fetch, urls))
+    return latencies, timeit.default_timer() - start
+
+
+def report(label: str, latencies: list[float], seconds: float) -> None:
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    print(f"{label:<8}{len(latencies):>10}{len(latencies) / seconds:>10.1f}{p50:>11.1f}{p95:>11.1f}")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_paths = write_glow_export(Path(tmp_dir) / "data", DAYS)
+        config_path = write_config(Path(tmp_dir) / "child.toml", input_paths, Path(tmp_dir) / "build")
+        command = [sys.executable, "-m", "agenoria", str(config_path), "--serve", "--port", "0"]
+        server = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.PIPE, text=True)
+        try:
+            # "Serving the charts of ... on http://127.0.0.1:port"
+            assert server.stdout is not None
+            url = server.stdout.readline().split()[-1]
+            with urllib.request.urlopen(f"{url}/") as response:
+                charts = json.load(response)["charts"]
+
+            # Every chart rendered once, CLIENTS at a time, then the window of each
+            since = (START_DATE + pd.Timedelta(days=DAYS - WINDOW_DAYS)).date()
+            chart_urls = [f"{url}/charts/{chart}.png" for chart in charts]
+            window_urls = [f"{chart_url}?since={since}" for chart_url in chart_urls]
+            results = {"full": render_all(chart_urls), "window": render_all(window_urls)}
+
+            # Then all of them at random, from the cache
+            stop = threading.Event()
+            start = timeit.default_timer()
+            with ThreadPoolExecutor(CLIENTS) as executor:
+                futures = [executor.submit(hammer, chart_urls + window_urls, stop, seed) for seed in range(CLIENTS)]
+                stop.wait(DURATION)
+                stop.set()
+                latencies = [latency for future in futures for latency in future.result()]
+            results["cached"] = latencies, timeit.default_timer() - start
+        finally:
+            # Like Ctrl+C, so the server shuts its workers down
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+    print(f"{len(charts)} charts of {DAYS} days of synthetic exports, {CLIENTS} concurrent clients")
+    print(f"{'phase':<8}{'requests':>10}{'req/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}")
+    for phase, (latencies, seconds) in results.items():
+        report(phase, latencies, seconds)
+
+
+if __name__ == "__main__":
+    main()
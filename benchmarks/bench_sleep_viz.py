@@ -0,0 +1,83 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_sleep_viz config/config_zyw.toml
+
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.axes import Axes
+
+from agenoria.plot_24h_viz import (
+    draw_sleep_bars,
+    get_end_date,
+    parse_sleep_sessions,
+)
+from agenoria.plot_settings import (
+    format_24h_week_plot_horizontal,
+    format_24h_week_plot_vertical,
+)
+from config import events
+from config.events import get_sleep_events
+
+from .legacy import legacy_draw_sleep_bars
+from .synthetic import make_sleep_data
+
+SYNTHETIC_YEARS = 5
+
+
+def render_sleep_viz(
+    data: pd.DataFrame,
+    draw: Callable[[Axes, pd.DataFrame], object],
+    orientation: str,
+    filename: Path,
+) -> tuple[int, float]:
+    start = timeit.default_timer()
+
+    figure = plt.figure()
+    fig_ax = figure.add_subplot(111)
+    draw(fig_ax, data)
+
+    end_date = get_end_date(data["day_number"], first_year_only=False)
+    if orientation == "vertical":
+        format_24h_week_plot_vertical(fig_ax, end_date)
+    else:
+        format_24h_week_plot_horizontal(fig_ax, end_date, "Sleep")
+
+    figure.set_size_inches(17, 11)
+    figure.savefig(filename, bbox_inches="tight")
+    artists = len(fig_ax.collections)
+    plt.close(figure)
+
+    return artists, timeit.default_timer() - start
+
+
+def main() -> None:
+    datasets = {
+        "bundled": parse_sleep_sessions(events.sleep),
+        f"synthetic {SYNTHETIC_YEARS} yr": parse_sleep_sessions(
+            get_sleep_events(make_sleep_data(365 * SYNTHETIC_YEARS)),
+        ),
+    }
+    renderers = {"loop": legacy_draw_sleep_bars, "batched": draw_sleep_bars}
+
+    print(f"{'data':<18}{'orientation':<12}{'renderer':<10}{'artists':>9}{'time (s)':>10}{'PDF (KB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, data in datasets.items():
+            for orientation in ("horizontal", "vertical"):
+                for renderer, draw in renderers.items():
+                    filename = Path(tmp_dir) / f"{renderer}.pdf"
+                    artists, elapsed = render_sleep_viz(data, draw, orientation, filename)
+                    size = filename.stat().st_size / 1024
+                    print(f"{label:<18}{orientation:<12}{renderer:<10}{artists:>9}{elapsed:>10.2f}{size:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_startup config/config_zyw.toml
+#
+# Times `python -m agenoria --help`, a run that builds the medical charts only and
+# one with --export-stats, each in a fresh interpreter, and lists the slowest
+# imports from -X importtime.
+# Exits with an error when --help takes longer than STARTUP_LIMIT seconds or when
+# the parent process imports a plotting library.
+
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from config import ROOT_DIR
+
+from .synthetic import write_config, write_glow_export
+
+REPEAT = 5
+# Seconds --help may take, interpreter startup included
+STARTUP_LIMIT = 1.0
+# Only the chart workers may import these
+PLOTTING_MODULES = ("matplotlib", "seaborn", "plotly")
+SLOWEST_IMPORTS = 10
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run(arguments: list[str]) -> tuple[float, str]:
+    # Wall time and stderr of python arguments, run from the repository root
+    start = timeit.default_timer()
+    result = subprocess.run([sys.executable, *arguments], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    return timeit.default_timer() - start, result.stderr
+
+
+def parse_import_times(stderr: str) -> dict[str, tuple[int, int, int]]:
+    # Module -> (self, cumulative) microseconds and nesting depth of a -X importtime report
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            # One space, then two per level of nesting
+            times[match[4]] = (int(match[1]), int(match[2]), (len(match[3]) - 1) // 2)
+    return times
+
+
+def get_plotting_imports(modules: dict[str, tuple[int, int, int]]) -> list[str]:
+    return [module for module in modules if module.split(".")[0] in PLOTTING_MODULES]
+
+
+def best_time(arguments: list[str]) -> float:
+    return min(run(arguments)[0] for _ in range(REPEAT))
+
+
+def main() -> int:
+    help_time = best_time(["-m", "agenoria", "--help"])
+    modules = parse_import_times(run(["-X", "importtime", "-m", "agenoria", "--help"])[1])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_paths = write_glow_export(Path(tmp_dir) / "data", 365)
+        charts = ("build_medical_charts",)
+        config_path = write_config(Path(tmp_dir) / "child.toml", input_paths, Path(tmp_dir) / "build", charts)
+        chart_time = best_time(["-m", "agenoria", str(config_path), "--force", "--jobs", "1"])
+        stats_time = best_time(["-m", "agenoria", str(config_path), "--export-stats"])
+
+    print(f"{'python -m agenoria --help':<40}{help_time:>8.2f} s (limit {STARTUP_LIMIT:.2f} s)")
+    print(f"{'medical charts only, --force':<40}{chart_time:>8.2f} s")
+    print(f"{'--export-stats':<40}{stats_time:>8.2f} s")
+    print("Slowest imports of --help and of the modules it imports, cumulative:")
+    outer = {module: times for module, times in modules.items() if times[2] <= 1}
+    for module, (_, cumulative, _) in sorted(outer.items(), key=lambda item: -item[1][1])[:SLOWEST_IMPORTS]:
+        print(f"  {module:<38}{cumulative / 1e6:>8.3f} s")
+
+    status = 0
+    plotting = get_plotting_imports(modules)
+    if plotting:
+        print(f"--help imports {', '.join(plotting[:5])}", file=sys.stderr)
+        status = 1
+    if help_time > STARTUP_LIMIT:
+        print(f"--help took {help_time:.2f} s, more than {STARTUP_LIMIT:.2f} s", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
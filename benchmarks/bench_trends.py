@@ -0,0 +1,63 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_trends config/config_zyw.toml
+#
+# Times the rolling trends of many daily metrics over several years, against one
+# pandas rolling() call per statistic and window.
+
+import timeit
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from agenoria.trends import TrendSettings, compute_trends, get_min_periods
+
+YEARS = (1, 10, 150)
+METRICS = 30
+REPEAT = 3
+
+
+def pandas_trends(values: pd.Series, settings: TrendSettings) -> pd.DataFrame:
+    trends = {}
+    for window in settings.windows:
+        rolling = values.rolling(window, min_periods=get_min_periods(window))
+        trends[f"mean_{window}"] = rolling.mean()
+        trends[f"median_{window}"] = rolling.median()
+        trends[f"low_{window}"] = rolling.quantile(settings.band[0] / 100)
+        trends[f"high_{window}"] = rolling.quantile(settings.band[1] / 100)
+    return pd.DataFrame(trends)
+
+
+def time_metrics(
+    fn: Callable[[pd.Series, TrendSettings], pd.DataFrame],
+    metrics: list[pd.Series],
+    settings: TrendSettings,
+) -> float:
+    return min(timeit.repeat(lambda: [fn(values, settings) for values in metrics], number=1, repeat=REPEAT))
+
+
+def main() -> None:
+    settings = TrendSettings()
+    rng = np.random.default_rng(0)
+
+    print(f"{METRICS} metrics, windows {', '.join(map(str, settings.windows))} days")
+    print(f"{'years':>6}{'days':>8}{'pandas (s)':>12}{'trends (s)':>12}")
+    for years in YEARS:
+        days = 365 * years
+        metrics = [pd.Series(rng.gamma(2, 3, days)) for _ in range(METRICS)]
+        for values in metrics:
+            values[rng.random(days) < 0.05] = np.nan
+
+        pd.testing.assert_frame_equal(compute_trends(metrics[0], settings), pandas_trends(metrics[0], settings))
+        pandas_time = time_metrics(pandas_trends, metrics, settings)
+        trends_time = time_metrics(compute_trends, metrics, settings)
+        print(f"{years:>6}{days:>8}{pandas_time:>12.3f}{trends_time:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Usage: python -m benchmarks.bench_window config/config_zyw.toml
+#
+# On synthetic Glow exports of five years, times loading every input table from a
+# warm cache and parsing the daily statistics, for the whole log and for its last
+# 30 days as with --since.
+
+import functools
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+from agenoria.stats import parse_glow_diaper_data, parse_glow_feeding_data, parse_glow_sleep_data, parse_hatch_data
+from config import SOURCES, activate, load_source, set_date_window, sources
+from config import param as config
+from config.cache import clear_cache
+
+from .synthetic import write_config, write_glow_export
+
+YEARS = 5
+WINDOW_DAYS = 30
+REPEAT = 5
+
+# Input table -> parser of its chart
+PARSERS: dict[str, Callable[[pd.DataFrame], object]] = {
+    "diaper_data": parse_glow_diaper_data,
+    "sleep_data": parse_glow_sleep_data,
+    "feeding_bottle_data": functools.partial(parse_glow_feeding_data, key_amount="Amount(ml)"),
+    "hatch_data": parse_hatch_data,
+}
+
+
+def best_time(fn: Callable[[], object]) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def measure(name: str) -> tuple[int, float, float]:
+    # Rows, seconds to load from the cache and seconds to parse
+    load_time = best_time(lambda: load_source(name))
+    data = load_source(name)
+    parse = PARSERS.get(name)
+    parse_time = best_time(lambda: parse(data)) if parse is not None else 0.0
+    return len(data), load_time, parse_time
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_paths = write_glow_export(Path(tmp_dir) / "data", 365 * YEARS)
+        activate(write_config(Path(tmp_dir) / "config.toml", input_paths, Path(tmp_dir) / "build"))
+
+        cache_dir = Path(tmp_dir) / "cache"
+        config["cache"] = {"enabled": True, "directory": str(cache_dir)}
+
+        # Warm the cache with every row
+        sources.prefetch(list(SOURCES))
+        last_day = max(sources.get(name)["Date"].max() for name in SOURCES)
+        since = last_day - pd.Timedelta(days=WINDOW_DAYS - 1)
+
+        set_date_window(None, None)
+        full = {name: measure(name) for name in SOURCES}
+        set_date_window(since, None)
+        window = {name: measure(name) for name in SOURCES}
+        set_date_window(None, None)
+        clear_cache(cache_dir)
+
+    print(f"{YEARS} years of synthetic exports against the last {WINDOW_DAYS} days, from a warm cache")
+    print(
+        f"{'table':<22}{'rows':>8}{'load (s)':>10}{'parse (s)':>11}"
+        f"{'window rows':>13}{'load (s)':>10}{'parse (s)':>11}",
+    )
+    for name in SOURCES:
+        rows, load_time, parse_time = full[name]
+        window_rows, window_load, window_parse = window[name]
+        print(
+            f"{name:<22}{rows:>8}{load_time:>10.4f}{parse_time:>11.4f}"
+            f"{window_rows:>13}{window_load:>10.4f}{window_parse:>11.4f}",
+        )
+
+    totals = [sum(times[index] for times in results.values()) for results in (full, window) for index in (1, 2)]
+    print(f"{'total':<22}{'':>8}{totals[0]:>10.4f}{totals[1]:>11.4f}{'':>13}{totals[2]:>10.4f}{totals[3]:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
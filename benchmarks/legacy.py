@@ -0,0 +1,367 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Reference loop implementations of the daily statistics parsers and renderers, as
+# they were before vectorization. Used by the equivalence tests and benchmarks.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+from agenoria.parse_config import get_daytime_index, get_nighttime_index
+from agenoria.plot_24h_viz import BAR_SIZE
+from config import param as config
+
+SLEEP_THRESHOLD = 0.0333333  # two minutes -> hours
+
+
+def legacy_parse_glow_feeding_data(
+    data: pd.DataFrame,
+    key_amount: str,
+) -> pd.DataFrame:
+    # Find first and last entry in column
+    start_date = data["Date"].iloc[-1]
+    end_date = data["Date"].iloc[0]
+
+    if config["debug"]["debug_mode"]:
+        start_date = config["debug"]["debug_start_date"]
+        end_date = config["debug"]["debug_end_date"]
+
+    # Final data
+    feeding_data_list = []
+    data_sorted = data.sort_values(["Time of feeding"], ascending=True)
+    grouped_by_day = {
+        current_day: current_rows for current_day, current_rows in data_sorted.groupby("Date", sort=False)
+    }
+
+    for current_date in pd.date_range(start_date, end_date):
+        rows_on_date = grouped_by_day.get(current_date)
+        if rows_on_date is None or rows_on_date.empty:
+            feeding_data_list.append(
+                [
+                    current_date,
+                    0.0,
+                    float("nan"),
+                    float("nan"),
+                    float("nan"),
+                    0,
+                    float("nan"),
+                    float("nan"),
+                    float("nan"),
+                    0.0,
+                    0.0,
+                    0,
+                ],
+            )
+            continue
+
+        # Compute statistics
+        sum_on_date = rows_on_date[key_amount].sum()
+        mean_on_date = rows_on_date[key_amount].mean()
+        max_on_date = rows_on_date[key_amount].max()
+        min_on_date = rows_on_date[key_amount].min()
+        sessions_on_date = rows_on_date[key_amount].count()
+
+        # Daytime feedings
+        daytime_index = get_daytime_index(rows_on_date["Time of feeding"])
+        daytime_feeding = rows_on_date[daytime_index]
+        daytime_sum = daytime_feeding[key_amount].sum()
+
+        # Daytime time between feedings
+        time_between_feeding = daytime_feeding["Time of feeding"].diff()
+        min2hour = np.timedelta64(1, "h")
+        time_between_feeding_max = time_between_feeding.max() / min2hour
+        time_between_feeding_mean = time_between_feeding.mean() / min2hour
+        time_between_feeding_min = time_between_feeding.min() / min2hour
+
+        # Nighttime feeding
+        nighttime_index = get_nighttime_index(rows_on_date["Time of feeding"])
+        nighttime_feeding = rows_on_date[nighttime_index]
+        nighttime_sum = nighttime_feeding[key_amount].sum()
+        nighttime_feeding_count = len(nighttime_feeding)
+
+        # Put stats in a list
+        feeding_data_list.append(
+            [
+                current_date,
+                sum_on_date,
+                mean_on_date,
+                min_on_date,
+                max_on_date,
+                sessions_on_date,
+                time_between_feeding_max,
+                time_between_feeding_mean,
+                time_between_feeding_min,
+                daytime_sum,
+                nighttime_sum,
+                nighttime_feeding_count,
+            ],
+        )
+
+    # Convert list to dataframe
+    return pd.DataFrame(
+        feeding_data_list,
+        columns=[
+            "date",
+            "sum",
+            "mean",
+            "min",
+            "max",
+            "sessions",
+            "time gap max",
+            "time gap mean",
+            "time gap min",
+            "daytime sum",
+            "nighttime sum",
+            "nighttime count",
+        ],
+    )
+
+
+def legacy_parse_glow_sleep_data(data_sleep: pd.DataFrame) -> pd.DataFrame:
+    data_sleep = data_sleep.copy()
+
+    # Find first and last entry in column
+    start_date = data_sleep["Date"].iloc[-1]
+    end_date = data_sleep["Date"].iloc[0]
+
+    if config["debug"]["debug_mode"]:
+        start_date = config["debug"]["debug_start_date"]
+        end_date = config["debug"]["debug_end_date"]
+
+    sleep_data_list = []
+    offset = 0
+
+    # For some reason raw sleep data is not sorted by time
+    data_sleep = data_sleep.sort_values(["Begin time"], ascending=False)
+
+    # Get duration for each row, then convert to hours
+    data_sleep["duration"] = data_sleep["End time"] - data_sleep["Begin time"]
+    data_sleep["duration"] = data_sleep["duration"] / np.timedelta64(1, "h")
+
+    # Find the index of session that extend into the next day
+    index = data_sleep["End time"].dt.normalize() > data_sleep["Date"]
+
+    # Compute the offset duration to be plotted the next day
+    sleep_offset = data_sleep.loc[index, "End time"]
+    data_sleep.loc[index, "offset"] = sleep_offset.dt.hour + sleep_offset.dt.minute / 60
+
+    grouped_by_day = {current_day: current_rows for current_day, current_rows in data_sleep.groupby("Date", sort=False)}
+    empty_rows = data_sleep.iloc[0:0]
+
+    for current_date in pd.date_range(start_date, end_date):
+        rows_on_date = grouped_by_day.get(current_date, empty_rows)
+
+        # Remove all sleep sessions less than two minutes
+        filtered = rows_on_date[rows_on_date["duration"] > SLEEP_THRESHOLD]
+
+        # Get total sleep duration
+        total_sleep_duration = filtered["duration"].sum()
+
+        # Add offset from previous day
+        total_sleep_duration += offset
+
+        # Catch session that extend past midnight, subtract from duration
+        offset = rows_on_date["offset"].sum()
+        total_sleep_duration -= offset
+
+        # Longest session
+        longest_session = rows_on_date["duration"].max()
+
+        # Compute longest awake time - begin (current time) -  end (next row)
+        end_time_shifted = filtered["End time"].shift(-1)
+        awake_duration = filtered["Begin time"] - end_time_shifted
+        max_awake_duration = awake_duration.max() / np.timedelta64(1, "h")
+
+        # Remove session that extends into other days
+        filtered2 = filtered[filtered["End time"].dt.normalize() == current_date]
+
+        # Nap sessions must begin and end within the defined window
+        nap_index1 = get_daytime_index(filtered2["Begin time"])
+        nap_index2 = get_daytime_index(filtered2["End time"])
+        nap_rows = filtered2[nap_index1 & nap_index2]
+
+        # Compute stats on nap sessions
+        nap_sessions_on_date = len(nap_rows.index)
+        nap_duration_on_date = nap_rows["duration"].sum()
+
+        # Total nighttime duration
+        nighttime_duration = total_sleep_duration - nap_duration_on_date
+
+        # Put stats in a list
+        sleep_data_list.append(
+            [
+                current_date,
+                nap_sessions_on_date,
+                total_sleep_duration,
+                nap_duration_on_date,
+                nighttime_duration,
+                longest_session,
+                max_awake_duration,
+            ],
+        )
+
+    # Convert list to dataframe
+    return pd.DataFrame(
+        sleep_data_list,
+        columns=[
+            "date",
+            "total_naps",
+            "total_sleep_duration",
+            "total_nap_duration",
+            "total_nighttime_duration",
+            "longest_session",
+            "max_awake_duration",
+        ],
+    )
+
+
+def legacy_parse_glow_diaper_data(data_diaper: pd.DataFrame) -> pd.DataFrame:
+    # Find first and last entry in column
+    start_date = data_diaper["Date"].iloc[-1]
+    end_date = data_diaper["Date"].iloc[0]
+
+    if config["debug"]["debug_mode"]:
+        start_date = config["debug"]["debug_start_date"]
+        end_date = config["debug"]["debug_end_date"]
+
+    # Final data
+    diaper_data_list = []
+    cumulative_diaper_count = 0
+
+    grouped_by_day = {
+        current_day: current_rows for current_day, current_rows in data_diaper.groupby("Date", sort=False)
+    }
+
+    # Diaper
+    for current_date in pd.date_range(start_date, end_date):
+        rows_on_date = grouped_by_day.get(current_date)
+        if rows_on_date is None or rows_on_date.empty:
+            diaper_data_list.append(
+                [
+                    current_date,
+                    0,
+                    cumulative_diaper_count,
+                    0,
+                    0,
+                    float("nan"),
+                    float("nan"),
+                ],
+            )
+            continue
+
+        # Compute total diaper count
+        daily_total_diaper_count = int(rows_on_date["In the diaper"].count())
+        cumulative_diaper_count += daily_total_diaper_count
+
+        # Separate pees and poops
+        diaper_counts = rows_on_date["In the diaper"].value_counts()
+        total_pee_count = int(
+            diaper_counts.get("pee", 0) + diaper_counts.get("pee and poo", 0),
+        )
+        total_poop_count = int(
+            diaper_counts.get("poo", 0) + diaper_counts.get("pee and poo", 0),
+        )
+
+        # Compute poop to total diaper change ratio
+        poop_ratio = (total_poop_count / daily_total_diaper_count) * 100
+
+        # Compute diaper day duration
+        diaper_final = rows_on_date["Diaper time"].iloc[0]
+        diaper_first = rows_on_date["Diaper time"].iloc[-1]
+        diaper_day_duration = (diaper_final - diaper_first).total_seconds() / 3600
+
+        # Compute average time between diaper changes
+        diaper_change_time_avg = diaper_day_duration / daily_total_diaper_count
+
+        # Put stats in a list
+        diaper_data_list.append(
+            [
+                current_date,
+                daily_total_diaper_count,
+                cumulative_diaper_count,
+                total_pee_count,
+                total_poop_count,
+                poop_ratio,
+                diaper_change_time_avg,
+            ],
+        )
+
+    # Convert list to dataframe
+    return pd.DataFrame(
+        diaper_data_list,
+        columns=[
+            "date",
+            "daily_total_diaper_count",
+            "cumulative_diaper_count",
+            "pee_count",
+            "poop_count",
+            "poop_ratio",
+            "diaper_change_time_avg",
+        ],
+    )
+
+
+def legacy_parse_raw_data(data: pd.DataFrame, timestamp_column: str) -> pd.DataFrame:
+    # Copy of the input table with the day number and decimal hour of every row
+    parsed = data.copy()
+    start_date = parsed["Date"].iloc[-1]
+    parsed["timestamp_hour"] = parsed[timestamp_column].dt.hour + parsed[timestamp_column].dt.minute / 60
+    parsed["day_number"] = (parsed["Date"] - start_date).dt.days + 1
+    return parsed
+
+
+def legacy_parse_sleep_sessions(data_sleep: pd.DataFrame) -> pd.DataFrame:
+    data = legacy_parse_raw_data(data_sleep, "Begin time")
+    data["end_timestamp_hour"] = data["End time"].dt.hour + data["End time"].dt.minute / 60
+    data["duration"] = data["end_timestamp_hour"] - data["timestamp_hour"]
+
+    # Sessions past midnight: cut off at midnight, the rest is an offset on the next day
+    index = data["End time"].dt.normalize() > data["Date"]
+    data["crosses_midnight"] = index
+    data.loc[index, "offset"] = data["end_timestamp_hour"]
+    data.loc[index, "duration"] = 24 - data["timestamp_hour"]
+    return data
+
+
+def legacy_draw_sleep_bars(fig_ax: Axes, data: pd.DataFrame) -> None:
+    index = data["crosses_midnight"]
+
+    # Find sessions with offsets and plot the offset with day_number+1
+    for day_number, offset in zip(
+        data.loc[index, "day_number"],
+        data.loc[index, "offset"],
+        strict=False,
+    ):
+        fig_ax.broken_barh([(day_number + 1, BAR_SIZE)], (0, offset))
+
+    # Loop through each row and plot the duration
+    for day_number, start_hour, duration in zip(
+        data["day_number"],
+        data["timestamp_hour"],
+        data["duration"],
+        strict=False,
+    ):
+        fig_ax.broken_barh([(day_number, BAR_SIZE)], (start_hour, duration))
+
+
+def legacy_export_figure(figure: Figure, output_filename: str) -> None:
+    # One format per run, laid out again by bbox_inches="tight"
+    directory_path = Path(config["output_data"]["output_directory"])
+    directory_path.mkdir(parents=True, exist_ok=True)
+
+    filename = directory_path / f'{output_filename}{config["output_format"]["format"]}'
+
+    figure.set_size_inches(
+        config["output_format"]["output_dim_x"],
+        config["output_format"]["output_dim_y"],
+    )
+    figure.savefig(filename, bbox_inches="tight")
+
+    figure.clf()
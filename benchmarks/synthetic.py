@@ -0,0 +1,357 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Synthetic input tables, shaped like the parsed frames in config, and Glow and
+# Hatch exports written from them at the rates of the bundled data.
+#
+# Usage: python -m benchmarks.synthetic OUTPUT_DIRECTORY --children 2 --years 3
+#
+# writes one directory of exports and one configuration file per child.
+
+import argparse
+import csv
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import GLOW_TIME_FORMAT, ROOT_DIR
+
+START_DATE = pd.Timestamp("2018-11-21")  # The birthday in config_zyw.toml
+# data/zyw covers about 18 months
+BUNDLED_DAYS = 548
+GLOW_EXPORT_ROWS = 5000
+SKIPPED_DAY_RATE = 0.03
+MISSING_AMOUNT_RATE = 0.01
+SHORT_SESSION_RATE = 0.05  # One-minute "put to bed" markers
+
+DIAPER_CONTENTS = ("pee", "poo", "pee and poo")
+DIAPER_CONTENT_WEIGHTS = (0.6, 0.1, 0.3)
+# Includes free-form spellings and colors outside the chart legend
+POOP_COLORS = ("yellow", "green", "brown", " Yellow", "black", "red")
+POOP_COLOR_WEIGHTS = (0.5, 0.2, 0.15, 0.05, 0.05, 0.05)
+
+
+def _random_timestamps(
+    rng: np.random.Generator,
+    days: int,
+    sessions_per_day: float,
+    *,
+    round_to_minute: bool = False,
+) -> pd.Series:
+    # Poisson number of events per day, some days left out entirely
+    counts = rng.poisson(sessions_per_day, days)
+    counts[rng.random(days) < SKIPPED_DAY_RATE] = 0
+
+    day_number = np.repeat(np.arange(days), counts)
+    seconds = rng.integers(0, 24 * 3600, day_number.size)
+    if round_to_minute:
+        seconds -= seconds % 60
+    timestamps = START_DATE + pd.to_timedelta(day_number, unit="D") + pd.to_timedelta(seconds, unit="s")
+
+    # Glow exports list the newest entries first
+    return pd.Series(np.sort(timestamps.to_numpy())[::-1])
+
+
+def make_feeding_data(
+    days: int,
+    *,
+    key_amount: str = "Amount(ml)",
+    sessions_per_day: float = 8,
+    seed: int = 0,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    feeding_time = _random_timestamps(rng, days, sessions_per_day)
+
+    amount = rng.normal(120, 30, feeding_time.size).round().clip(0)
+    amount[rng.random(amount.size) < MISSING_AMOUNT_RATE] = np.nan
+
+    return pd.DataFrame(
+        {
+            "Time of feeding": feeding_time,
+            key_amount: amount,
+            "Date": feeding_time.dt.normalize(),
+        },
+    )
+
+
+def make_sleep_data(
+    days: int,
+    *,
+    sessions_per_day: float = 6,
+    seed: int = 0,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    begin_time = _random_timestamps(rng, days, sessions_per_day, round_to_minute=True)
+
+    # Mostly naps of an hour or two, a few long sessions that cross midnight
+    minutes = rng.lognormal(np.log(90), 0.6, begin_time.size).round()
+    minutes[rng.random(minutes.size) < SHORT_SESSION_RATE] = 1
+    end_time = begin_time + pd.to_timedelta(minutes, unit="m")
+
+    return pd.DataFrame(
+        {
+            "Begin time": begin_time,
+            "End time": end_time,
+            "Date": begin_time.dt.normalize(),
+        },
+    )
+
+
+def make_diaper_data(
+    days: int,
+    *,
+    changes_per_day: float = 8,
+    seed: int = 0,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    diaper_time = _random_timestamps(rng, days, changes_per_day)
+
+    in_the_diaper = rng.choice(DIAPER_CONTENTS, diaper_time.size, p=DIAPER_CONTENT_WEIGHTS)
+    color = rng.choice(POOP_COLORS, diaper_time.size, p=POOP_COLOR_WEIGHTS).astype(object)
+    color[in_the_diaper == "pee"] = np.nan
+
+    return pd.DataFrame(
+        {
+            "Diaper time": diaper_time,
+            "In the diaper": in_the_diaper,
+            "Color": color,
+            "Date": diaper_time.dt.normalize(),
+        },
+    )
+
+
+def make_growth_data(days: int, *, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Weighed every week or two, measured about once a month
+    date = START_DATE + pd.to_timedelta(np.cumsum(rng.integers(7, 15, days // 7 + 1)), unit="D")
+    date = date[date < START_DATE + pd.Timedelta(days=days)]
+    age = (date - START_DATE).days.to_numpy()
+
+    weight = (3.5 + 8.5 * (1 - np.exp(-age / 300)) + rng.normal(0, 0.1, age.size)).round(1)
+    height = (50 + 30 * (1 - np.exp(-age / 400)) + rng.normal(0, 0.5, age.size)).round(2)
+    head = (35 + 12 * (1 - np.exp(-age / 250)) + rng.normal(0, 0.2, age.size)).round(1)
+    measured = rng.random(age.size) < 0.3
+    height[~measured] = np.nan
+    head[~measured] = np.nan
+
+    return pd.DataFrame(
+        {
+            "Date": date,
+            "Weight(kg)": weight,
+            "Height(cm)": height,
+            "Head Circ.(cm)": head,
+        },
+    )
+
+
+def make_hatch_data(days: int, *, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # A weigh-in on most days, at a random time
+    day_number = np.flatnonzero(rng.random(days) > 0.2)
+    start_time = (
+        START_DATE
+        + pd.to_timedelta(day_number, unit="D")
+        + pd.to_timedelta(
+            rng.integers(0, 24 * 60, day_number.size),
+            unit="m",
+        )
+    )
+    amount = 3.5 + 8.5 * (1 - np.exp(-day_number / 300)) + rng.normal(0, 0.05, day_number.size)
+
+    return pd.DataFrame(
+        {
+            "Start Time": start_time,
+            "Amount": amount.round(6),
+            "Percentile": rng.uniform(0.3, 0.9, day_number.size).round(6),
+        },
+    )
+
+
+def make_misc_data(days: int, *, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    date = pd.date_range(START_DATE, periods=days)
+    weekday = date.dayofweek < 5
+
+    return pd.DataFrame(
+        {
+            "Date": date,
+            "Vomit": np.where(rng.random(days) < 0.1, 1, np.nan),
+            "Daycare": (weekday & (date > START_DATE + pd.Timedelta(days=180))).astype(int),
+            "Doctor": np.where(rng.random(days) < 0.02, 1, np.nan),
+        },
+    )
+
+
+def format_glow_time(timestamps: pd.Series) -> pd.Series:
+    # Glow writes the hour without its leading zero: 05/21/2020 8:05:19 AM
+    return timestamps.dt.strftime(GLOW_TIME_FORMAT).str.replace(r" 0(\d):", r" \1:", regex=True)
+
+
+def format_hatch_time(timestamps: pd.Series) -> pd.Series:
+    # Hatch writes a 24-hour clock followed by AM/PM: 10/08/2018 22:50 PM
+    return timestamps.dt.strftime("%m/%d/%Y %H:%M %p")
+
+
+def write_glow_export(directory: Path, days: int, *, seed: int = 0) -> dict[str, Path]:
+    """Write Glow and Hatch exports covering days days after START_DATE.
+
+    Returns the path of each file by [input_data] key. The files are single
+    exports, see split_export() for multi-part ones.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {
+        "data_diaper": directory / "glow_diaper.csv",
+        "data_feed_bottle": directory / "glow_feed_bottle.csv",
+        "data_feed_solid": directory / "glow_feed_solid.csv",
+        "data_growth": directory / "glow_growth.csv",
+        "data_misc": directory / "misc.csv",
+        "data_sleep": directory / "glow_sleep.csv",
+        "data_weight": directory / "hatch.csv",
+    }
+
+    diaper = make_diaper_data(days, changes_per_day=6, seed=seed)
+    texture = np.where(diaper["In the diaper"] == "pee", "", "Solid")
+    pd.DataFrame(
+        {
+            "Diaper time": format_glow_time(diaper["Diaper time"]),
+            "In the diaper": diaper["In the diaper"],
+            "Color": diaper["Color"],
+            "Texture": texture,
+        },
+    ).to_csv(paths["data_diaper"], index=False)
+
+    bottle = make_feeding_data(days, sessions_per_day=5.3, seed=seed + 1)
+    pd.DataFrame(
+        {
+            "Time of feeding": format_glow_time(bottle["Time of feeding"]),
+            "Milk type": "Breast milk",
+            "Amount(ml)": bottle["Amount(ml)"],
+            "Amount(oz)": (bottle["Amount(ml)"] / 29.5735).round(4),
+        },
+    ).to_csv(paths["data_feed_bottle"], index=False)
+
+    solid = make_feeding_data(days, key_amount="Amount", sessions_per_day=2, seed=seed + 2)
+    pd.DataFrame(
+        {
+            "Time of feeding": format_glow_time(solid["Time of feeding"]),
+            "Ingredients": "Oatmeal",
+            "Amount": (solid["Amount"] / 2).round(),
+            "Unit type": "g",
+            "Baby's reaction": "Like it!",
+        },
+    ).to_csv(paths["data_feed_solid"], index=False)
+
+    growth = make_growth_data(days, seed=seed)
+    pd.DataFrame(
+        {
+            "Date": growth["Date"].dt.strftime("%Y/%m/%d"),
+            "Weight(kg)": growth["Weight(kg)"],
+            "Weight(lb)": (growth["Weight(kg)"] * 2.20462).round(4),
+            "Height(cm)": growth["Height(cm)"],
+            "Height(in)": (growth["Height(cm)"] / 2.54).round(4),
+            "Head Circ.(cm)": growth["Head Circ.(cm)"],
+            "Head Circ.(in)": (growth["Head Circ.(cm)"] / 2.54).round(4),
+        },
+    ).iloc[::-1].to_csv(paths["data_growth"], index=False)
+
+    misc = make_misc_data(days, seed=seed)
+    misc.assign(Date=misc["Date"].dt.strftime("%m/%d/%Y")).to_csv(paths["data_misc"], index=False)
+
+    # Sleep sessions keep their midnight-crossing end times
+    sleep = make_sleep_data(days, sessions_per_day=9.4, seed=seed + 3)
+    pd.DataFrame(
+        {
+            "Begin time": format_glow_time(sleep["Begin time"]),
+            "End time": format_glow_time(sleep["End time"]),
+        },
+    ).to_csv(paths["data_sleep"], index=False)
+
+    hatch = make_hatch_data(days, seed=seed)
+    hatch_time = format_hatch_time(hatch["Start Time"])
+    pd.DataFrame(
+        {
+            "Baby Name": "Agenoria",
+            "Start Time": hatch_time,
+            "End Time": hatch_time,
+            "Activity": "Weight",
+            "Amount": hatch["Amount"],
+            "Percentile": hatch["Percentile"],
+            "Duration": "",
+            "Info": "",
+            "Notes": "",
+            "": "",
+        },
+    ).to_csv(paths["data_weight"], index=False, quoting=csv.QUOTE_ALL)
+
+    return paths
+
+
+def split_export(source_path: Path, directory: Path, *, rows: int = GLOW_EXPORT_ROWS, overlap: int = 0) -> list[Path]:
+    """Split an export into parts of at most rows rows, as Glow exports them.
+
+    Each part repeats the last overlap rows of the previous one, like exports
+    taken at different times.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    data = pd.read_csv(source_path, dtype=str, keep_default_na=False)
+
+    paths = []
+    for index, start in enumerate(range(0, len(data), rows - overlap)):
+        part_path = directory / f"{source_path.stem}-{index:03d}.csv"
+        data.iloc[start : start + rows].to_csv(part_path, index=False)
+        paths.append(part_path)
+        if start + rows >= len(data):
+            break
+    return paths
+
+
+def write_config(
+    config_path: Path,
+    input_paths: dict[str, Path],
+    output_directory: Path,
+    charts: tuple[str, ...] | None = None,
+) -> Path:
+    # config_zyw.toml with the inputs, outputs and cache swapped out, and only the
+    # build_* charts named in charts enabled if given
+    text = (ROOT_DIR / "config/config_zyw.toml").read_text()
+    if charts is not None:
+        text = re.sub(
+            r"^(build_\w+) = true$",
+            lambda match: f"{match[1]} = {str(match[1] in charts).lower()}",
+            text,
+            flags=re.M,
+        )
+    for config_key, input_path in input_paths.items():
+        text = re.sub(rf"^{config_key} = .*$", f"{config_key} = {json.dumps(str(input_path))}", text, flags=re.M)
+    text = re.sub(
+        r"^output_directory = .*$", f"output_directory = {json.dumps(str(output_directory))}", text, flags=re.M
+    )
+    text = text.replace('directory = ".cache"', f"directory = {json.dumps(str(output_directory / '.cache'))}")
+
+    config_path.write_text(text)
+    return config_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic Glow and Hatch exports.")
+    parser.add_argument("output_directory", type=Path)
+    parser.add_argument("--children", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for child in range(args.children):
+        child_directory = args.output_directory / f"child{child}"
+        input_paths = write_glow_export(child_directory / "data", round(365 * args.years), seed=args.seed + child)
+        config_path = write_config(args.output_directory / f"child{child}.toml", input_paths, child_directory / "build")
+        print(config_path)
+
+
+if __name__ == "__main__":
+    main()
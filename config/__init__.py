@@ -4,8 +4,11 @@
 # Please see the LICENSE file that should have been included as part of
 # this package.
 
+import datetime
+import functools
 import sys
 import warnings
+from collections.abc import Callable
 from pathlib import Path
 
 import pandas as pd
@@ -15,21 +18,46 @@ try:
 except ModuleNotFoundError:  # pragma: no cover - Python < 3.11
     import tomli as tomllib
 
+from .cache import Filters, filter_frame, load_cached
+from .events import EventStore
+from .ingest import DEFAULT_CHUNK_ROWS, get_input_parts, is_multi_part, read_parts
+from .schema import (
+    DIAPER,
+    FEEDING_BOTTLE,
+    FEEDING_SOLID,
+    GLOW_TIME_FORMAT,
+    GROWTH,
+    HATCH,
+    MISC,
+    SLEEP,
+    Schema,
+    parse_timestamps,
+)
+from .sources import DataSources
+from .timing import stage
+
 ROOT_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_CONFIG_PATH = ROOT_DIR / "config/config_zyw.toml"
 
+# First and last day to load, both inclusive, None for no bound
+DateWindow = tuple[pd.Timestamp | None, pd.Timestamp | None]
+
+
+def get_config_paths(arguments: list[str]) -> list[Path]:
+    # Every TOML path among the arguments, in order and without repeats. Options
+    # such as --jobs may come first, so do not rely on positions.
+    paths = [_resolve_data_path(argument) for argument in arguments if Path(argument).suffix == ".toml"]
+    return list(dict.fromkeys(paths))
+
 
 def _resolve_config_path() -> Path:
     if "pytest" in sys.argv[0]:
         return DEFAULT_CONFIG_PATH
 
-    # Parse command line argument for TOML configuration file.
-    # Pytest and other runners pass flags as argv[1], so only treat argv[1]
-    # as config when it is a TOML path.
-    if len(sys.argv) > 1:
-        candidate = Path(sys.argv[1])
-        if candidate.suffix == ".toml":
-            return candidate if candidate.is_absolute() else ROOT_DIR / candidate
+    # Parse command line arguments for TOML configuration files, start with the first
+    config_paths = get_config_paths(sys.argv[1:])
+    if config_paths:
+        return config_paths[0]
 
     warnings.warn(
         "No configuration file supplied. Using config_zyw.toml...",
@@ -38,74 +66,227 @@ def _resolve_config_path() -> Path:
     return DEFAULT_CONFIG_PATH
 
 
+def _read_config(config_path: Path) -> dict:
+    with config_path.open(mode="rb") as fp:
+        return tomllib.load(fp)
+
+
+def _load_param(config_path: Path) -> dict:
+    new_param = _read_config(config_path)
+    if new_param.get("output_format", {}).get("plotly_on"):
+        warnings.warn(
+            f"{config_path.name}: plotly_on in [output_format] is no longer supported and is ignored. "
+            'Add ".html" or ".json" to format for interactive copies of the charts.',
+            stacklevel=3,
+        )
+    return new_param
+
+
 def _resolve_data_path(configured_path: str) -> Path:
     path = Path(configured_path)
     return path if path.is_absolute() else ROOT_DIR / path
 
 
-def _read_input_csv(config_key: str, **kwargs: object) -> pd.DataFrame:
-    return pd.read_csv(_resolve_data_path(param["input_data"][config_key]), **kwargs)
+def _read_input(source_path: Path, schema: Schema) -> pd.DataFrame:
+    # A directory or glob of export parts is merged and deduplicated, a file is read as is
+    if is_multi_part(source_path):
+        chunk_rows = param.get("runtime", {}).get("ingest_chunk_rows", DEFAULT_CHUNK_ROWS)
+        return read_parts(get_input_parts(source_path), schema, chunk_rows)
+
+    # Check the header before parsing the whole file, then read the needed columns only
+    schema.validate(pd.read_csv(source_path, nrows=0).columns, source_path)
+    columns = schema.get_columns()
+    data = pd.read_csv(source_path, usecols=lambda column: column in columns, dtype=schema.get_dtypes())
+    return schema.apply(data)
+
+
+def _load_diaper_data(source_path: Path) -> pd.DataFrame:
+    diaper_data = _read_input(source_path, DIAPER)
+
+    # Sort by date and time
+    diaper_data = diaper_data.sort_values(by=["Diaper time"], ascending=False)
+    # Make a new column with date component only
+    diaper_data["Date"] = diaper_data["Diaper time"].dt.normalize()
+
+    return diaper_data
+
+
+def _load_sleep_data(source_path: Path) -> pd.DataFrame:
+    sleep_data = _read_input(source_path, SLEEP)
+
+    # Make a new column with date component only
+    sleep_data["Date"] = sleep_data["Begin time"].dt.normalize()
+
+    return sleep_data
+
+
+def _load_feeding_data(source_path: Path, schema: Schema) -> pd.DataFrame:
+    feeding_data = _read_input(source_path, schema)
+
+    # Make a new column with date component only
+    feeding_data["Date"] = feeding_data["Time of feeding"].dt.normalize()
+
+    return feeding_data
+
+
+def _load_feeding_bottle_data(source_path: Path) -> pd.DataFrame:
+    return _load_feeding_data(source_path, FEEDING_BOTTLE)
+
+
+def _load_feeding_solid_data(source_path: Path) -> pd.DataFrame:
+    return _load_feeding_data(source_path, FEEDING_SOLID)
+
+
+def _load_growth_data(source_path: Path) -> pd.DataFrame:
+    return _read_input(source_path, GROWTH)
+
+
+def _load_hatch_data(source_path: Path) -> pd.DataFrame:
+    hatch_data = _read_input(source_path, HATCH)
+
+    # Make a new column with date component only. Hatch invalid format: redundant AM/PM
+    hatch_data["Date"] = parse_timestamps(hatch_data["Start Time"].str[0:10], "%m/%d/%Y")
+
+    return hatch_data
+
+
+def _load_misc_data(source_path: Path) -> pd.DataFrame:
+    misc_data = _read_input(source_path, MISC)
+    return misc_data.fillna(0).set_index(misc_data["Date"])
+
+
+# Parsed input tables: name -> (input_data key, loader)
+SOURCES: dict[str, tuple[str, Callable[[Path], pd.DataFrame]]] = {
+    "diaper_data": ("data_diaper", _load_diaper_data),
+    "sleep_data": ("data_sleep", _load_sleep_data),
+    "feeding_bottle_data": ("data_feed_bottle", _load_feeding_bottle_data),
+    "feeding_solid_data": ("data_feed_solid", _load_feeding_solid_data),
+    "growth_data": ("data_growth", _load_growth_data),
+    "hatch_data": ("data_weight", _load_hatch_data),
+    "misc_data": ("data_misc", _load_misc_data),
+}
+
+
+def get_cache_directory() -> Path | None:
+    cache_param = param.get("cache", {})
+    if not cache_param.get("enabled", True):
+        return None
+    return _resolve_data_path(cache_param.get("directory", ".cache"))
+
+
+def set_date_window(since: datetime.date | None, until: datetime.date | None) -> None:
+    """Load only the rows dated from since to until, e.g. from --since and --until.
+
+    The window outlives activate(), it applies to every configuration of the run.
+    The input tables already loaded are dropped, unless the window is unchanged.
+    """
+    global _date_window
+
+    date_window = (
+        None if since is None else pd.Timestamp(since).normalize(),
+        None if until is None else pd.Timestamp(until).normalize(),
+    )
+    if date_window != _date_window:
+        _date_window = date_window
+        sources.reset()
+
+
+def get_date_window() -> DateWindow:
+    # The window set for the run, or the debug dates in debug mode
+    if _date_window != (None, None):
+        return _date_window
+
+    debug_param = param.get("debug", {})
+    if debug_param.get("debug_mode", False):
+        return pd.Timestamp(debug_param["debug_start_date"]), pd.Timestamp(debug_param["debug_end_date"])
+    return None, None
+
+
+def get_window_filters() -> Filters | None:
+    # The date window as filters on the Date column every loader adds
+    since, until = get_date_window()
+    filters = []
+    if since is not None:
+        filters.append(("Date", ">=", since))
+    if until is not None:
+        filters.append(("Date", "<=", until))
+    return filters or None
+
+
+def get_input_path(config_key: str) -> Path:
+    # Path of an [input_data] entry, relative paths are from the repository root.
+    # It may also be a directory or a glob of export parts, see get_input_parts().
+    return _resolve_data_path(param["input_data"][config_key])
+
+
+def get_source_path(name: str) -> Path:
+    config_key, _ = SOURCES[name]
+    return get_input_path(config_key)
+
+
+def read_source_paths(config_path: Path) -> dict[str, Path]:
+    # Input path of every table of a configuration file, whether or not it is active
+    input_data = _read_config(config_path).get("input_data", {})
+    return {
+        name: _resolve_data_path(input_data[config_key])
+        for name, (config_key, _) in SOURCES.items()
+        if config_key in input_data
+    }
+
+
+@stage("load")
+def load_source(name: str) -> pd.DataFrame:
+    """Parse an input table, only the rows of the date window if one is set.
+
+    From the cache, rows outside the window are skipped while reading the Parquet
+    copy, otherwise they are dropped once the CSV is parsed.
+    """
+    _, loader = SOURCES[name]
+    source_path = get_source_path(name)
+    filters = get_window_filters()
+
+    cache_dir = get_cache_directory()
+    if cache_dir is None:
+        data = loader(source_path)
+        return data if filters is None else filter_frame(data, filters)
+    return load_cached(source_path, loader, cache_dir, filters)
 
 
 path = _resolve_config_path()
 
 # Import configuration
-with path.open(mode="rb") as fp:
-    param = tomllib.load(fp)
-
-# Import diaper data
-diaper_data = _read_input_csv("data_diaper")
-diaper_data["Diaper time"] = pd.to_datetime(
-    diaper_data["Diaper time"],
-    format="%m/%d/%Y %I:%M:%S %p",
-)
+param = _load_param(path)
 
-# Sort by date and time
-diaper_data = diaper_data.sort_values(by=["Diaper time"], ascending=False)
-# Make a new column with date component only
-diaper_data["Date"] = diaper_data["Diaper time"].dt.normalize()
+_date_window: DateWindow = (None, None)
 
-# Import sleep data
-sleep_data = _read_input_csv("data_sleep")
-sleep_data["Begin time"] = pd.to_datetime(
-    sleep_data["Begin time"],
-    format="%m/%d/%Y %I:%M:%S %p",
-)
-sleep_data["End time"] = pd.to_datetime(
-    sleep_data["End time"],
-    format="%m/%d/%Y %I:%M:%S %p",
-)
+# Input data, parsed on first access
+sources = DataSources({name: functools.partial(load_source, name) for name in SOURCES})
 
-# Make a new column with date component only
-sleep_data["Date"] = sleep_data["Begin time"].dt.normalize()
+# The same records as typed events per kind, see config.events
+events = EventStore(sources)
 
-# Import bottle data
-feeding_bottle_data = _read_input_csv("data_feed_bottle")
-feeding_bottle_data["Time of feeding"] = pd.to_datetime(
-    feeding_bottle_data["Time of feeding"],
-    format="%m/%d/%Y %I:%M:%S %p",
-)
 
-# Make a new column with date component only
-feeding_bottle_data["Date"] = feeding_bottle_data["Time of feeding"].dt.normalize()
+def get_config_path() -> Path:
+    return path
 
-# Import solid data
-feeding_solid_data = _read_input_csv("data_feed_solid")
-feeding_solid_data["Time of feeding"] = pd.to_datetime(
-    feeding_solid_data["Time of feeding"],
-    format="%m/%d/%Y %I:%M:%S %p",
-)
 
-# Make a new column with date component only
-feeding_solid_data["Date"] = feeding_solid_data["Time of feeding"].dt.normalize()
+def activate(config_path: Path) -> None:
+    """Switch the process to another configuration file.
+
+    param is updated in place, so modules holding "from config import param" see
+    the new values. The input tables of the previous configuration are dropped.
+    """
+    global path
 
-# Import growth data
-growth_data = _read_input_csv("data_growth")
-growth_data["Date"] = pd.to_datetime(growth_data["Date"], format="%Y/%m/%d")
+    new_param = _load_param(config_path)
+    param.clear()
+    param.update(new_param)
+    path = config_path
+    sources.reset()
 
-hatch_data = _read_input_csv("data_weight")
 
-# Import misc data
-misc_data = _read_input_csv("data_misc", parse_dates=["Date"])
-misc_data["Date"] = pd.to_datetime(misc_data["Date"], format="%m/%d/%Y")
-misc_data = misc_data.fillna(0).set_index(misc_data["Date"])
+def __getattr__(name: str) -> pd.DataFrame:
+    # Keep "from config import diaper_data" working without loading every table at import
+    if name in SOURCES:
+        return sources.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,187 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import hashlib
+import json
+import os
+import threading
+import warnings
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .ingest import get_input_parts
+
+# Bump whenever a loader changes the shape or dtypes of its parsed frame
+CACHE_VERSION = 4
+
+HASH_BLOCK_SIZE = 1 << 20
+# Rows per Parquet row group. The exports are in time order, so the date range of
+# each group is narrow and reading a date window skips the groups outside it.
+ROW_GROUP_ROWS = 2048
+
+# Parquet filters: (column, ">=" or "<=", value), all of them must hold
+Filters = list[tuple[str, str, object]]
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open(mode="rb") as fp:
+        for block in iter(lambda: fp.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_stem(path: Path, loader: Callable[[Path], pd.DataFrame]) -> str:
+    # Sources from different configs share the cache directory
+    path_hash = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:12]
+    return f"{loader.__name__.lstrip('_')}-{path_hash}"
+
+
+def read_meta(meta_path: Path) -> dict:
+    try:
+        with meta_path.open() as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_tmp_path(path: Path) -> Path:
+    # Per process and thread, workers rebuilding the same entry must not share a file
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def write_meta(meta: dict, meta_path: Path) -> None:
+    tmp_meta_path = get_tmp_path(meta_path)
+    with tmp_meta_path.open(mode="w") as fp:
+        json.dump(meta, fp, indent=2)
+    tmp_meta_path.replace(meta_path)
+
+
+def _is_valid(meta: dict, path: Path, meta_path: Path) -> bool:
+    if meta.get("version") != CACHE_VERSION or meta.get("pandas") != pd.__version__:
+        return False
+
+    # A multi-part input is only unchanged if no part was added, removed or edited
+    parts = get_input_parts(path)
+    parts_meta = meta.get("parts", [])
+    if [part_meta.get("path") for part_meta in parts_meta] != [str(part) for part in parts]:
+        return False
+
+    touched = False
+    for part_meta, part in zip(parts_meta, parts, strict=True):
+        stat = part.stat()
+        if part_meta.get("size") != stat.st_size:
+            return False
+        if part_meta.get("mtime_ns") == stat.st_mtime_ns:
+            continue
+
+        # Touched but possibly unchanged, e.g. a fresh checkout. Fall back to the content hash.
+        if part_meta.get("sha256") != file_digest(part):
+            return False
+        part_meta["mtime_ns"] = stat.st_mtime_ns
+        touched = True
+
+    # Same content, remember the new mtimes so the next run takes the fast path
+    if touched:
+        try:
+            write_meta(meta, meta_path)
+        except OSError:
+            pass
+    return True
+
+
+def filter_frame(frame: pd.DataFrame, filters: Filters) -> pd.DataFrame:
+    # The rows of an in-memory frame that pass filters, as read_parquet() would
+    keep = np.ones(len(frame), dtype=bool)
+    for column, operator, value in filters:
+        if column in frame.columns:
+            values = frame[column]
+            keep &= (values >= value if operator == ">=" else values <= value).to_numpy()
+    return frame if keep.all() else frame[keep]
+
+
+def _read_frame(data_path: Path, filters: Filters | None = None) -> pd.DataFrame:
+    if filters is not None:
+        # Tables without the filtered column are read whole
+        columns = set(pq.read_schema(data_path).names)
+        filters = [condition for condition in filters if condition[0] in columns] or None
+    frame = pd.read_parquet(data_path, filters=filters)
+
+    # Parquet round-trips missing strings as None, the CSV reader gives NaN
+    for column in frame.select_dtypes(include="object").columns:
+        frame[column] = frame[column].where(frame[column].notna(), np.nan)
+
+    return frame
+
+
+def _write_entry(frame: pd.DataFrame, path: Path, data_path: Path, meta_path: Path) -> None:
+    parts_meta = []
+    for part in get_input_parts(path):
+        stat = part.stat()
+        parts_meta.append(
+            {
+                "path": str(part),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_digest(part),
+            },
+        )
+    meta = {
+        "version": CACHE_VERSION,
+        "pandas": pd.__version__,
+        "source": str(path),
+        "parts": parts_meta,
+    }
+
+    # Write to temporary files first so an interrupted run never leaves a torn entry
+    tmp_data_path = get_tmp_path(data_path)
+    frame.to_parquet(tmp_data_path, row_group_size=ROW_GROUP_ROWS)
+    tmp_data_path.replace(data_path)
+    write_meta(meta, meta_path)
+
+
+def load_cached(
+    path: Path,
+    loader: Callable[[Path], pd.DataFrame],
+    cache_dir: Path,
+    filters: Filters | None = None,
+) -> pd.DataFrame:
+    """Return the parsed frame for path, reusing the on-disk Parquet copy when the file is unchanged.
+
+    Entries are keyed on the source file's size, mtime and SHA-256 digest, or those of every
+    part of a multi-part input. The digest is only recomputed when the size matches but the
+    mtime does not. The entry always holds every row, filters only select the rows returned.
+    """
+    stem = _entry_stem(path, loader)
+    data_path = cache_dir / f"{stem}.parquet"
+    meta_path = cache_dir / f"{stem}.json"
+
+    if data_path.exists() and _is_valid(read_meta(meta_path), path, meta_path):
+        try:
+            return _read_frame(data_path, filters)
+        except (OSError, ValueError):
+            pass  # Corrupt entry, rebuild below
+
+    frame = loader(path)
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_entry(frame, path, data_path, meta_path)
+    except OSError as error:
+        warnings.warn(f"Unable to write cache entry for {path}: {error}", stacklevel=2)
+
+    return frame if filters is None else filter_frame(frame, filters)
+
+
+def clear_cache(cache_dir: Path) -> None:
+    for entry in cache_dir.glob("*.parquet"):
+        entry.unlink()
+    for entry in cache_dir.glob("*.json"):
+        entry.unlink()
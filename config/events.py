@@ -0,0 +1,243 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Every input record as typed arrays, one block per kind of event: sleep sessions,
+# feedings, diapers, growth measurements and the misc daily entries. Each block is
+# sorted by start time and indexed by day, so the events of a day or a range of
+# days are a contiguous slice found in O(1).
+
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .sources import DataSources
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+# Integer value of NaT in a datetime64[ns] array
+MISSING_TIME = np.iinfo(np.int64).min
+
+
+@dataclass(frozen=True)
+class Events:
+    """Events of one kind, sorted by start time.
+
+    Times are int64 nanoseconds since the epoch, in the local time of the export;
+    end equals start for point events and is MISSING_TIME when unknown. unit and
+    code index into units and labels, -1 when missing. Days are counted since the
+    epoch and day_offsets[day - first_day] is the position of the first event of
+    that day.
+    """
+
+    start: np.ndarray
+    end: np.ndarray
+    amount: np.ndarray
+    unit: np.ndarray
+    code: np.ndarray
+    units: pd.Index
+    labels: pd.Index
+    first_day: int
+    day_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return self.start.size
+
+    @property
+    def last_day(self) -> int:
+        return self.first_day + self.day_offsets.size - 2
+
+    def _get_day_range(self, first_day: int, stop_day: int | None) -> tuple[int, int]:
+        # Positions in day_offsets, clipped to the days with events
+        days = self.day_offsets.size - 1
+        first = min(max(first_day - self.first_day, 0), days)
+        stop = days if stop_day is None else min(max(stop_day - self.first_day, first), days)
+        return first, stop
+
+    def get_day_slice(self, first_day: int, stop_day: int | None = None) -> slice:
+        # Positions of the events from first_day up to, not including, stop_day
+        first, stop = self._get_day_range(first_day, stop_day)
+        return slice(int(self.day_offsets[first]), int(self.day_offsets[stop]))
+
+    def select(self, first_day: int, stop_day: int | None = None) -> "Events":
+        # The events of a range of days, as views of these arrays
+        first, stop = self._get_day_range(first_day, stop_day)
+        positions = slice(int(self.day_offsets[first]), int(self.day_offsets[stop]))
+        return Events(
+            start=self.start[positions],
+            end=self.end[positions],
+            amount=self.amount[positions],
+            unit=self.unit[positions],
+            code=self.code[positions],
+            units=self.units,
+            labels=self.labels,
+            first_day=self.first_day + first,
+            day_offsets=self.day_offsets[first : stop + 1] - positions.start,
+        )
+
+    def get_days(self) -> np.ndarray:
+        return self.start // NS_PER_DAY
+
+    def get_dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.start.view("datetime64[ns]")).normalize()
+
+    def get_labels(self) -> np.ndarray:
+        # Label of every event, None where missing: code -1 picks the trailing None
+        labels = np.full(len(self.labels) + 1, None, dtype=object)
+        labels[:-1] = self.labels.to_numpy(dtype=object)
+        return labels[self.code]
+
+
+def get_day(date: str | pd.Timestamp) -> int:
+    # Day of a date since the epoch, as in Events.get_days()
+    return pd.Timestamp(date).value // NS_PER_DAY
+
+
+def get_decimal_hours(times: np.ndarray) -> np.ndarray:
+    # Hour of the day with minutes as the fraction, seconds dropped
+    return (times % NS_PER_DAY // NS_PER_MINUTE) / 60
+
+
+def _get_codes(values: pd.Series | str | None, size: int) -> tuple[np.ndarray, pd.Index]:
+    if values is None:
+        return np.full(size, -1, dtype=np.int16), pd.Index([], dtype=object)
+    if isinstance(values, str):
+        return np.zeros(size, dtype=np.int16), pd.Index([values])
+
+    categorical = values.astype("category")
+    return categorical.cat.codes.to_numpy().astype(np.int16), categorical.cat.categories
+
+
+def make_events(
+    start: pd.Series,
+    end: pd.Series | None = None,
+    amount: pd.Series | None = None,
+    unit: pd.Series | str | None = None,
+    code: pd.Series | None = None,
+) -> Events:
+    """Build the events of one kind from columns of an input table.
+
+    Rows without a start time are left out. unit is a column or one unit for every
+    row, code a column of labels such as a diaper color.
+    """
+    valid = start.notna().to_numpy()
+    start_values = start.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    order = np.argsort(start_values[valid], kind="stable")
+    rows = np.flatnonzero(valid)[order]
+
+    start_values = start_values[rows]
+    end_values = start_values if end is None else end.to_numpy(dtype="datetime64[ns]").view(np.int64)[rows]
+    amount_values = np.full(rows.size, np.nan) if amount is None else amount.to_numpy(dtype=np.float64)[rows]
+    unit_codes, units = _get_codes(unit, valid.size)
+    label_codes, labels = _get_codes(code, valid.size)
+
+    # Number of events before each day, from the first day to one past the last
+    days = start_values // NS_PER_DAY
+    first_day = int(days[0]) if days.size else 0
+    counts = np.bincount(days - first_day) if days.size else np.zeros(0, dtype=np.int64)
+    day_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    return Events(
+        start=start_values,
+        end=end_values,
+        amount=amount_values,
+        unit=unit_codes[rows],
+        code=label_codes[rows],
+        units=units,
+        labels=labels,
+        first_day=first_day,
+        day_offsets=day_offsets,
+    )
+
+
+def get_sleep_events(data: pd.DataFrame) -> Events:
+    return make_events(data["Begin time"], end=data["End time"])
+
+
+def get_bottle_events(data: pd.DataFrame) -> Events:
+    return make_events(data["Time of feeding"], amount=data["Amount(ml)"], unit="ml", code=data.get("Milk type"))
+
+
+def get_solid_events(data: pd.DataFrame) -> Events:
+    # Unit type and Ingredients are optional columns of the export
+    return make_events(
+        data["Time of feeding"],
+        amount=data["Amount"],
+        unit=data.get("Unit type"),
+        code=data.get("Ingredients"),
+    )
+
+
+def get_diaper_events(data: pd.DataFrame) -> Events:
+    # Labelled by color, missing for a pee only
+    return make_events(data["Diaper time"], code=data["Color"])
+
+
+def get_measure_events(column: str, unit: str) -> Callable[[pd.DataFrame], Events]:
+    # Days on which the measure was taken
+    def get_events(data: pd.DataFrame) -> Events:
+        measured = data[data[column].notna()]
+        return make_events(measured["Date"], amount=measured[column], unit=unit)
+
+    return get_events
+
+
+def get_misc_events(column: str) -> Callable[[pd.DataFrame], Events]:
+    # One event per logged day, the amount being the count of that day
+    def get_events(data: pd.DataFrame) -> Events:
+        return make_events(data["Date"], amount=data[column])
+
+    return get_events
+
+
+get_weight_events = get_measure_events("Weight(kg)", "kg")
+get_height_events = get_measure_events("Height(cm)", "cm")
+get_head_events = get_measure_events("Head Circ.(cm)", "cm")
+
+# Kind -> (input table, events of the table)
+KINDS: dict[str, tuple[str, Callable[[pd.DataFrame], Events]]] = {
+    "sleep": ("sleep_data", get_sleep_events),
+    "bottle": ("feeding_bottle_data", get_bottle_events),
+    "solid": ("feeding_solid_data", get_solid_events),
+    "diaper": ("diaper_data", get_diaper_events),
+    "weight": ("growth_data", get_weight_events),
+    "height": ("growth_data", get_height_events),
+    "head": ("growth_data", get_head_events),
+    "vomit": ("misc_data", get_misc_events("Vomit")),
+    "daycare": ("misc_data", get_misc_events("Daycare")),
+    "doctor": ("misc_data", get_misc_events("Doctor")),
+}
+
+
+class EventStore:
+    """Events of every kind, built from the input tables on first access.
+
+    The events of a kind are rebuilt when their table was replaced, e.g. after
+    switching to another configuration.
+    """
+
+    def __init__(self, sources: DataSources) -> None:
+        self._sources = sources
+        self._events: dict[str, tuple[pd.DataFrame, Events]] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, kind: str) -> Events:
+        if kind.startswith("_") or kind not in KINDS:
+            raise AttributeError(kind)
+        return self.get(kind)
+
+    def get(self, kind: str) -> Events:
+        source_name, get_events = KINDS[kind]
+        data = self._sources.get(source_name)
+
+        with self._lock:
+            cached = self._events.get(kind)
+            if cached is None or cached[0] is not data:
+                cached = (data, get_events(data))
+                self._events[kind] = cached
+            return cached[1]
@@ -0,0 +1,108 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Multi-part exports. Glow exports at most 5,000 rows at a time, so an [input_data]
+# entry may name a directory or a glob of export parts instead of a single CSV.
+# The parts are read in chunks and merged into one table, without the rows that
+# overlapping exports repeat.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .schema import Schema, parse_timestamps
+
+GLOB_CHARACTERS = frozenset("*?[")
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def is_multi_part(path: Path) -> bool:
+    return path.is_dir() or not GLOB_CHARACTERS.isdisjoint(str(path))
+
+
+def get_input_parts(path: Path) -> list[Path]:
+    """Return the CSV files of an input: the file itself, the CSVs in a directory or
+    the files matching a glob, in name order.
+    """
+    if not is_multi_part(path):
+        return [path]
+
+    if path.is_dir():
+        parts = sorted(path.glob("*.csv"))
+    else:
+        pattern = path.relative_to(path.anchor)
+        parts = sorted(part for part in Path(path.anchor).glob(str(pattern)) if part.is_file())
+
+    if not parts:
+        raise FileNotFoundError(f"No export parts found in {path}")
+    return parts
+
+
+def is_in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    # np.isin for a haystack already sorted: a binary search per value, no re-sort
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[positions] == values
+
+
+def read_parts(
+    parts: list[Path],
+    schema: Schema,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Merge export parts into one table, newest rows first like a single export.
+
+    A row is dropped when its parsed timestamps and the rest of its fields hash like
+    a row of an earlier part, so the same entry spelled "8:05:19 AM" and "08:05:19 AM"
+    is still caught. Rows repeated within one part are kept, as when that part is
+    read on its own. Every part must have the columns schema requires.
+
+    Only one chunk of raw text is held at a time. The rows kept so far, which make
+    up the result, are held too, with a sorted array of 8-byte hashes of the rows
+    of the earlier parts, so memory still grows with the merged table.
+    """
+    seen = np.empty(0, dtype=np.uint64)
+    chunks: list[pd.DataFrame] = []
+    columns: pd.Index | None = None
+    used_columns = schema.get_columns()
+
+    for part in parts:
+        part_hashes: list[np.ndarray] = []
+        reader = pd.read_csv(
+            part,
+            chunksize=chunk_rows,
+            usecols=lambda column: column in used_columns,
+            dtype=schema.get_dtypes(),
+        )
+        for index, chunk in enumerate(reader):
+            if index == 0:
+                schema.validate(chunk.columns, part)
+
+            # Parts of the same export share columns, possibly in another order
+            if columns is None:
+                columns = chunk.columns
+            chunk = chunk.reindex(columns=columns)
+            for column, date_format in schema.timestamps.items():
+                chunk[column] = parse_timestamps(chunk[column], date_format)
+
+            # Only rows of the earlier parts count, this part's are added once it is read
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            part_hashes.append(hashes)
+            chunks.append(chunk.loc[~is_in_sorted(hashes, seen)])
+        seen = np.unique(np.concatenate([seen, *part_hashes]))
+
+    # Parts with no rows at all still give a table with the columns schema requires
+    if not chunks:
+        return schema.apply(pd.DataFrame(columns=list(schema.required)))
+
+    data = schema.apply(pd.concat(chunks, ignore_index=True))
+
+    # Sort on the first timestamp column, stable so ties keep their export order
+    if schema.timestamps:
+        data = data.sort_values(next(iter(schema.timestamps)), ascending=False, kind="stable", ignore_index=True)
+    return data
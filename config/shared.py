@@ -0,0 +1,88 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Parsed tables shared between plot processes. The parent writes each numeric and
+# datetime column as an .npy file once, the children memory-map them read-only,
+# so every process sees the same physical pages instead of its own parsed copy.
+
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# numpy dtype kinds that map directly onto a flat buffer: bool, ints, floats, datetimes, timedeltas
+SHAREABLE_KINDS = "biufmM"
+
+
+def _is_shareable(values: pd.Series | pd.Index) -> bool:
+    return isinstance(values.dtype, np.dtype) and values.dtype.kind in SHAREABLE_KINDS
+
+
+def _export_values(values: pd.Series | pd.Index, path: Path) -> str:
+    # Strings and extension dtypes are small, pickle them instead
+    if _is_shareable(values):
+        np.save(path.with_suffix(".npy"), values.to_numpy())
+        return "array"
+
+    with path.with_suffix(".pkl").open(mode="wb") as fp:
+        pickle.dump(values, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    return "pickle"
+
+
+def _attach_values(kind: str, path: Path) -> np.ndarray | pd.Series | pd.Index:
+    if kind == "array":
+        # Plain ndarray view of the read-only mapping, pandas wraps it without copying
+        return np.load(path.with_suffix(".npy"), mmap_mode="r").view(np.ndarray)
+
+    with path.with_suffix(".pkl").open(mode="rb") as fp:
+        return pickle.load(fp)
+
+
+def export_frame(frame: pd.DataFrame, directory: Path) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+
+    columns = [
+        {"name": name, "kind": _export_values(frame[name], directory / f"column{position}")}
+        for position, name in enumerate(frame.columns)
+    ]
+
+    # The default RangeIndex is rebuilt, any other index is stored like a column
+    index = None
+    if not isinstance(frame.index, pd.RangeIndex) or not frame.index.equals(pd.RangeIndex(len(frame))):
+        index = {"name": frame.index.name, "kind": _export_values(frame.index, directory / "index")}
+
+    with (directory / "frame.json").open(mode="w") as fp:
+        json.dump({"rows": len(frame), "columns": columns, "index": index}, fp, indent=2)
+
+
+def attach_frame(directory: Path) -> pd.DataFrame:
+    with (directory / "frame.json").open() as fp:
+        layout = json.load(fp)
+
+    index = pd.RangeIndex(layout["rows"])
+    if layout["index"] is not None:
+        index = pd.Index(_attach_values(layout["index"]["kind"], directory / "index"), name=layout["index"]["name"])
+
+    columns = {
+        column["name"]: pd.Series(
+            _attach_values(column["kind"], directory / f"column{position}"),
+            index=index,
+            copy=False,
+        )
+        for position, column in enumerate(layout["columns"])
+    }
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def export_frames(frames: dict[str, pd.DataFrame], directory: Path) -> None:
+    for name, frame in frames.items():
+        export_frame(frame, directory / name)
+
+
+def attach_frames(directory: Path) -> dict[str, pd.DataFrame]:
+    return {entry.name: attach_frame(entry) for entry in sorted(directory.iterdir()) if entry.is_dir()}
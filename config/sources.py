@@ -0,0 +1,61 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+class DataSources:
+    """Input tables that are parsed on first access and kept for the rest of the process."""
+
+    def __init__(self, loaders: dict[str, Callable[[], pd.DataFrame]]) -> None:
+        self._loaders = loaders
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._locks = {name: threading.Lock() for name in loaders}
+
+    def __getattr__(self, name: str) -> pd.DataFrame:
+        # Only called for names that are not regular attributes
+        if name.startswith("_") or name not in self._loaders:
+            raise AttributeError(name)
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loaders
+
+    def get(self, name: str) -> pd.DataFrame:
+        frame = self._frames.get(name)
+        if frame is not None:
+            return frame
+
+        # One lock per source, so distinct sources still load concurrently
+        with self._locks[name]:
+            if name not in self._frames:
+                self._frames[name] = self._loaders[name]()
+            return self._frames[name]
+
+    def attach(self, frames: dict[str, pd.DataFrame]) -> None:
+        # Use tables parsed elsewhere, e.g. shared by the parent process
+        self._frames.update({name: frame for name, frame in frames.items() if name in self._loaders})
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._frames
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        pending = [name for name in dict.fromkeys(names) if not self.is_loaded(name)]
+        if not pending:
+            return
+
+        # Parsing is dominated by pandas C code, so threads overlap well
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            for _ in pool.map(self.get, pending):
+                pass
+
+    def reset(self, names: Iterable[str] | None = None) -> None:
+        for name in list(self._frames) if names is None else names:
+            self._frames.pop(name, None)
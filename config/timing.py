@@ -0,0 +1,59 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+# Wall time spent in each stage of a build: load, parse, plot, layout and save.
+# Stages nest, and the time is charged to the innermost one only, so a parser
+# called from a chart counts as parse rather than plot and the stages add up.
+
+import contextlib
+import threading
+import timeit
+from collections import defaultdict
+from collections.abc import Iterator
+
+_totals: defaultdict[str, float] = defaultdict(float)
+_totals_lock = threading.Lock()
+
+# Stages open in each thread, innermost last, with the time they were last resumed
+_local = threading.local()
+
+
+def _charge(name: str, seconds: float) -> None:
+    with _totals_lock:
+        _totals[name] += seconds
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Charge the time spent in the block, or the decorated function, to stage name."""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    stack: list[list] = _local.stack
+
+    now = timeit.default_timer()
+    if stack:
+        # Pause the enclosing stage
+        outer = stack[-1]
+        _charge(outer[0], now - outer[1])
+    stack.append([name, now])
+
+    try:
+        yield
+    finally:
+        now = timeit.default_timer()
+        _charge(name, now - stack.pop()[1])
+        if stack:
+            stack[-1][1] = now
+
+
+def get_timings() -> dict[str, float]:
+    with _totals_lock:
+        return dict(_totals)
+
+
+def reset_timings() -> None:
+    with _totals_lock:
+        _totals.clear()
@@ -5,16 +5,38 @@
 # this package.
 
 
+import json
+import socket
+import warnings
+from collections.abc import Callable
 from pathlib import Path
 
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.axes import Axes
+
 import agenoria
+from agenoria import interactive
+from agenoria.parse_config import get_date_range
+from agenoria.plot_24h_viz import draw_sleep_bars, get_end_date, parse_sleep_sessions
+from agenoria.plot_settings import (
+    export_figure,
+    format_24h_week_plot_horizontal,
+    format_24h_week_plot_vertical,
+    get_output_formats,
+)
+from benchmarks.legacy import legacy_draw_sleep_bars
 from config import param as config
+from config import set_date_window, sources
+from config.events import get_sleep_events
 
 # pylint: disable=no-member
 
 
 def get_filename(output_filename: str) -> str:
-    return config["output_data"]["output_directory"] + "/" + output_filename + config["output_format"]["format"]
+    return config["output_data"]["output_directory"] + "/" + output_filename + get_output_formats()[0]
 
 
 def test_diaper_charts() -> None:
@@ -80,6 +102,70 @@ def test_24h_viz() -> None:
     assert file_size_diaper > 25 * 1024, "Test failed - diaper viz"
 
 
+def test_sleep_probability_viz() -> None:
+    # Plot
+    agenoria.plot_sleep_probability_24h_viz()
+
+    # Get the file size of the output PDF
+    path = get_filename(config["output_data"]["output_sleep_probability_viz"])
+    file_size = Path(path).stat().st_size
+
+    # Check the size is greater than 10 KB
+    assert file_size > 10 * 1024, "Test failed - sleep probability viz"
+
+
+def test_export_formats(tmp_path: Path) -> None:
+    figure = plt.figure()
+    figure.add_subplot(111).plot([0, 1], [1, 0])
+
+    output_data = {**config["output_data"], "output_directory": str(tmp_path)}
+    output_format = {**config["output_format"], "format": [".pdf", ".png", ".svg"], "png_dpi": 50}
+    saved = config["output_data"], config["output_format"]
+    config["output_data"], config["output_format"] = output_data, output_format
+    try:
+        export_figure(figure, "formats")
+    finally:
+        config["output_data"], config["output_format"] = saved
+        plt.close(figure)
+
+    # Every format from one figure, the PNG at the configured resolution
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["formats.pdf", "formats.png", "formats.svg"]
+    assert plt.imread(tmp_path / "formats.png").shape[1] < 17 * 50
+
+
+def test_interactive_export(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # No network
+    def refuse(*args: object) -> None:
+        raise OSError("network access in an offline export")
+
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    # A converter process started after the patch, so that it inherits it
+    monkeypatch.setattr(interactive, "_executor", None)
+
+    figure = plt.figure()
+    figure.add_subplot(111).plot([0, 1], [1, 0], label="line")
+
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    monkeypatch.setitem(config["output_format"], "format", [".png", ".html", ".json"])
+    export_figure(figure, "interactive")
+    plt.close(figure)
+    # The converter's warnings are only silenced while it runs
+    assert not [module for _, _, _, module, _ in warnings.filters if "matplotlylib" in str(module)]
+
+    # Converted in the background, the figure was copied before it was cleared
+    interactive.wait_interactive()
+    interactive.shutdown_interactive()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "interactive.html",
+        "interactive.json",
+        "interactive.png",
+    ]
+    # plotly.js is embedded rather than fetched from a CDN
+    html = (tmp_path / "interactive.html").read_text()
+    assert "<script src=" not in html
+    assert json.loads((tmp_path / "interactive.json").read_text())["data"][0]["x"] == [0, 1]
+
+
 def test_growth_charts() -> None:
     # Plot
     agenoria.plot_growth_charts()
@@ -106,3 +192,54 @@ def test_medical_charts() -> None:
 
     # Check the size is greater than 40 KB
     assert file_size > 10 * 1024, "Test failed - medical charts"
+
+
+@pytest.mark.parametrize("since", ["2020-04-22", "2022-01-01"])
+def test_charts_of_an_empty_window(since: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # A window that starts after the last row of the feeding, growth and misc
+    # sources, then after the last row of every source
+    assert sources.feeding_bottle_data["Date"].max() < pd.Timestamp(since)
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    monkeypatch.setitem(config["output_format"], "output_year_one_only", False)
+    monkeypatch.setitem(config["cache"], "directory", str(tmp_path / "cache"))
+
+    set_date_window(pd.Timestamp(since), None)
+    try:
+        assert get_date_range(sources.feeding_bottle_data["Date"]).empty
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", UserWarning)
+            for name in agenoria.__all__:
+                getattr(agenoria, name)()
+                plt.close("all")
+    finally:
+        set_date_window(None, None)
+
+    # Every chart is still written, with empty axes where there is no data
+    assert len(list(tmp_path.glob("*" + get_output_formats()[0]))) == len(agenoria.__all__)
+
+
+def render_sleep_bars(data: pd.DataFrame, draw: Callable[[Axes, pd.DataFrame], object], orientation: str) -> np.ndarray:
+    figure = plt.figure(figsize=(8, 5), dpi=60)
+    fig_ax = figure.add_subplot(111)
+    draw(fig_ax, data)
+    end_date = get_end_date(data["day_number"], first_year_only=False)
+    if orientation == "vertical":
+        format_24h_week_plot_vertical(fig_ax, end_date)
+    else:
+        format_24h_week_plot_horizontal(fig_ax, end_date, "Sleep")
+    figure.canvas.draw()
+    pixels = np.asarray(figure.canvas.buffer_rgba()).copy()
+    plt.close(figure)
+    return pixels
+
+
+def test_sleep_viz_batched_matches_loop() -> None:
+    # A few months of sessions keeps the one-artist-per-session reference quick
+    data = parse_sleep_sessions(get_sleep_events(sources.sleep_data.iloc[:600]))
+
+    # Both orientations rasterize to the same pixels as one artist per session
+    for orientation in ("horizontal", "vertical"):
+        np.testing.assert_array_equal(
+            render_sleep_bars(data, draw_sleep_bars, orientation),
+            render_sleep_bars(data, legacy_draw_sleep_bars, orientation),
+        )
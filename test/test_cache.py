@@ -0,0 +1,94 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from config.cache import filter_frame, load_cached
+
+
+class CountingLoader:
+    def __init__(self) -> None:
+        self.__name__ = "counting_loader"
+        self.calls = 0
+
+    def __call__(self, source_path: Path) -> pd.DataFrame:
+        self.calls += 1
+        return pd.read_csv(source_path)
+
+
+def test_cache_hit_and_invalidation(tmp_path: Path) -> None:
+    source_path = tmp_path / "source.csv"
+    source_path.write_text("Color,Amount\nyellow,1.5\n,2.0\n")
+    cache_dir = tmp_path / "cache"
+    loader = CountingLoader()
+
+    # Cold load parses the file, warm load reads the cache entry
+    cold = load_cached(source_path, loader, cache_dir)
+    warm = load_cached(source_path, loader, cache_dir)
+    assert loader.calls == 1
+    pd.testing.assert_frame_equal(cold, warm)
+    assert pd.isna(warm["Color"].iloc[1])
+
+    # Touching the file without changing it keeps the entry valid
+    stat = source_path.stat()
+    os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_cached(source_path, loader, cache_dir)
+    assert loader.calls == 1
+
+    # Changing the content invalidates the entry
+    source_path.write_text("Color,Amount\ngreen,3.0\n,2.0\n")
+    changed = load_cached(source_path, loader, cache_dir)
+    assert loader.calls == 2
+    assert changed["Color"].iloc[0] == "green"
+
+
+def test_cache_filters(tmp_path: Path) -> None:
+    source_path = tmp_path / "source.csv"
+    dates = pd.date_range("2019-01-01", periods=5000, freq="h")[::-1]
+    pd.DataFrame({"Date": dates.normalize(), "Amount": range(5000)}).to_csv(source_path, index=False)
+    cache_dir = tmp_path / "cache"
+
+    def loader(path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, parse_dates=["Date"])
+
+    data = loader(source_path)
+    filters = [("Date", ">=", pd.Timestamp("2019-03-01")), ("Date", "<=", pd.Timestamp("2019-03-31"))]
+    expected = data[data["Date"].between("2019-03-01", "2019-03-31")]
+    assert len(expected) == 31 * 24
+    pd.testing.assert_frame_equal(filter_frame(data, filters), expected)
+
+    # The cold load filters the parsed frame, the warm one the Parquet copy
+    cold = load_cached(source_path, loader, cache_dir, filters)
+    warm = load_cached(source_path, loader, cache_dir, filters)
+    pd.testing.assert_frame_equal(cold, expected)
+    pd.testing.assert_frame_equal(warm.reset_index(drop=True), expected.reset_index(drop=True))
+
+    # The entry still holds every row
+    assert len(load_cached(source_path, loader, cache_dir)) == len(data)
+
+
+def test_concurrent_writes(tmp_path: Path) -> None:
+    source_path = tmp_path / "source.csv"
+    pd.DataFrame({"Amount": range(20000)}).to_csv(source_path, index=False)
+    cache_dir = tmp_path / "cache"
+    loader = CountingLoader()
+
+    # Every thread misses the cache and writes the same entry
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with ThreadPoolExecutor(8) as executor:
+            frames = list(executor.map(lambda _: load_cached(source_path, loader, cache_dir), range(8)))
+
+    assert all(frame.equals(frames[0]) for frame in frames)
+    assert list(cache_dir.glob("*.tmp")) == []
+    calls = loader.calls
+    pd.testing.assert_frame_equal(load_cached(source_path, loader, cache_dir), frames[0])
+    assert loader.calls == calls
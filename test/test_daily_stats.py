@@ -0,0 +1,129 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import functools
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agenoria.daily_stats import build_daily_stats
+from agenoria.plot_24h_viz import map_poop_color, map_poop_colors
+from agenoria.stats import parse_glow_diaper_data, parse_glow_feeding_data, parse_glow_sleep_data
+from benchmarks.legacy import (
+    legacy_parse_glow_diaper_data,
+    legacy_parse_glow_feeding_data,
+    legacy_parse_glow_sleep_data,
+)
+from benchmarks.synthetic import make_diaper_data, make_feeding_data, make_sleep_data
+from config import sources
+
+parse_glow_feeding_data_ml = functools.partial(parse_glow_feeding_data, key_amount="Amount(ml)")
+
+
+class CountingParser:
+    def __init__(self, parse: Callable[..., pd.DataFrame]) -> None:
+        self.parse = parse
+        self.rows: list[int] = []
+
+    def __call__(self, data: pd.DataFrame, **kwargs: object) -> pd.DataFrame:
+        self.rows.append(len(data))
+        return self.parse(data, **kwargs)
+
+
+def test_feeding_stats_match_loop() -> None:
+    # Bundled data: float bottle amounts, loaded as float32, and integer solid amounts.
+    # The reference aggregates them as float64, so the totals lose no precision.
+    assert sources.feeding_bottle_data["Amount(ml)"].dtype == np.float32
+    for data, key_amount in (
+        (sources.feeding_bottle_data, "Amount(ml)"),
+        (sources.feeding_solid_data, "Amount"),
+    ):
+        pd.testing.assert_frame_equal(
+            parse_glow_feeding_data(data, key_amount),
+            legacy_parse_glow_feeding_data(data.astype({key_amount: np.float64}), key_amount),
+            check_exact=True,
+        )
+
+    # Two years of synthetic data with skipped days and missing amounts
+    data = make_feeding_data(730, seed=1)
+    pd.testing.assert_frame_equal(
+        parse_glow_feeding_data(data, "Amount(ml)"),
+        legacy_parse_glow_feeding_data(data, "Amount(ml)"),
+    )
+
+
+def test_sleep_stats_match_loop() -> None:
+    # Sums are accumulated in a different order, so allow for rounding
+    pd.testing.assert_frame_equal(
+        parse_glow_sleep_data(sources.sleep_data),
+        legacy_parse_glow_sleep_data(sources.sleep_data),
+    )
+
+    # Two years of synthetic sessions, including midnight crossings and one-minute markers
+    data = make_sleep_data(730, seed=1)
+    pd.testing.assert_frame_equal(
+        parse_glow_sleep_data(data),
+        legacy_parse_glow_sleep_data(data),
+    )
+
+
+def test_diaper_stats_match_loop() -> None:
+    for data in (sources.diaper_data, make_diaper_data(730, seed=1)):
+        pd.testing.assert_frame_equal(
+            parse_glow_diaper_data(data),
+            legacy_parse_glow_diaper_data(data),
+            check_exact=True,
+        )
+
+        # Vectorized color lookup agrees with the per-row mapping. Loaded colors are
+        # categorical, whose apply() skips missing values, so map them row by row.
+        np.testing.assert_array_equal(
+            map_poop_colors(data["Color"]),
+            data["Color"].astype(object).apply(map_poop_color).to_numpy(),
+        )
+
+
+def test_incremental_daily_stats(tmp_path: Path) -> None:
+    cases = (
+        (make_feeding_data(400, seed=2), "Time of feeding", parse_glow_feeding_data_ml, 0, ()),
+        (make_sleep_data(400, seed=2), "Begin time", parse_glow_sleep_data, 1, ()),
+        (make_diaper_data(400, seed=2), "Diaper time", parse_glow_diaper_data, 0, ("cumulative_diaper_count",)),
+    )
+
+    for data, time_column, parse, overlap_days, cumulative_columns in cases:
+        store_path = tmp_path / time_column
+        counting_parse = CountingParser(parse)
+
+        # Yesterday's export stops in the middle of a day, today's has ten more days
+        cutoff = data[time_column].min().normalize() + pd.Timedelta(days=390, hours=14)
+        for export in (data[data[time_column] < cutoff], data):
+            daily = build_daily_stats(
+                export,
+                counting_parse,
+                store_path,
+                overlap_days=overlap_days,
+                cumulative_columns=cumulative_columns,
+            )
+
+        # Second run aggregates only the rows from the last stored day onward
+        assert counting_parse.rows[1] < len(data) / 20
+        pd.testing.assert_frame_equal(daily, parse(data))
+
+
+def test_edited_history_is_aggregated_again(tmp_path: Path) -> None:
+    data = make_feeding_data(100, seed=3)
+    build_daily_stats(data, parse_glow_feeding_data_ml, tmp_path / "feeding")
+
+    # A corrected amount early in the history, the number of rows unchanged
+    edited = data.copy()
+    edited.loc[edited["Time of feeding"].idxmin(), "Amount(ml)"] += 10
+    counting_parse = CountingParser(parse_glow_feeding_data_ml)
+    daily = build_daily_stats(edited, counting_parse, tmp_path / "feeding")
+
+    assert counting_parse.rows == [len(edited)]
+    pd.testing.assert_frame_equal(daily, parse_glow_feeding_data_ml(edited))
@@ -0,0 +1,106 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from agenoria.plot_24h_viz import parse_sleep_sessions
+from benchmarks.legacy import legacy_parse_sleep_sessions
+from benchmarks.synthetic import make_sleep_data
+from config import param, sources
+from config.events import (
+    MISSING_TIME,
+    EventStore,
+    get_day,
+    get_diaper_events,
+    get_sleep_events,
+    get_solid_events,
+)
+from config.sources import DataSources
+
+SESSION_COLUMNS = ["day_number", "timestamp_hour", "end_timestamp_hour", "duration", "crosses_midnight", "offset"]
+
+
+def test_day_index() -> None:
+    data = pd.DataFrame(
+        {
+            "Diaper time": pd.to_datetime(
+                ["2020-05-24 07:00", "2020-05-21 23:59", "2020-05-21 08:05", None, "2020-05-20 00:00"],
+            ),
+            "Color": ["green", None, "yellow", "brown", "yellow"],
+        },
+    )
+    events = get_diaper_events(data)
+
+    # Sorted by time, the row without a time left out
+    assert len(events) == 4
+    assert (np.diff(events.start) >= 0).all()
+    assert events.first_day == get_day("2020-05-20")
+    assert events.last_day == get_day("2020-05-24")
+    assert events.get_labels().tolist() == ["yellow", "yellow", None, "green"]
+
+    # Days without events are empty slices, days outside the range are clipped
+    assert events.get_day_slice(get_day("2020-05-21")) == slice(1, 4)
+    assert events.get_day_slice(get_day("2020-05-21"), get_day("2020-05-22")) == slice(1, 3)
+    assert events.get_day_slice(get_day("2020-05-22"), get_day("2020-05-24")) == slice(3, 3)
+    assert events.get_day_slice(get_day("2020-01-01"), get_day("2021-01-01")) == slice(0, 4)
+
+    # A selection is indexed like the full set
+    selected = events.select(get_day("2020-05-21"), get_day("2020-05-23"))
+    assert np.shares_memory(selected.start, events.start)
+    assert selected.get_labels().tolist() == ["yellow", None]
+    assert selected.get_day_slice(get_day("2020-05-21")) == slice(0, 2)
+    assert selected.get_day_slice(get_day("2020-05-22")) == slice(2, 2)
+
+
+def test_sleep_sessions_match_table() -> None:
+    for data in (sources.sleep_data, make_sleep_data(730, seed=1)):
+        events = get_sleep_events(data)
+        assert (events.end != MISSING_TIME).all()
+
+        # Same sessions as parsed from the table, in time order
+        expected = legacy_parse_sleep_sessions(data).sort_values("Begin time", kind="stable", ignore_index=True)
+        pd.testing.assert_frame_equal(
+            parse_sleep_sessions(events)[SESSION_COLUMNS],
+            expected[SESSION_COLUMNS],
+            check_dtype=False,
+        )
+
+
+def test_store_follows_sources() -> None:
+    tables = iter(
+        [
+            pd.DataFrame({"Begin time": pd.to_datetime(["2020-05-20 20:00"]), "End time": pd.NaT}),
+            pd.DataFrame({"Begin time": pd.to_datetime(["2020-05-21 20:00", "2020-05-22 20:00"]), "End time": pd.NaT}),
+        ],
+    )
+    data_sources = DataSources({"sleep_data": lambda: next(tables)})
+    store = EventStore(data_sources)
+
+    # Built once per table
+    assert store.sleep is store.get("sleep")
+    assert len(store.sleep) == 1
+    assert store.sleep.end[0] == MISSING_TIME
+
+    # Rebuilt once the table is replaced
+    data_sources.reset()
+    assert len(store.sleep) == 2
+
+
+def test_solid_events_without_optional_columns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # An export with neither Unit type nor Ingredients, which the schema does not require
+    solid_path = tmp_path / "glow_feed_solid.csv"
+    solid_path.write_text("Time of feeding,Amount\n05/21/2020 8:05:19 AM,2\n05/20/2020 11:30:00 AM,3\n")
+    monkeypatch.setitem(param["cache"], "enabled", False)
+    monkeypatch.setitem(param["input_data"], "data_feed_solid", str(solid_path))
+
+    events = get_solid_events(config.load_source("feeding_solid_data"))
+    assert events.amount.tolist() == [3.0, 2.0]
+    assert events.get_labels().tolist() == [None, None]
@@ -0,0 +1,70 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from agenoria.growth_reference import (
+    MEASURES,
+    GrowthCurve,
+    compute_percentiles,
+    compute_z_scores,
+    get_age_months,
+    get_growth_curve,
+    interpolate_lms,
+    normal_cdf,
+)
+
+
+def test_normal_cdf() -> None:
+    z = np.linspace(-6, 6, 1201)
+    expected = [0.5 * (1 + math.erf(value / math.sqrt(2))) for value in z]
+    np.testing.assert_allclose(normal_cdf(z), expected, atol=1e-7)
+
+
+def test_tabulated_percentiles() -> None:
+    # Each CDC percentile line scores as its own percentile, for all four measures
+    for measure in MEASURES:
+        curve = get_growth_curve(measure)
+        for expected, line in zip((3, 5, 10, 25, 50, 75, 90, 95, 97), curve.percentiles, strict=True):
+            np.testing.assert_allclose(compute_percentiles(curve, curve.x, line), expected, atol=0.01)
+
+    # Loaded once per process
+    assert get_growth_curve("weight") is get_growth_curve("weight")
+
+
+def test_z_scores() -> None:
+    # L of 0 uses the log form, values between points are interpolated
+    curve = GrowthCurve(
+        x=np.array([0.0, 2.0]),
+        lms=np.array([[0.0, 1.0], [10.0, 20.0], [0.1, 0.1]]),
+        percentiles=np.empty((9, 2)),
+    )
+    z_scores = compute_z_scores(curve, [0, 1, 2, 3, 1], [10 * math.e, 15, 22, 20, np.nan])
+
+    np.testing.assert_allclose(z_scores[:3], [10, 0, 1])
+    # Outside the reference range and missing measurements are NaN
+    assert np.isnan(z_scores[3:]).all()
+
+
+def test_cdc_length_at_age() -> None:
+    # lenageinf.csv, boys at 6.5 months: L, M and S as published by the CDC
+    l_value, m_value, s_value = -1.456837849, 67.8601799, 0.038811994
+    curve = get_growth_curve("length")
+    np.testing.assert_allclose(np.ravel(interpolate_lms(curve, [6.5])), [l_value, m_value, s_value])
+
+    z_score = ((70 / m_value) ** l_value - 1) / (l_value * s_value)
+    assert math.isclose(z_score, 0.7821, abs_tol=1e-4)
+    np.testing.assert_allclose(compute_z_scores(curve, [6.5], [70]), [z_score])
+
+    # Measured 198 days after birth, 6.5 calendar months, not 7.07 four-week months
+    birthday = pd.Timestamp("2018-11-21")
+    age = get_age_months(pd.Series([birthday + pd.Timedelta(days=198)]), birthday)
+    np.testing.assert_allclose(age, [198 / 30.4375])
+    percentile = compute_percentiles(curve, age, [70])[0]
+    assert math.isclose(percentile, normal_cdf(z_score) * 100, abs_tol=0.1)
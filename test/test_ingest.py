@@ -0,0 +1,88 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import config
+from benchmarks.synthetic import split_export, write_glow_export
+from config import param
+from config.ingest import get_input_parts, read_parts
+from config.schema import DIAPER
+
+
+def test_read_parts(tmp_path: Path) -> None:
+    (tmp_path / "part-1.csv").write_text(
+        "Diaper time,In the diaper,Color\n"
+        "05/21/2020 8:05:19 AM,pee,\n"
+        "05/20/2020 11:30:00 PM,poo,yellow\n"
+        "05/20/2020 11:30:00 PM,poo,yellow\n",
+    )
+    # A later export: the same rows with a padded hour and other columns order, and a new one
+    (tmp_path / "part-2.csv").write_text(
+        "In the diaper,Diaper time,Color\n"
+        "pee and poo,05/22/2020 9:00:00 AM,green\n"
+        "pee,05/21/2020 08:05:19 AM,\n"
+        "poo,05/20/2020 11:30:00 PM,yellow\n",
+    )
+
+    parts = get_input_parts(tmp_path)
+    assert parts == get_input_parts(tmp_path / "part-*.csv")
+    assert get_input_parts(parts[0]) == [parts[0]]
+
+    # Small chunks, so the rows repeated within a part span chunks and are kept, as in a single export
+    data = read_parts(parts, DIAPER, chunk_rows=1)
+    assert list(data.columns) == ["Diaper time", "In the diaper", "Color"]
+    assert data["Diaper time"].tolist() == [
+        pd.Timestamp("2020-05-22 09:00:00"),
+        pd.Timestamp("2020-05-21 08:05:19"),
+        pd.Timestamp("2020-05-20 23:30:00"),
+        pd.Timestamp("2020-05-20 23:30:00"),
+    ]
+
+    empty = read_parts([], DIAPER)
+    assert list(empty.columns) == ["Diaper time", "In the diaper", "Color"]
+    assert empty.empty and pd.api.types.is_datetime64_any_dtype(empty["Diaper time"])
+
+    with pytest.raises(FileNotFoundError):
+        get_input_parts(tmp_path / "missing-*.csv")
+
+
+def test_multi_part_source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(param["cache"], "directory", str(tmp_path / "cache"))
+    single = config.load_source("sleep_data")
+
+    # The bundled export split the way Glow exports it, every part overlapping the last
+    parts_dir = tmp_path / "parts"
+    split_export(config.get_source_path("sleep_data"), parts_dir, rows=1000, overlap=100)
+    monkeypatch.setitem(param["input_data"], "data_sleep", str(parts_dir))
+
+    merged = config.load_source("sleep_data")
+    expected = single.sort_values("Begin time", ascending=False, kind="stable", ignore_index=True)
+    pd.testing.assert_frame_equal(merged, expected)
+
+    # Served from the cache until a part is added
+    pd.testing.assert_frame_equal(config.load_source("sleep_data"), merged)
+    (parts_dir / "glow_sleep-999.csv").write_text("Begin time,End time\n01/01/2021 1:00:00 AM,01/01/2021 2:00:00 AM\n")
+    assert len(config.load_source("sleep_data")) == len(merged) + 1
+
+
+def test_synthetic_export(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(param["cache"], "enabled", False)
+    input_paths = write_glow_export(tmp_path, 60)
+    for config_key, input_path in input_paths.items():
+        monkeypatch.setitem(param["input_data"], config_key, str(input_path))
+
+    # Every export parses with the loaders of the real ones
+    tables = {name: config.load_source(name) for name in config.SOURCES}
+    assert all(len(table) for table in tables.values())
+
+    sleep = tables["sleep_data"]
+    assert (sleep["End time"].dt.normalize() > sleep["Begin time"].dt.normalize()).any()
+    # The empty column Hatch appends is not read
+    assert "Unnamed: 9" not in tables["hatch_data"].columns
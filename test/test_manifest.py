@@ -0,0 +1,70 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from agenoria import manifest
+from agenoria.manifest import get_chart_hash, get_output_paths, is_up_to_date, read_manifest, write_manifest
+from config import param as config
+
+
+@pytest.fixture
+def output_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    return tmp_path
+
+
+def test_chart_hash(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    input_path = tmp_path / "sleep.csv"
+    input_path.write_text("Begin time,End time\n")
+    chart_hash = get_chart_hash("build_daily_sleep_stats_charts", [input_path], {})
+
+    # Stable for the same inputs
+    assert get_chart_hash("build_daily_sleep_stats_charts", [input_path], {}) == chart_hash
+    assert get_chart_hash("build_daily_diaper_charts", [input_path], {}) != chart_hash
+
+    # An edited input file
+    input_path.write_text("Begin time,End time\n2019-01-01 00:00:00,2019-01-01 01:00:00\n")
+    edited_hash = get_chart_hash("build_daily_sleep_stats_charts", [input_path], {})
+    assert edited_hash != chart_hash
+
+    # A setting every chart depends on
+    monkeypatch.setitem(config["output_format"], "dpi", 1)
+    setting_hash = get_chart_hash("build_daily_sleep_stats_charts", [input_path], {})
+    assert setting_hash != edited_hash
+
+    # A chart of the --since/--until window only
+    monkeypatch.setattr(manifest, "get_date_window", lambda: (pd.Timestamp("2019-01-01"), None))
+    window_hash = get_chart_hash("build_daily_sleep_stats_charts", [input_path], {})
+    assert window_hash != setting_hash
+
+    # A new release of the plotting code
+    monkeypatch.setattr(manifest, "get_package_version", lambda: "0.0.0-test")
+    assert get_chart_hash("build_daily_sleep_stats_charts", [input_path], {}) != window_hash
+
+
+def test_up_to_date(output_directory: Path) -> None:
+    charts = {"Sleep": {"hash": "abc", "chart": "build_daily_sleep_stats_charts"}}
+    write_manifest(output_directory, charts)
+    assert read_manifest(output_directory) == charts
+
+    # Every output file must still be there
+    assert not is_up_to_date(charts, "Sleep", "abc")
+    for path in get_output_paths("Sleep"):
+        path.touch()
+    assert is_up_to_date(charts, "Sleep", "abc")
+
+    assert not is_up_to_date(charts, "Sleep", "def")
+    assert not is_up_to_date(charts, "Diaper", "abc")
+
+
+def test_manifest_version(output_directory: Path) -> None:
+    # A manifest written by another version is ignored, every chart is rebuilt
+    (output_directory / manifest.MANIFEST_NAME).write_text('{"version": 0, "charts": {"Sleep": {}}}')
+    assert read_manifest(output_directory) == {}
@@ -0,0 +1,59 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import numpy as np
+import pandas as pd
+
+from agenoria.occupancy import bin_events, build_occupancy, get_weekly_probability
+
+START = pd.Timestamp("2020-01-01")
+
+
+def test_build_occupancy() -> None:
+    begin = pd.Series(pd.to_datetime(["2020-01-01 01:00", "2020-01-01 23:30", "2020-01-02 12:00", None]))
+    end = pd.Series(pd.to_datetime(["2020-01-01 01:30", "2020-01-02 00:15", "2020-01-02 12:00", None]))
+
+    occupancy = build_occupancy(begin, end, START, 3)
+
+    assert occupancy.shape == (3, 1440)
+    assert occupancy.dtype == np.uint8
+
+    # Half-open interval within a day
+    assert occupancy[0, 60:90].all()
+    assert not occupancy[0, 59] and not occupancy[0, 90]
+
+    # Interval crossing midnight is split over both days
+    assert occupancy[0, 1410:].all()
+    assert occupancy[1, :15].all() and not occupancy[1, 15]
+
+    # Zero-length and missing intervals are ignored
+    assert occupancy.sum() == 30 + 30 + 15
+
+
+def test_bin_events() -> None:
+    times = pd.Series(
+        pd.to_datetime(["2020-01-01 08:00:00", "2020-01-01 08:00:30", "2020-01-02 20:15:00", "2019-12-31 23:59:00"])
+    )
+
+    counts = bin_events(times, START, 2)
+
+    assert counts[0, 480] == 2
+    assert counts[1, 1215] == 1
+    assert counts.sum() == 3
+
+
+def test_weekly_probability() -> None:
+    # Eight days: minute 0 occupied on days 0-1, day 2 not logged, day 7 alone in week two
+    occupancy = np.zeros((8, 1440), dtype=np.uint8)
+    occupancy[[0, 1, 7], 0] = 1
+    logged_days = np.array([True, True, False, True, True, True, True, False])
+
+    probability = get_weekly_probability(occupancy, logged_days)
+
+    assert probability.shape == (2, 1440)
+    assert probability[0, 0] == 2 / 6
+    assert probability[0, 1] == 0
+    assert np.isnan(probability[1]).all()
@@ -0,0 +1,108 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import re
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+import agenoria
+from agenoria import paging
+from agenoria.paging import Page, PageData, export_pages, get_pages, select_days
+from agenoria.plot_24h_viz import get_end_date, parse_sleep_sessions
+from config import events
+from config import param as config
+
+
+def count_pages(path: Path) -> int:
+    # Page objects, not the /Pages tree
+    return len(re.findall(rb"/Type\s*/Page\b", path.read_bytes()))
+
+
+def draw_page(page: Page, page_data: PageData) -> Figure:
+    (data,) = page_data
+    figure = plt.figure()
+    fig_ax = figure.add_subplot(111)
+    fig_ax.scatter(data["day_number"], data["timestamp_hour"])
+    fig_ax.set_xlim(page.first_day, page.last_day)
+    return figure
+
+
+def test_get_pages() -> None:
+    assert get_pages(365, 26) == [Page(1, 182), Page(183, 364), Page(365, 546)]
+    assert get_pages(364, 52) == [Page(1, 364)]
+
+    data = pd.DataFrame({"day_number": [1, 1, 2, 8, 9, 15]})
+    assert select_days(data, 1, 7)["day_number"].tolist() == [1, 1, 2]
+    assert select_days(data, 8, 14)["day_number"].tolist() == [8, 9]
+    assert select_days(data, 22, 28).empty
+
+
+def test_paged_24h_viz(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    monkeypatch.setitem(config["output_format"], "format", [".pdf", ".png"])
+    monkeypatch.setitem(config["output_format"], "output_year_one_only", False)
+    monkeypatch.setitem(config["output_format"], "viz_page_weeks", 26)
+    monkeypatch.setitem(config, "cache", {"enabled": False})
+    figures = plt.get_fignums()
+
+    agenoria.plot_sleep_24h_viz()
+
+    # Every page of the history in the PDF, the last one in the PNG
+    end_date = get_end_date(parse_sleep_sessions(events.sleep)["day_number"], first_year_only=False)
+    path = tmp_path / f"{config['output_data']['output_sleep_viz']}.pdf"
+    assert count_pages(path) == len(get_pages(end_date, 26)) > 1
+    assert (tmp_path / f"{config['output_data']['output_sleep_viz']}.png").exists()
+
+    # The pages were released in turn, only the figure of the PNG is left
+    assert len(plt.get_fignums()) <= len(figures) + 1
+    plt.close("all")
+
+
+def test_pages_reused(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("pypdf")
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    monkeypatch.setitem(config, "cache", {"enabled": True, "directory": str(tmp_path / "cache")})
+
+    drawn: list[Page] = []
+
+    def count_draws(page: Page, page_data: PageData) -> Figure:
+        drawn.append(page)
+        return draw_page(page, page_data)
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"day_number": np.arange(1, 71), "timestamp_hour": rng.uniform(0, 24, 70)})
+    pages = get_pages(70, 2)
+
+    output_path = tmp_path / "paged.pdf"
+    export_pages("paged", pages, (data,), count_draws)
+    assert len(drawn) == len(pages) == count_pages(output_path) == 5
+    first = output_path.read_bytes()
+
+    # Nothing changed, every page is copied from the cache
+    drawn.clear()
+    export_pages("paged", pages, (data,), count_draws)
+    assert drawn == []
+    assert count_pages(output_path) == 5
+
+    # An entry changed on the last page redraws that page only, its previous copy is dropped
+    data.loc[len(data) - 1, "timestamp_hour"] = 12.0
+    drawn.clear()
+    export_pages("paged", pages, (data,), count_draws)
+    assert drawn == [pages[-1]]
+    assert output_path.read_bytes() != first
+    assert len(list((tmp_path / "cache/viz_pages/paged").iterdir())) == 5
+
+    # Without pypdf every page is drawn straight into the output
+    monkeypatch.setattr(paging, "pypdf", None)
+    drawn.clear()
+    export_pages("paged", pages, (data,), count_draws)
+    assert drawn == pages
+    assert count_pages(output_path) == 5
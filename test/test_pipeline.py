@@ -0,0 +1,104 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import datetime
+import signal
+import time
+
+import pandas as pd
+import pytest
+
+from agenoria import pipeline
+from agenoria.__main__ import parse_args
+from agenoria.pipeline import get_jobs, run_plot_tasks
+from config import get_config_path, get_date_window
+
+
+def plot_ok() -> None:
+    pass
+
+
+def plot_broken() -> None:
+    raise ValueError("missing column")
+
+
+def plot_hanging() -> None:
+    time.sleep(30)
+
+
+def plot_unresponsive() -> None:
+    # Stuck where the worker's alarm cannot reach it
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(30)
+
+
+def plot_window() -> None:
+    if get_date_window() != (pd.Timestamp("2019-01-01"), None):
+        raise ValueError(f"window {get_date_window()}")
+
+
+def test_jobs() -> None:
+    assert get_jobs(4, 2) == 2
+    assert get_jobs(2, 9) == 2
+    assert 1 <= get_jobs(0, 9) <= 9
+
+
+def test_failures_are_reported() -> None:
+    config_path = get_config_path()
+    tasks = [
+        ("ok", plot_ok, config_path),
+        ("broken", plot_broken, config_path),
+        ("hanging", plot_hanging, config_path),
+        ("ok_after", plot_ok, config_path),
+    ]
+
+    errors, reports = run_plot_tasks(tasks, jobs=2, timeout=1, shared_dirs={})
+
+    # The other charts still run, the failing ones are named with their error
+    assert errors == {
+        "broken": "ValueError: missing column",
+        "hanging": "TimeoutError: timed out after 1 s",
+    }
+
+    # Every chart that was built reports its stages
+    assert sorted(reports) == ["ok", "ok_after"]
+    assert "plot" in reports["ok"]["stages"]
+
+
+def test_unresponsive_worker_is_stopped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pipeline, "TIMEOUT_GRACE", 1)
+    config_path = get_config_path()
+    tasks = [
+        ("unresponsive", plot_unresponsive, config_path),
+        ("ok", plot_ok, config_path),
+        ("ok_after", plot_ok, config_path),
+    ]
+
+    start = time.monotonic()
+    errors, reports = run_plot_tasks(tasks, jobs=1, timeout=1, shared_dirs={})
+
+    # Reported without waiting for the chart, the charts queued behind it run on a new pool
+    assert time.monotonic() - start < 20
+    assert errors == {"unresponsive": "TimeoutError: timed out after 1 s, worker stopped"}
+    assert sorted(reports) == ["ok", "ok_after"]
+
+
+def test_config_arguments() -> None:
+    assert parse_args(["config/config_zlw.toml"]).config == ["config/config_zlw.toml"]
+    # A mistyped configuration is an error, not a build of the default one
+    with pytest.raises(SystemExit):
+        parse_args(["config/config_zlw.tml"])
+
+
+def test_date_window_reaches_workers() -> None:
+    args = parse_args(["--since", "2019-01-01"])
+    assert (args.since, args.until) == (datetime.date(2019, 1, 1), None)
+    with pytest.raises(SystemExit):
+        parse_args(["--since", "2019-02-01", "--until", "2019-01-01"])
+
+    tasks = [("window", plot_window, get_config_path())]
+    errors, _ = run_plot_tasks(tasks, jobs=1, timeout=0, shared_dirs={}, date_window=(args.since, args.until))
+    assert not errors
@@ -0,0 +1,68 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from config import param
+from config.schema import GLOW_TIME_FORMAT, downcast_float, parse_timestamps
+
+
+def test_loaded_dtypes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(param["cache"], "enabled", False)
+
+    diaper = config.load_source("diaper_data")
+    assert isinstance(diaper["In the diaper"].dtype, pd.CategoricalDtype)
+    assert isinstance(diaper["Color"].dtype, pd.CategoricalDtype)
+    assert diaper["Diaper time"].dtype == "datetime64[ns]"
+
+    # Whole milliliters fit in float32, the unused ounces are not read at all
+    bottle = config.load_source("feeding_bottle_data")
+    assert bottle["Amount(ml)"].dtype == np.float32
+    assert "Amount(oz)" not in bottle.columns
+    assert bottle["Time of feeding"].dtype == "datetime64[ns]"
+
+    hatch = config.load_source("hatch_data")
+    assert hatch["Date"].dtype == "datetime64[ns]"
+    assert "Notes" not in hatch.columns
+
+
+def test_missing_columns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(param["cache"], "enabled", False)
+
+    # A sleep export given where the diapers are expected
+    export_path = tmp_path / "glow_diaper.csv"
+    export_path.write_text("Begin time,End time\n05/21/2020 8:05:19 AM,05/21/2020 9:05:19 AM\n")
+    monkeypatch.setitem(param["input_data"], "data_diaper", str(export_path))
+
+    with pytest.raises(ValueError, match="'Diaper time', 'In the diaper', 'Color'"):
+        config.load_source("diaper_data")
+
+
+def test_downcast_float() -> None:
+    # Ounces with a fraction do not survive float32
+    assert downcast_float(pd.Series([4.0, np.nan])).dtype == np.float32
+    assert downcast_float(pd.Series([4.0, 0.1])).dtype == np.float64
+
+
+def test_parse_timestamps() -> None:
+    values = pd.Series(["05/21/2020 8:05:19 AM", None, "12/31/2019 12:00:00 AM", "01/01/2020 12:30:00 PM"])
+    pd.testing.assert_series_equal(
+        parse_timestamps(values, GLOW_TIME_FORMAT),
+        pd.to_datetime(values, format=GLOW_TIME_FORMAT),
+    )
+
+    # Arrow has no %f, pandas parses it instead
+    values = pd.Series(["2020-05-21 08:05:19.250"])
+    assert parse_timestamps(values, "%Y-%m-%d %H:%M:%S.%f")[0] == pd.Timestamp("2020-05-21 08:05:19.250")
+
+    # A malformed value is reported by pandas
+    with pytest.raises(ValueError, match="yesterday"):
+        parse_timestamps(pd.Series(["yesterday"]), GLOW_TIME_FORMAT)
@@ -0,0 +1,116 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import datetime
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from agenoria.__main__ import create_service
+from agenoria.serve import ChartCache, ChartServer, parse_date_window, serve_charts
+from benchmarks.synthetic import write_config, write_glow_export
+
+from .test_watch import replace_file
+
+
+def test_chart_cache() -> None:
+    cache: ChartCache[str] = ChartCache(10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+
+    # b is now the least recently used
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.size == 8
+
+    # Never more than the whole cache
+    cache.put("d", b"12345678901")
+    assert cache.get("d") is None
+    assert cache.size == 8
+
+    cache.drop(lambda key: key == "a")
+    assert cache.get("a") is None
+    assert cache.size == 4
+
+
+def test_parse_date_window() -> None:
+    default = (datetime.date(2019, 1, 1), None)
+    assert parse_date_window({}, default) == default
+    assert parse_date_window({"until": "2019-02-01"}, default) == (datetime.date(2019, 1, 1), datetime.date(2019, 2, 1))
+    with pytest.raises(ValueError, match="since"):
+        parse_date_window({"since": "2019-03-01", "until": "2019-02-01"})
+    with pytest.raises(ValueError, match="month"):
+        parse_date_window({"since": "2019-13-01"})
+
+
+def get(url: str) -> tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, b""
+
+
+def test_serve_charts(tmp_path: Path) -> None:
+    input_paths = write_glow_export(tmp_path / "data", 60)
+    config_path = write_config(tmp_path / "child.toml", input_paths, tmp_path / "build")
+    service = create_service([config_path], 1, 0, (None, None))
+
+    started = threading.Event()
+    servers: list[ChartServer] = []
+
+    def ready(server: ChartServer) -> None:
+        servers.append(server)
+        started.set()
+
+    thread = threading.Thread(target=serve_charts, args=(service, "127.0.0.1", 0, ready))
+    thread.start()
+    try:
+        assert started.wait(30)
+        url = servers[0].get_url()
+
+        status, content = get(f"{url}/")
+        assert status == 200
+        assert b"medical_charts" in content
+
+        # Rendered once, then from the cache
+        status, png = get(f"{url}/charts/medical_charts.png?config=child")
+        assert status == 200
+        assert png.startswith(b"\x89PNG")
+        assert get(f"{url}/charts/medical_charts.png")[1] == png
+        assert service.renders == 1
+
+        # Concurrent requests for the same chart wait for one rendering
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(get, [f"{url}/charts/medical_charts.svg"] * 4))
+        assert {status for status, _ in results} == {200}
+        assert len({content for _, content in results}) == 1
+        assert service.renders == 2
+
+        # A new export invalidates the charts of its configuration
+        misc_path = input_paths["data_misc"]
+        replace_file(misc_path, "".join(misc_path.read_text().splitlines(keepends=True)[:-10]))
+        status, changed = get(f"{url}/charts/medical_charts.png")
+        assert status == 200
+        assert changed != png
+        assert service.renders == 3
+        assert len(service.cache) == 1
+
+        assert get(f"{url}/charts/medical_charts.png?since=2019-01-01")[0] == 200
+        assert get(f"{url}/charts/unknown.png")[0] == 404
+        assert get(f"{url}/charts/medical_charts.gif")[0] == 404
+        assert get(f"{url}/charts/medical_charts.png?config=other")[0] == 404
+        assert get(f"{url}/charts/medical_charts.png?since=2019-02-30")[0] == 400
+    finally:
+        if servers:
+            servers[0].shutdown()
+        thread.join()
@@ -0,0 +1,28 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import pandas as pd
+
+from config import SOURCES, sources
+from config.shared import attach_frames, export_frames
+
+
+def test_shared_tables_round_trip(tmp_path: Path) -> None:
+    frames = {name: sources.get(name) for name in SOURCES}
+    export_frames(frames, tmp_path)
+    attached = attach_frames(tmp_path)
+
+    assert attached.keys() == frames.keys()
+    for name, frame in frames.items():
+        # Same values, dtypes and index, including the dated index of misc_data
+        pd.testing.assert_frame_equal(attached[name], frame)
+
+    # Numeric and datetime columns are read-only views of the mapped files, not copies
+    sleep_data = attached["sleep_data"]
+    assert not sleep_data["Begin time"].to_numpy().flags.writeable
+    assert not attached["feeding_bottle_data"]["Amount(ml)"].to_numpy().flags.writeable
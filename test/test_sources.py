@@ -0,0 +1,109 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import threading
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import config
+from agenoria.parse_config import get_date_range
+from config import param
+from config.sources import DataSources
+
+
+def test_sources_load_lazily_once() -> None:
+    calls: Counter[str] = Counter()
+    threads: set[int] = set()
+
+    def make_loader(name: str) -> Callable[[], pd.DataFrame]:
+        def loader() -> pd.DataFrame:
+            calls[name] += 1
+            threads.add(threading.get_ident())
+            return pd.DataFrame({"name": [name]})
+
+        return loader
+
+    sources = DataSources({name: make_loader(name) for name in ("a", "b", "c")})
+
+    # Nothing is parsed until a table is accessed
+    assert not calls
+
+    sources.prefetch(["a", "b", "a"])
+    assert calls == Counter({"a": 1, "b": 1})
+    assert threading.get_ident() not in threads
+
+    # Repeated access reuses the parsed frame
+    assert sources.a["name"].iloc[0] == "a"
+    assert sources.get("c")["name"].iloc[0] == "c"
+    assert calls == Counter({"a": 1, "b": 1, "c": 1})
+
+    # Reset drops the frame so the next access reloads it
+    sources.reset(["a"])
+    assert not sources.is_loaded("a")
+    sources.get("a")
+    assert calls["a"] == 2
+
+
+def test_activate_switches_config() -> None:
+    default_path = config.get_config_path()
+    zlw_path = config.ROOT_DIR / "config/config_zlw.toml"
+    assert config.get_config_paths(["--jobs", "2", "config/config_zlw.toml", str(zlw_path)]) == [zlw_path]
+
+    config.sources.get("growth_data")
+    try:
+        config.activate(zlw_path)
+
+        # Updated in place for the modules that imported param, tables dropped
+        assert param["output_data"]["output_sleep_viz"].startswith("ZLW")
+        assert not config.sources.is_loaded("growth_data")
+        assert config.get_source_path("growth_data").parts[-2] == "zlw"
+    finally:
+        config.activate(default_path)
+
+    assert param["output_data"]["output_sleep_viz"].startswith("ZYW")
+
+
+def test_activate_warns_about_plotly_on(tmp_path: Path) -> None:
+    default_path = config.get_config_path()
+    legacy_path = tmp_path / "legacy.toml"
+    # The key the interactive export replaced
+    legacy_path.write_text(default_path.read_text().replace("[output_format]", "[output_format]\nplotly_on = true", 1))
+
+    try:
+        with pytest.warns(UserWarning, match="plotly_on"):
+            config.activate(legacy_path)
+    finally:
+        config.activate(default_path)
+
+
+@pytest.mark.parametrize("cache_enabled", [False, True])
+def test_date_window(cache_enabled: bool, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(param["cache"], "enabled", cache_enabled)
+    monkeypatch.setitem(param["cache"], "directory", str(tmp_path))
+    full = config.load_source("sleep_data")
+
+    try:
+        config.set_date_window(pd.Timestamp("2019-01-01"), pd.Timestamp("2019-01-31"))
+        assert not config.sources.is_loaded("sleep_data")
+
+        # Only the rows of the window, the first and last day included
+        sleep = config.sources.sleep_data
+        expected = full[full["Date"].between("2019-01-01", "2019-01-31")]
+        pd.testing.assert_frame_equal(sleep.reset_index(drop=True), expected.reset_index(drop=True))
+        assert sleep["Date"].min() == pd.Timestamp("2019-01-01")
+
+        # Every table, the daily charts span the window
+        assert config.sources.hatch_data["Date"].between("2019-01-01", "2019-01-31").all()
+        assert get_date_range(sleep["Date"]).size == 31
+    finally:
+        config.set_date_window(None, None)
+
+    assert config.get_date_window() == (None, None)
+    assert len(config.sources.sleep_data) == len(full)
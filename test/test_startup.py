@@ -0,0 +1,25 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import sys
+
+import agenoria
+from benchmarks.bench_startup import get_plotting_imports, parse_import_times, run
+
+
+def test_parent_does_not_import_plotting() -> None:
+    # Matplotlib, seaborn and Plotly load in the chart workers only
+    _, stderr = run(["-X", "importtime", "-m", "agenoria", "--help"])
+    modules = parse_import_times(stderr)
+    assert "agenoria.pipeline" in modules
+    assert get_plotting_imports(modules) == []
+
+
+def test_lazy_plot_functions() -> None:
+    plot_fn = agenoria.plot_medical_charts
+    assert plot_fn is sys.modules["agenoria.plot_medical_charts"].plot_medical_charts
+    assert "plot_medical_charts" in dir(agenoria)
+    assert "plot_sleep_24h_viz" in agenoria.__all__
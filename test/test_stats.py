@@ -0,0 +1,69 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from agenoria.stats import CUTOFF, export_stats
+from benchmarks.bench_startup import get_plotting_imports, parse_import_times, run
+from benchmarks.synthetic import START_DATE, write_config, write_glow_export
+from config import param as config
+from config import set_date_window
+
+
+def test_export_stats(tmp_path: Path) -> None:
+    input_paths = write_glow_export(tmp_path / "data", 90)
+    config_path = write_config(tmp_path / "child.toml", input_paths, tmp_path / "build")
+    since = (START_DATE + pd.Timedelta(days=30)).date()
+    _, stderr = run(["-X", "importtime", "-m", "agenoria", str(config_path), "--export-stats", f"--since={since}"])
+
+    # No chart is drawn, so neither Matplotlib nor seaborn is imported
+    assert get_plotting_imports(parse_import_times(stderr)) == []
+
+    stats_dir = tmp_path / "build" / "stats"
+    names = ("feeding_bottle_daily", "feeding_solid_daily", "sleep_daily", "diaper_daily", "diaper_monthly")
+    for name in (*names, "weight_daily"):
+        table = pd.read_parquet(stats_dir / f"{name}.parquet")
+        records = pd.read_json(stats_dir / f"{name}.json", orient="records")
+        assert list(records.columns) == list(table.columns)
+        assert len(records) == len(table) > 0
+
+    # The daily tables start on the first day of the window
+    for name in names[:4]:
+        assert pd.read_parquet(stats_dir / f"{name}.parquet")["date"].iloc[0] == pd.Timestamp(since)
+
+    daily = pd.read_parquet(stats_dir / "diaper_daily.parquet")
+    monthly = pd.read_parquet(stats_dir / "diaper_monthly.parquet")
+    assert monthly["diaper_count"].sum() == daily["daily_total_diaper_count"].sum()
+    assert monthly["constipation_days"].sum() == (daily["poop_count"] == 0).sum()
+    assert monthly["diarrhea_days"].sum() == (daily["poop_ratio"] >= CUTOFF).sum()
+
+
+def test_export_stats_of_an_empty_window(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(config["cache"], "directory", str(tmp_path / "cache"))
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path / "full"))
+    full_paths = export_stats()
+
+    # After the last row of every bundled source
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path / "empty"))
+    set_date_window(pd.Timestamp("2022-01-01"), None)
+    try:
+        empty_paths = export_stats()
+    finally:
+        set_date_window(None, None)
+
+    # Every table is written, without rows but with the columns of a full export
+    assert [path.name for path in empty_paths] == [path.name for path in full_paths]
+    for full_path, empty_path in zip(full_paths, empty_paths, strict=True):
+        if empty_path.suffix == ".parquet":
+            table = pd.read_parquet(empty_path)
+            assert table.empty
+            pd.testing.assert_series_equal(table.dtypes, pd.read_parquet(full_path).dtypes)
+        else:
+            assert pd.read_json(empty_path, orient="records").empty
+    assert not list((tmp_path / "empty").rglob("*.tmp"))
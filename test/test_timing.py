@@ -0,0 +1,30 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import time
+
+from config.timing import get_timings, reset_timings, stage
+
+
+@stage("parse")
+def parse() -> None:
+    time.sleep(0.1)
+
+
+def test_nested_stages() -> None:
+    reset_timings()
+    with stage("plot"):
+        time.sleep(0.01)
+        parse()
+        parse()
+
+    # The parser's time is not counted twice
+    timings = get_timings()
+    assert timings["parse"] >= 0.2
+    assert 0.01 <= timings["plot"] < 0.1
+
+    reset_timings()
+    assert get_timings() == {}
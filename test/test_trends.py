@@ -0,0 +1,65 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agenoria
+from agenoria.trends import TrendSettings, compute_trends, get_min_periods, get_trend_settings
+from config import param as config
+
+
+def test_trends_match_pandas() -> None:
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.normal(10, 3, 400))
+    # Days without a value, alone and in a run longer than the shortest window
+    values[rng.choice(400, 60, replace=False)] = np.nan
+    values[200:215] = np.nan
+
+    settings = TrendSettings(windows=(1, 7, 30), band=(10, 90))
+
+    # Also fewer days than the longest window, fewer than it needs and none at all
+    for days in (values, values[:20], values[:10], values[:0]):
+        trends = compute_trends(days, settings)
+
+        for window in settings.windows:
+            rolling = days.rolling(window, min_periods=get_min_periods(window))
+            expected = {
+                "mean": rolling.mean(),
+                "median": rolling.median(),
+                "low": rolling.quantile(0.1),
+                "high": rolling.quantile(0.9),
+            }
+            for statistic, expected_values in expected.items():
+                pd.testing.assert_series_equal(
+                    trends[f"{statistic}_{window}"],
+                    expected_values,
+                    check_names=False,
+                )
+
+
+def test_trend_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(config, "trends", {"enabled": False})
+    assert get_trend_settings() is None
+
+    monkeypatch.setitem(config, "trends", {"enabled": True, "windows": [30, 7]})
+    assert get_trend_settings() == TrendSettings(windows=(7, 30))
+
+    monkeypatch.setitem(config, "trends", {"enabled": True, "statistic": "mode"})
+    with pytest.raises(ValueError, match="statistic"):
+        get_trend_settings()
+
+
+def test_trend_overlay(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(config, "trends", {"enabled": True, "statistic": "median"})
+    monkeypatch.setitem(config["output_data"], "output_directory", str(tmp_path))
+    monkeypatch.setitem(config["output_format"], "format", ".png")
+
+    agenoria.plot_sleep_stats_charts()
+    assert (tmp_path / f"{config['output_data']['output_daily_sleep_stats_charts']}.png").stat().st_size > 10 * 1024
@@ -0,0 +1,92 @@
+# Copyright 2019 by Jiuguang Wang (www.robo.guru)
+# All rights reserved.
+# This file is part of Agenoria and is released under the MIT License.
+# Please see the LICENSE file that should have been included as part of
+# this package.
+
+import threading
+import time
+from pathlib import Path
+
+import config
+from agenoria.__main__ import parse_args, watch_charts
+from agenoria.watch import get_changed_paths, get_changes, take_snapshot, wait_for_changes
+from benchmarks.synthetic import write_config, write_glow_export
+
+
+def write_child(tmp_path: Path) -> tuple[Path, dict[str, Path]]:
+    input_paths = write_glow_export(tmp_path / "data", 60)
+    # The medical charts only, they are the fastest to render
+    config_path = write_config(tmp_path / "child.toml", input_paths, tmp_path / "build", ("build_medical_charts",))
+    return config_path, input_paths
+
+
+def replace_file(path: Path, text: str) -> None:
+    # Like a new export saved over the old one
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(text)
+    tmp_path.replace(path)
+
+
+def test_changes(tmp_path: Path) -> None:
+    config_path, input_paths = write_child(tmp_path)
+    snapshot = take_snapshot([config_path])
+    assert take_snapshot([config_path]) == snapshot
+
+    misc_path = input_paths["data_misc"]
+    replace_file(misc_path, misc_path.read_text() + "\n")
+    current = take_snapshot([config_path])
+    assert get_changes(snapshot, current) == {config_path: {"misc_data"}}
+    assert get_changed_paths(snapshot, current) == {misc_path}
+
+    # The configuration itself
+    replace_file(config_path, config_path.read_text() + "\n")
+    assert get_changes(current, take_snapshot([config_path])) == {config_path: {None}}
+
+
+def test_wait_for_changes(tmp_path: Path) -> None:
+    config_path, input_paths = write_child(tmp_path)
+    snapshot = take_snapshot([config_path])
+
+    stop = threading.Event()
+    stop.set()
+    assert wait_for_changes([config_path], snapshot, stop) is None
+
+    misc_path = input_paths["data_misc"]
+    timer = threading.Timer(0.3, lambda: replace_file(misc_path, misc_path.read_text() + "\n"))
+    timer.start()
+    current = wait_for_changes([config_path], snapshot, threading.Event(), interval=0.05)
+    timer.join()
+    assert current is not None
+    assert get_changes(snapshot, current) == {config_path: {"misc_data"}}
+
+
+def test_watch_rebuilds_changed_charts(tmp_path: Path) -> None:
+    config_path, input_paths = write_child(tmp_path)
+    chart_path = tmp_path / "build/ZYW_Medical_Charts.pdf"
+    default_path = config.get_config_path()
+
+    stop = threading.Event()
+    statuses: list[int] = []
+    watcher = threading.Thread(
+        target=lambda: statuses.append(watch_charts([config_path], parse_args(["--watch"]), 1, 0, None, stop)),
+    )
+    watcher.start()
+    try:
+        deadline = time.monotonic() + 60
+        while not (tmp_path / "build/manifest.json").exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        built = chart_path.stat().st_mtime_ns
+
+        # A new export is picked up without restarting
+        misc_path = input_paths["data_misc"]
+        replace_file(misc_path, "".join(misc_path.read_text().splitlines(keepends=True)[:-1]))
+        while chart_path.stat().st_mtime_ns == built and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert chart_path.stat().st_mtime_ns != built
+    finally:
+        stop.set()
+        watcher.join()
+        config.activate(default_path)
+
+    assert statuses == [0]